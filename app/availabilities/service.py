@@ -1,6 +1,8 @@
 from core.db_connection import supabase
+from core.db_executor import execute
 from crud.crud_provider import CRUDProvider
 from fastapi import HTTPException
+from tutors_availability.cache import invalidate_tutor_free_slots
 
 from .dataclasses import AvailabilityHours, UnavailabilityHours, AvailabilityResponse, UnavailabilityResponse
 
@@ -10,12 +12,11 @@ unavailability_crud_provider = CRUDProvider('unavailabilities', 'tutor_id')
 
 class AvailabilityService:
     async def get_tutor_availabilities(self, tutor_id: str) -> list[AvailabilityResponse]:
-        response = (
+        response = await execute(
             supabase
             .table("availabilities")
             .select("id, tutor_id, start_time, end_time, recurrence_rule")
             .eq("tutor_id", tutor_id)
-            .execute()
         )
 
         # if response.data is None or len(response.data) == 0:
@@ -26,12 +27,11 @@ class AvailabilityService:
         return response.data
 
     async def get_tutor_unavailabilities(self, tutor_id: str) -> list[UnavailabilityResponse]:
-        response = (
+        response = await execute(
             supabase
             .table("unavailabilities")
             .select("id, tutor_id, start_time, end_time")
             .eq("tutor_id", tutor_id)
-            .execute()
         )
 
         # if response.data is None or len(response.data) == 0:
@@ -47,6 +47,7 @@ class AvailabilityService:
         data["tutor_id"] = tutor_id
 
         created_record = await crud_provider.create(data)
+        invalidate_tutor_free_slots(tutor_id)
         return created_record
 
     async def create_tutor_unavailability(self, tutor_id: str, request: UnavailabilityHours) -> UnavailabilityHours:
@@ -55,7 +56,8 @@ class AvailabilityService:
         data = request.model_dump(mode="json")
         data["tutor_id"] = tutor_id
 
-        created_record = supabase.table("unavailabilities").insert(data).execute()
+        created_record = await execute(supabase.table("unavailabilities").insert(data))
+        invalidate_tutor_free_slots(tutor_id)
         return created_record.data[0]
 
     # CRUD
@@ -74,6 +76,7 @@ class AvailabilityService:
         availability['tutor_id'] = user_id
 
         new_availability = await crud_provider.create(availability)
+        invalidate_tutor_free_slots(user_id)
 
         return AvailabilityHours.model_validate(new_availability)
 
@@ -118,6 +121,7 @@ class AvailabilityService:
             Availability: The updated availability record.
         """
         updated_availability = await crud_provider.update(availability.model_dump(mode='json'), None, user_id)
+        invalidate_tutor_free_slots(user_id)
 
         return AvailabilityHours.model_validate(updated_availability)
 
@@ -133,6 +137,7 @@ class AvailabilityService:
             Availability: The deleted availability record.
         """
         deleted_availability = await crud_provider.delete(id, user_id)
+        invalidate_tutor_free_slots(user_id)
 
         return deleted_availability
 
@@ -157,5 +162,6 @@ class AvailabilityService:
             Unavailability: The deleted unavailability record.
         """
         deleted_unavailability = await unavailability_crud_provider.delete(id, user_id)
+        invalidate_tutor_free_slots(user_id)
 
         return deleted_unavailability
\ No newline at end of file
@@ -1,4 +1,9 @@
-from pydantic import BaseModel
+from typing import List
+
+from pydantic import BaseModel, Field
+
+# Files uploaded in one go through signed upload URLs
+MAX_ATTACHMENTS_PER_REQUEST = 10
 
 
 class UpsertBookingAttachment(BaseModel):
@@ -12,3 +17,11 @@ class UpsertBookingAttachment(BaseModel):
 class BookingAttachment(UpsertBookingAttachment):
     id: int
     created_at: str
+
+
+class AttachmentUploadUrlsRequest(BaseModel):
+    content_types: List[str] = Field(..., min_length=1, max_length=MAX_ATTACHMENTS_PER_REQUEST)
+
+
+class ConfirmAttachmentUploadsRequest(BaseModel):
+    paths: List[str] = Field(..., min_length=1, max_length=MAX_ATTACHMENTS_PER_REQUEST)
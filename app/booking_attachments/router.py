@@ -7,8 +7,9 @@ from fastapi.responses import JSONResponse
 from .service import BookingAttachmentService
 
 attachments_router = APIRouter()
+booking_attachments_service = BookingAttachmentService()
 
 # Example endpoint for uploading files, feel free to test it
 @attachments_router.post("/{booking_id}/upload-attachment")
 async def upload_files(files: Annotated[List[UploadFile], File()], booking_id: int = Path(...)):
-    return await BookingAttachmentService.upload_files(booking_id, files)
\ No newline at end of file
+    return await booking_attachments_service.upload_files(booking_id, files)
\ No newline at end of file
@@ -1,4 +1,6 @@
-from typing import List
+import asyncio
+import os
+from typing import BinaryIO, List
 
 from crud.crud_provider import CRUDProvider
 
@@ -8,9 +10,14 @@ from gotrue.types import UserResponse
 from users.auth import authenticate_user
 from fastapi.responses import JSONResponse
 from core.db_connection import supabase
-import uuid
+from core.db_executor import execute, run_sync
+from starlette.concurrency import run_in_threadpool
+from core.storage import UploadUrl, create_upload_url, new_object_path, public_url, remove_objects, verify_upload
+from storage3.types import UploadResponse as UploadedFile
+from core.uploads import UnconfirmedUploads
 
 crud_provider = CRUDProvider("booking_attachments")
+unconfirmed_uploads = UnconfirmedUploads("attachments", "booking_attachments", "attachment_url")
 
 ALLOWED_CONTENT_TYPES = {
     "image/jpeg",
@@ -21,6 +28,27 @@ ALLOWED_CONTENT_TYPES = {
     "application/x-zip-compressed",
 }
 MAX_FILE_SIZE = 8 * 1024 * 1024  # 8 MB
+MAX_PARALLEL_UPLOADS = int(os.getenv("MAX_PARALLEL_UPLOADS", "4"))
+
+# First bytes of every allowed type, a file has to start with the signature of its declared type
+FILE_SIGNATURES = {
+    "image/jpeg": b"\xff\xd8\xff",
+    "image/png": b"\x89PNG\r\n\x1a\n",
+    "image/gif": (b"GIF87a", b"GIF89a"),
+    "application/pdf": b"%PDF-",
+    "application/zip": (b"PK\x03\x04", b"PK\x05\x06"),
+    "application/x-zip-compressed": (b"PK\x03\x04", b"PK\x05\x06"),
+}
+# Files uploaded through signed URLs are named with the extension of the content type the URL was made for,
+# the uploaded file has to have that type
+CONTENT_TYPE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "application/pdf": ".pdf",
+    "application/zip": ".zip",
+    "application/x-zip-compressed": ".zip",
+}
 
 class BookingAttachmentService:
     async def create_booking_attachment(self, booking_attachment: UpsertBookingAttachment,
@@ -45,49 +73,164 @@ class BookingAttachmentService:
 
         return BookingAttachment.model_validate(deleted_booking_attachment)
 
-    async def upload_files(self, booking_id: int, files: List[UploadFile] = File(...)):
-        for file in files:
-            # Validate content type
-            if file.content_type not in ALLOWED_CONTENT_TYPES:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Unsupported file type: {file.content_type}"
-                )
+    async def upload_files(self, booking_id: int, files: List[UploadFile] = File(...)) -> List[UploadedFile]:
+        """
+        Validate the files and upload them to the ``attachments`` bucket.
 
-            # Read file content in chunks to avoid memory issues
-            size = 0
-            chunk_size = 1024 * 1024  # 1MB
-            while True:
-                chunk = await file.read(chunk_size)
-                if not chunk:
-                    break
-                size += len(chunk)
-                if size > MAX_FILE_SIZE:
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail=f"File {file.filename} exceeds size limit of 8 MB"
-                    )
-
-            # reset file for upload
-            await file.seek(0)
-
-        files_data = []
+        The files are streamed from the temporary files Starlette already spooled them to, so they are never
+        held in memory or copied again. Up to ``MAX_PARALLEL_UPLOADS`` files are uploaded at once. If any upload
+        fails, the files already uploaded are removed again.
 
+        Returns:
+            List[UploadedFile]: The storage paths of the uploaded files, in the order of ``files``.
+        """
         for file in files:
-            file_data = await file.read()
-            filename = str(uuid.uuid4())
-            path = f"{booking_id}/${filename}"
-            res = (supabase.storage
-                   .from_("attachments")
-                   .upload(file=file_data, path=path,
-                           file_options={"upsert": "false",
-                                         "content-type": file.content_type}))
-
-            if not res.path:
+            await _check_file(file)
+
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_UPLOADS)
+        results = await asyncio.gather(
+            *(_upload(semaphore, booking_id, file) for file in files),
+            return_exceptions=True
+        )
+
+        uploaded = [result for result in results if isinstance(result, UploadedFile)]
+        failed = [(file, result) for file, result in zip(files, results) if not isinstance(result, UploadedFile)]
+        if failed:
+            await remove_uploaded_files(uploaded)
+            file, error = failed[0]
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to upload {file.filename}: {str(error)}"
+            )
+
+        return uploaded
+
+    async def attach_files(self, booking_id: int, files: List[UploadFile]) -> List[dict]:
+        """
+        Upload files and add them to a booking, with one insert for all the attachment rows.
+        Nothing is left in the bucket if the insert fails.
+        """
+        uploaded = await self.upload_files(booking_id, files)
+
+        try:
+            return await self._insert_attachments(booking_id, [file_data.path for file_data in uploaded])
+        except Exception:
+            await remove_uploaded_files(uploaded)
+            raise HTTPException(status_code=500, detail="Failed to save the attachments")
+
+    async def create_upload_urls(self, booking_id: int, content_types: List[str]) -> List[UploadUrl]:
+        """
+        Create signed URLs the client uploads attachments to, directly to storage.
+        The uploads are then added to the booking with ``confirm_uploads``.
+        """
+        for content_type in content_types:
+            if content_type not in ALLOWED_CONTENT_TYPES:
                 raise HTTPException(
-                    status_code=500,
-                    detail=f"Failed to upload {file.filename}: {res['error']['message']}"
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unsupported file type: {content_type}"
                 )
-            files_data.append(res)
 
-        return files_data
\ No newline at end of file
+        upload_urls = list(await asyncio.gather(
+            *(create_upload_url("attachments", new_object_path(booking_id) + CONTENT_TYPE_EXTENSIONS[content_type])
+              for content_type in content_types)
+        ))
+        # Removed again unless confirmed before the URLs expire
+        unconfirmed_uploads.add(upload_url.path for upload_url in upload_urls)
+        return upload_urls
+
+    async def confirm_uploads(self, booking_id: int, paths: List[str]) -> List[dict]:
+        """
+        Add files uploaded through ``create_upload_urls`` to a booking, once their type and size are checked.
+        Paths confirmed before (or repeated) are added only once.
+
+        Returns:
+            List[dict]: The attachment rows of the paths.
+        """
+        paths = list(dict.fromkeys(paths))
+        for path in paths:
+            if not _signed_content_types(path):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown upload: {path}")
+
+        await asyncio.gather(
+            *(verify_upload("attachments", path, booking_id, _signed_content_types(path), MAX_FILE_SIZE)
+              for path in paths)
+        )
+
+        urls = [public_url("attachments", path) for path in paths]
+        existing = await execute(supabase.table("booking_attachments").select("*")
+                                 .eq("booking_id", booking_id).in_("attachment_url", urls))
+        attached = {row["attachment_url"] for row in existing.data}
+        new_paths = [path for path, url in zip(paths, urls) if url not in attached]
+
+        inserted = await self._insert_attachments(booking_id, new_paths) if new_paths else []
+        unconfirmed_uploads.confirm(paths)
+        return existing.data + inserted
+
+    async def _insert_attachments(self, booking_id: int, paths: List[str]) -> List[dict]:
+        attachments = [
+            UpsertBookingAttachment(booking_id=booking_id, attachment_url=public_url("attachments", path)).model_dump()
+            for path in paths
+        ]
+        result = await execute(supabase.table("booking_attachments").insert(attachments))
+        return result.data
+
+
+def _signed_content_types(path: str) -> set[str]:
+    """Content types a file uploaded to ``path`` may have, by the extension it was signed with."""
+    return {content_type for content_type, extension in CONTENT_TYPE_EXTENSIONS.items() if path.endswith(extension)}
+
+
+async def _check_file(file: UploadFile) -> None:
+    """Check the type, signature and size of an uploaded file."""
+    if file.content_type not in ALLOWED_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type: {file.content_type}"
+        )
+
+    await file.seek(0)
+    header = await file.read(16)
+    await file.seek(0)
+    if not header.startswith(FILE_SIGNATURES[file.content_type]):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File {file.filename} is not a valid {file.content_type} file"
+        )
+
+    size = file.size
+    if size is None:
+        size = await run_in_threadpool(file.file.seek, 0, os.SEEK_END)
+        await file.seek(0)
+    if size > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File {file.filename} exceeds size limit of 8 MB"
+        )
+
+
+def _open_spooled(file: UploadFile) -> BinaryIO:
+    """
+    A reader of the file Starlette spooled the upload to, which the storage client streams.
+    Small uploads kept in memory by Starlette are written to their temporary file first.
+    """
+    file.file.flush()
+    file.file.seek(0)
+    return open(file.file.fileno(), "rb", closefd=False)
+
+
+async def _upload(semaphore: asyncio.Semaphore, booking_id: int, file: UploadFile) -> UploadedFile:
+    async with semaphore:
+        path = new_object_path(booking_id)
+        bucket = supabase.storage.from_("attachments")
+        with await run_in_threadpool(_open_spooled, file) as data:
+            res = await run_sync(bucket.upload, file=data, path=path,
+                                 file_options={"upsert": "false",
+                                               "content-type": file.content_type})
+
+        if not res.path:
+            raise Exception(f"Upload of {path} failed")
+        return res
+
+
+async def remove_uploaded_files(uploaded: List[UploadedFile]) -> None:
+    await remove_objects("attachments", [file_data.path for file_data in uploaded])
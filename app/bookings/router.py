@@ -3,6 +3,8 @@ from typing import Annotated, Optional, List
 from bookings.dataclasses import TutorBookingResponse, UpdateBookingRequest, ProposeBookingRequest, \
     StudentBookingResponse
 from bookings.service import BookingsService
+from booking_attachments.dataclasses import AttachmentUploadUrlsRequest, ConfirmAttachmentUploadsRequest
+from core.storage import UploadUrl
 from fastapi import APIRouter, Depends, Path, Form, UploadFile, File
 from gotrue.types import UserResponse
 from users.auth import authenticate_user
@@ -60,6 +62,43 @@ async def update_booking(files: List[UploadFile] = None,
     return await bookings_service.update_booking(booking_id, _user_response.user.id, booking_data, files)
 
 
+@bookings_router.post("/bookings/{booking_id}/attachments:upload-urls", response_model=list[UploadUrl])
+async def create_attachment_upload_urls(request: AttachmentUploadUrlsRequest,
+                                        booking_id: int = Path(...),
+                                        _user_response: UserResponse = Depends(authenticate_user)):
+    """
+    Get signed URLs to upload attachments of a booking directly to storage, without sending the files through the API.
+    Confirm the uploads with ``POST /bookings/{booking_id}/attachments:confirm`` once they are finished.
+
+    Args:
+        request (AttachmentUploadUrlsRequest): Content type of every file to upload (at most 10).
+        booking_id (int): The unique identifier of the booking.
+        _user_response (UserResponse): The currently authenticated user.
+
+    Returns:
+        list[UploadUrl]: One signed upload URL per file, in the order of the content types.
+    """
+    return await bookings_service.create_attachment_upload_urls(booking_id, _user_response.user.id, request)
+
+
+@bookings_router.post("/bookings/{booking_id}/attachments:confirm", response_model=str)
+async def confirm_attachment_uploads(request: ConfirmAttachmentUploadsRequest,
+                                     booking_id: int = Path(...),
+                                     _user_response: UserResponse = Depends(authenticate_user)):
+    """
+    Add files uploaded through signed upload URLs to a booking as attachments.
+
+    Args:
+        request (ConfirmAttachmentUploadsRequest): Paths of the uploaded files.
+        booking_id (int): The unique identifier of the booking.
+        _user_response (UserResponse): The currently authenticated user.
+
+    Returns:
+        str: A confirmation message indicating the attachments were added.
+    """
+    return await bookings_service.confirm_attachment_uploads(booking_id, _user_response.user.id, request)
+
+
 @bookings_router.post("/bookings:propose", response_model=str)
 async def propose_booking(files: List[UploadFile] = None,
                           booking_data: ProposeBookingRequest = Depends(_parse_from_post_request),
@@ -2,6 +2,7 @@ import os
 from typing import Optional, List
 
 from core.db_connection import supabase
+from core.db_executor import execute, run_sync
 from crud.crud_provider import CRUDProvider
 from fastapi import HTTPException, Form, UploadFile
 from pydantic import ValidationError
@@ -10,7 +11,9 @@ from datetime import datetime
 from .dataclasses import Booking, UpsertBooking, TutorBookingResponse, StudentBookingResponse, ProposeBooking, \
     ProposeBookingRequest, UpdateBooking, UpdateBookingRequest
 from booking_attachments.service import BookingAttachmentService
-from booking_attachments.dataclasses import UpsertBookingAttachment
+from booking_attachments.dataclasses import AttachmentUploadUrlsRequest, ConfirmAttachmentUploadsRequest
+from core.storage import UploadUrl
+from tutors_availability.cache import invalidate_tutor_free_slots
 
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -19,19 +22,26 @@ crud_provider = CRUDProvider("bookings")
 booking_attachments_service = BookingAttachmentService()
 
 
-def check_if_booking_exists(booking_id: int) -> None | HTTPException:
-    booking = supabase.table("bookings").select("*").eq("id", booking_id).execute()
+async def invalidate_tutors_of_offers(offer_ids: List[int]) -> None:
+    """Invalidate the cached free slots of the tutors of the offers, after their bookings were written."""
+    offers = await execute(supabase.table("offers").select("tutor_id").in_("id", list(set(offer_ids))))
+    for offer in offers.data:
+        invalidate_tutor_free_slots(offer["tutor_id"])
+
+
+async def check_if_booking_exists(booking_id: int) -> None | HTTPException:
+    booking = await execute(supabase.table("bookings").select("*").eq("id", booking_id))
     if not booking.data:
         raise HTTPException(404, 'Booking not found')
 
 
-def update_booking_status(booking_id: int, status: str) -> str:
-    supabase.table("bookings").update({"status": status}).eq("id", booking_id).execute()
+async def update_booking_status(booking_id: int, status: str) -> str:
+    await execute(supabase.table("bookings").update({"status": status}).eq("id", booking_id))
     return f"Booking {status} successfully"
 
 
-def update_booking_is_paid(booking_id: int, is_paid: bool) -> str:
-    supabase.table("bookings").update({"is_paid": is_paid}).eq("id", booking_id).execute()
+async def update_booking_is_paid(booking_id: int, is_paid: bool) -> str:
+    await execute(supabase.table("bookings").update({"is_paid": is_paid}).eq("id", booking_id))
     return f"Booking marked as {'paid' if is_paid else 'unpaid'} successfully"
 
 
@@ -39,9 +49,9 @@ class BookingsService:
     async def get_bookings_by_tutor(self, tutor_id: str) -> list[TutorBookingResponse]:
         await self._check_tutor_exists(tutor_id)
 
-        bookings_by_tutor = supabase.rpc('get_bookings_by_tutor_fix', {
+        bookings_by_tutor = await execute(supabase.rpc('get_bookings_by_tutor_fix', {
             'tutor_uuid': str(tutor_id)
-        }).execute()
+        }))
 
         return bookings_by_tutor.data
 
@@ -51,9 +61,9 @@ class BookingsService:
         except HTTPException as e:
             # if you are not a tutor, you are a student
             if e.status_code == 403:
-                bookings_by_student = supabase.rpc('get_bookings_by_student_fix', {
+                bookings_by_student = await execute(supabase.rpc('get_bookings_by_student_fix', {
                     'student_uuid': str(student_id)
-                }).execute()
+                }))
                 return bookings_by_student.data
         raise HTTPException(403, f"You are not a student!")
 
@@ -71,7 +81,7 @@ class BookingsService:
             end_date=end_date,
             notes=booking_data.notes)
 
-        booking = supabase.table("bookings").insert(new_booking.model_dump(mode="json")).execute()
+        booking = await execute(supabase.table("bookings").insert(new_booking.model_dump(mode="json")))
         if not booking.data:
             raise HTTPException(400, 'Booking proposal failed')
 
@@ -82,7 +92,7 @@ class BookingsService:
 
     async def update_booking(self, booking_id: int, user_id: str, update_booking_data: UpdateBookingRequest, files: Optional[List[UploadFile]] = None) -> str:
 
-        check_if_booking_exists(booking_id)
+        await check_if_booking_exists(booking_id)
         if not await self._check_if_user_is_student_or_tutor_for_booking(booking_id, user_id):
             raise HTTPException(403, "Only the tutor or the student can mark this booking as rejected.")
 
@@ -99,7 +109,7 @@ class BookingsService:
             idfilter = tmp[0:-1] + ")"
 
             # fetch attachments that are in the list
-            attachments = supabase.table("booking_attachments").select("*").filter("id", "in", idfilter).execute()
+            attachments = await execute(supabase.table("booking_attachments").select("*").filter("id", "in", idfilter))
             if len(attachments.data) == 0: raise HTTPException(400, "Attachments selected for deletion do not exist")
 
             attachments = attachments.data
@@ -109,59 +119,81 @@ class BookingsService:
                 filepath = attachment.get("attachment_url").split(f"{SUPABASE_URL}/storage/v1/object/public/attachments/")[1]
                 delete_paths.append(filepath)
 
-            _ = supabase.storage.from_("attachments").remove(delete_paths)
+            _ = await run_sync(supabase.storage.from_("attachments").remove, delete_paths)
 
-            _ = supabase.table("booking_attachments").delete().filter("id", "in", idfilter).execute()
+            _ = await execute(supabase.table("booking_attachments").delete().filter("id", "in", idfilter))
 
         updated_booking = UpdateBooking(
             notes=update_booking_data.notes,
         )
-        supabase.table("bookings").update(updated_booking.model_dump()).eq("id", booking_id).execute()
+        await execute(supabase.table("bookings").update(updated_booking.model_dump()).eq("id", booking_id))
         return 'Booking updated successfully'
 
+    async def create_attachment_upload_urls(self, booking_id: int, user_id: str,
+                                            request: AttachmentUploadUrlsRequest) -> List[UploadUrl]:
+        if not await self._check_if_user_is_student_or_tutor_for_booking(booking_id, user_id):
+            raise HTTPException(403, "Only the tutor or the student can add attachments to this booking.")
+
+        return await booking_attachments_service.create_upload_urls(booking_id, request.content_types)
+
+    async def confirm_attachment_uploads(self, booking_id: int, user_id: str,
+                                         request: ConfirmAttachmentUploadsRequest) -> str:
+        if not await self._check_if_user_is_student_or_tutor_for_booking(booking_id, user_id):
+            raise HTTPException(403, "Only the tutor or the student can add attachments to this booking.")
+
+        await booking_attachments_service.confirm_uploads(booking_id, request.paths)
+        return 'Attachments added successfully'
+
     async def accept_booking(self, booking_id: int, user_id: str) -> str:
-        check_if_booking_exists(booking_id)
+        await check_if_booking_exists(booking_id)
 
         if not await self._check_if_user_is_tutor_for_booking(booking_id, user_id):
             raise HTTPException(403, "Only the tutor can mark this booking as accepted.")
 
-        return update_booking_status(booking_id, "accepted")
+        response = await update_booking_status(booking_id, "accepted")
+        invalidate_tutor_free_slots(user_id)
+        return response
 
     async def reject_booking(self, booking_id: int, user_id: str) -> str:
-        check_if_booking_exists(booking_id)
+        await check_if_booking_exists(booking_id)
 
         if not await self._check_if_user_is_tutor_for_booking(booking_id, user_id):
             raise HTTPException(403, "Only the tutor can mark this booking as rejected.")
 
-        return update_booking_status(booking_id, "rejected")
+        response = await update_booking_status(booking_id, "rejected")
+        invalidate_tutor_free_slots(user_id)
+        return response
 
     async def cancel_booking(self, booking_id: int, user_id: str) -> str:
-        check_if_booking_exists(booking_id)
+        await check_if_booking_exists(booking_id)
 
         if not await self._check_if_user_is_tutor_for_booking(booking_id, user_id):
             raise HTTPException(403, "Only the tutor can mark this booking as canceled.")
 
-        return update_booking_status(booking_id, "canceled")
+        response = await update_booking_status(booking_id, "canceled")
+        invalidate_tutor_free_slots(user_id)
+        return response
 
     async def mark_booking_paid(self, booking_id: int, user_id: str) -> str:
-        check_if_booking_exists(booking_id)
+        await check_if_booking_exists(booking_id)
 
         if not await self._check_if_user_is_tutor_for_booking(booking_id, user_id):
             raise HTTPException(403, "Only the tutor can mark this booking as paid.")
 
-        return update_booking_is_paid(booking_id, True)
+        return await update_booking_is_paid(booking_id, True)
 
     async def mark_booking_unpaid(self, booking_id: int, user_id: str) -> str:
-        check_if_booking_exists(booking_id)
+        await check_if_booking_exists(booking_id)
 
         if not await self._check_if_user_is_tutor_for_booking(booking_id, user_id):
             raise HTTPException(403, "Only the tutor can mark this booking as unpaid.")
 
-        return update_booking_is_paid(booking_id, False)
+        return await update_booking_is_paid(booking_id, False)
 
     # CRUD
     async def create_booking(self, booking: UpsertBooking, id: int = None) -> Booking:
         new_booking = await crud_provider.create(booking.model_dump(exclude="created_at"), id)
+        await invalidate_tutors_of_offers([new_booking["offer_id"]])
 
         return Booking.model_validate(new_booking)
 
@@ -171,12 +203,16 @@ class BookingsService:
         return Booking.model_validate(booking)
 
     async def update_booking2(self, booking: UpsertBooking, id: int = None) -> Booking:
+        old_booking = await crud_provider.get(id) if id else None
         updated_booking = await crud_provider.update(booking.model_dump(exclude="created_at"), id)
+        # The booking may have moved to an offer of another tutor
+        await invalidate_tutors_of_offers([updated_booking["offer_id"]] + ([old_booking["offer_id"]] if old_booking else []))
 
         return Booking.model_validate(updated_booking)
 
     async def delete_booking(self, id: int) -> Booking:
         deleted_booking = await crud_provider.delete(id)
+        await invalidate_tutors_of_offers([deleted_booking["offer_id"]])
 
         return Booking.model_validate(deleted_booking)
 
@@ -184,7 +220,7 @@ class BookingsService:
         """
         Check if ``user_id`` is tutor related to that ``booking_id``.
         """
-        booking = supabase.table("bookings").select("offers(tutor_id)").eq("id", booking_id).single().execute()
+        booking = await execute(supabase.table("bookings").select("offers(tutor_id)").eq("id", booking_id).single())
 
         if not booking.data:
             raise HTTPException(404, f"Booking with ID {booking_id} not found")
@@ -199,7 +235,7 @@ class BookingsService:
         """
         Check if ``user_id`` is either student or tutor related to that ``booking_id``.
         """
-        booking = supabase.table("bookings").select("student_id", "offers(tutor_id)").eq("id", booking_id).single().execute()
+        booking = await execute(supabase.table("bookings").select("student_id", "offers(tutor_id)").eq("id", booking_id).single())
         if not booking.data:
             raise HTTPException(404, f"Booking with ID {booking_id} not found")
 
@@ -220,14 +256,7 @@ class BookingsService:
             raise
 
 async def uploadAttachments(booking_id: int, files: List[UploadFile]):
-    files_data = await booking_attachments_service.upload_files(booking_id, files)
-    for file_data in files_data:
-    # It would be great to push all of them in a single query, dont know how to do it yet tho
-        attachment = UpsertBookingAttachment(
-            booking_id=booking_id,
-                attachment_url=f"{SUPABASE_URL}/storage/v1/object/public/{file_data.full_path}"
-        )
-        supabase.table("booking_attachments").insert(attachment.model_dump()).execute()
+    await booking_attachments_service.attach_files(booking_id, files)
 
 # Some weird thing specific to fastAPI
 # it's required to send both standard data (in our case notes and remove_files
@@ -1,24 +1,147 @@
+import asyncio
+import json
+import logging
+import os
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import List
+from typing import Dict, Optional, Set
+
+from .pubsub import PubSubBackend, create_backend
+
+logger = logging.getLogger(__name__)
+
+# Messages waiting to be sent to one socket. A socket that falls this far behind is disconnected.
+CHAT_SEND_QUEUE_SIZE = int(os.getenv("CHAT_SEND_QUEUE_SIZE", "100"))
+# A single send taking longer than this also disconnects the socket
+CHAT_SEND_TIMEOUT = float(os.getenv("CHAT_SEND_TIMEOUT", "5"))
+
+# "Try Again Later" - the client should reconnect and reload the history
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class ChatConnection:
+    """A socket in a chat room with its own send queue, drained by a writer task."""
+
+    def __init__(self, websocket: WebSocket, chat_id: int):
+        self.websocket = websocket
+        self.chat_id = chat_id
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=CHAT_SEND_QUEUE_SIZE)
+        self.writer: Optional[asyncio.Task] = None
 
 
 class ConnectionManager:
-    """Manage WebSocket connections"""
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """
+    Manage WebSocket connections, grouped into rooms by chat id.
+
+    Messages are published through the pub/sub backend, so sockets connected to other workers get them too.
+    Sending never waits for a client: messages are put on per-socket queues and slow clients are disconnected.
+    """
+
+    def __init__(self, backend: PubSubBackend):
+        self.backend = backend
+        self.rooms: Dict[int, Dict[WebSocket, ChatConnection]] = {}
+        self._connections: Dict[WebSocket, ChatConnection] = {}
+        # Sockets being closed, referenced until they are so the tasks aren't garbage collected
+        self._closing: Set[asyncio.Task] = set()
+        self._started = False
+
+    async def start(self):
+        if not self._started:
+            await self.backend.start(self._received)
+            self._started = True
+
+    async def stop(self):
+        if self._started:
+            await self.backend.stop()
+            self._started = False
+
+        for connection in list(self._connections.values()):
+            self._remove(connection)
 
-    async def connect(self, websocket: WebSocket):
-        self.active_connections.append(websocket)
+    async def connect(self, websocket: WebSocket, chat_id: int):
+        connection = ChatConnection(websocket, chat_id)
+        connection.writer = asyncio.create_task(self._write(connection))
+
+        self._connections[websocket] = connection
+        self.rooms.setdefault(chat_id, {})[websocket] = connection
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        connection = self._connections.get(websocket)
+        if connection:
+            self._remove(connection)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+        connection = self._connections.get(websocket)
+        if connection:
+            self._enqueue(connection, message)
+        else:
+            await websocket.send_text(message)
+
+    async def stream(self, message: str, websocket: WebSocket) -> bool:
+        """
+        Like ``send_personal_message``, for one of many messages sent in a row (e.g. pages of the history).
+        Returns False once the socket is disconnected (evicted as a slow consumer), so the caller stops sending.
+        """
+        connection = self._connections.get(websocket)
+        if connection is None:
+            return False
+        return self._enqueue(connection, message)
+
+    async def broadcast(self, chat_id: int, message: str):
+        await self.start()
+        await self.backend.publish(json.dumps({"chat_id": chat_id, "message": message}))
+
+    async def deliver(self, chat_id: int, message: str):
+        """Queue a message for every socket of the room connected to this worker."""
+        for connection in list(self.rooms.get(chat_id, {}).values()):
+            self._enqueue(connection, message)
+
+    async def _received(self, envelope: str):
+        data = json.loads(envelope)
+        await self.deliver(data["chat_id"], data["message"])
+
+    def _enqueue(self, connection: ChatConnection, message: str) -> bool:
+        try:
+            connection.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"Disconnecting slow consumer from chat {connection.chat_id}")
+            self._evict(connection)
+            return False
+
+    async def _write(self, connection: ChatConnection):
+        try:
+            while True:
+                message = await connection.queue.get()
+                await asyncio.wait_for(connection.websocket.send_text(message), CHAT_SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Disconnecting socket from chat {connection.chat_id}: {str(e) or type(e).__name__}")
+            self._evict(connection)
+
+    def _evict(self, connection: ChatConnection):
+        self._remove(connection)
+        task = asyncio.create_task(self._close(connection.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=SLOW_CONSUMER_CLOSE_CODE), CHAT_SEND_TIMEOUT)
+        except Exception:
+            pass
+
+    def _remove(self, connection: ChatConnection):
+        self._connections.pop(connection.websocket, None)
+
+        room = self.rooms.get(connection.chat_id)
+        if room is not None:
+            room.pop(connection.websocket, None)
+            if not room:
+                del self.rooms[connection.chat_id]
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+        if connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
 
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager(create_backend())
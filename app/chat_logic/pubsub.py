@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# "memory" - single process only, "redis" - fan-out between workers through a Redis compatible server
+CHAT_PUBSUB_BACKEND = os.getenv("CHAT_PUBSUB_BACKEND", "memory")
+CHAT_PUBSUB_URL = os.getenv("CHAT_PUBSUB_URL", "redis://localhost:6379/0")
+CHAT_PUBSUB_CHANNEL = os.getenv("CHAT_PUBSUB_CHANNEL", "chat_messages")
+# Delay before resubscribing after the connection to Redis dropped, doubled on every failed attempt up to the max
+CHAT_PUBSUB_RECONNECT_DELAY = 0.5
+CHAT_PUBSUB_RECONNECT_MAX_DELAY = 30
+
+MessageHandler = Callable[[str], Awaitable[None]]
+
+
+class PubSubBackend:
+    """
+    Delivers the messages published on one channel to every worker.
+
+    ``publish`` is called by the worker that has something to tell, ``handler`` passed to ``start``
+    is called on every worker (including the publishing one) with the message. Messages are plain strings,
+    what they mean is up to the user of the channel (e.g. the chat sends the chat id along with the message).
+    """
+
+    async def start(self, handler: MessageHandler) -> None:
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, message: str) -> None:
+        raise NotImplementedError
+
+
+class InMemoryPubSub(PubSubBackend):
+    def __init__(self):
+        self._handler: Optional[MessageHandler] = None
+
+    async def start(self, handler: MessageHandler) -> None:
+        self._handler = handler
+
+    async def publish(self, message: str) -> None:
+        if self._handler:
+            await self._handler(message)
+
+
+class RedisPubSub(PubSubBackend):
+    """
+    Fan-out through a single Redis channel, every worker subscribes to it.
+
+    Works with any client with the ``redis.asyncio`` interface (``publish`` and ``pubsub``).
+    """
+
+    def __init__(self, client, channel: str = CHAT_PUBSUB_CHANNEL):
+        self.client = client
+        self.channel = channel
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self, handler: MessageHandler) -> None:
+        self._pubsub = self.client.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._reader = asyncio.create_task(self._read(handler))
+
+    async def stop(self) -> None:
+        if self._reader:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub:
+            await self._pubsub.unsubscribe(self.channel)
+            self._pubsub = None
+
+    async def publish(self, message: str) -> None:
+        await self.client.publish(self.channel, message)
+
+    async def _read(self, handler: MessageHandler) -> None:
+        delay = CHAT_PUBSUB_RECONNECT_DELAY
+        while True:
+            try:
+                async for item in self._pubsub.listen():
+                    # Subscribed (again), the next drop starts with a short delay
+                    delay = CHAT_PUBSUB_RECONNECT_DELAY
+                    if item.get("type") == "message":
+                        await self._deliver(handler, item)
+                logger.warning(f"Pub/sub connection of {self.channel} closed, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Pub/sub connection of {self.channel} failed, reconnecting in {delay}s: {str(e)}")
+
+            # Messages published until the subscription is back are not delivered to this worker
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, CHAT_PUBSUB_RECONNECT_MAX_DELAY)
+            await self._resubscribe()
+
+    async def _resubscribe(self) -> None:
+        try:
+            await self._pubsub.close()
+        except Exception:
+            pass
+
+        self._pubsub = self.client.pubsub()
+        try:
+            await self._pubsub.subscribe(self.channel)
+        except Exception as e:
+            # listen() fails right away on the unsubscribed pub/sub, the next attempt waits longer
+            logger.error(f"Failed to resubscribe to {self.channel}: {str(e)}")
+
+    async def _deliver(self, handler: MessageHandler, item: dict) -> None:
+        try:
+            data = item["data"]
+            await handler(data.decode() if isinstance(data, bytes) else data)
+        except Exception as e:
+            logger.error(f"Failed to deliver message from {self.channel}: {str(e)}")
+
+
+def create_backend(channel: str = CHAT_PUBSUB_CHANNEL) -> PubSubBackend:
+    if CHAT_PUBSUB_BACKEND == "redis":
+        # Optional dependency, only needed when running more than one worker
+        from redis import asyncio as redis
+
+        return RedisPubSub(redis.from_url(CHAT_PUBSUB_URL), channel)
+
+    return InMemoryPubSub()
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
 from .events import manager
 from core.db_connection import supabase
-from .service import ChatLogicService
+from core.db_executor import execute
+from .service import ChatLogicService, message_writer
 from datetime import datetime, timezone
+import asyncio
 import json
-from chats.service import ChatsService 
+from chats.service import ChatsService
+from chats.membership import is_chat_member, touch_chat
+from core.pagination import encode_cursor
 
 chat_logic_router = APIRouter(
     prefix="/chat-logic",
@@ -13,31 +17,60 @@ chat_logic_router = APIRouter(
 
 chat_logic_service = ChatLogicService()
 chat_service = ChatsService()
+# Acknowledgements waiting for their messages to be saved, referenced until sent so they aren't garbage collected
+acknowledgements: set[asyncio.Task] = set()
 
-async def verify_user_in_chat(websocket: WebSocket, chat_id: int, user_id: str):
+async def verify_user_in_chat(websocket: WebSocket, chat_id: int, user_id: str) -> bool:
     try:
-        result = supabase.table("chats")\
-            .select("*")\
-            .eq("id", chat_id)\
-            .execute()
-
-        if not result.data:
-            await websocket.close(code=403)
-            return
-
-        chat = result.data[0]
-        if chat["tutor_id"] != user_id and chat["student_id"] != user_id:
-            await websocket.close(code=403)
-            return
-        if not result.data:
+        if not await is_chat_member(chat_id, user_id):
             print(f"User {user_id} is not part of chat {chat_id}")
             await websocket.close(code=403)
-            return
+            return False
+
+        return True
     except Exception as e:
         print(f"Supabase query failed: {e}")
         await websocket.close(code=500)
-        return
-    
+        return False
+
+async def acknowledge_message(websocket: WebSocket, saved: asyncio.Future, client_id):
+    """Tell the sender that its message was saved, with the id it got"""
+    try:
+        row = await saved
+        ack = {
+            "type": "ack",
+            "client_id": client_id,
+            "id": row["id"],
+            "sent_at": row["sent_at"],
+            # Pass as ``after`` when reconnecting to get only the messages sent since
+            "cursor": encode_cursor(row["sent_at"], row["id"]),
+        }
+    except Exception:
+        ack = {"type": "error", "client_id": client_id, "detail": "Message could not be saved"}
+
+    try:
+        await manager.send_personal_message(json.dumps(ack), websocket)
+    except Exception:
+        # The sender is already gone
+        pass
+
+async def send_history(websocket: WebSocket, chat_id: int, after: str | None):
+    """
+    Send the history as a series of ``previous_messages`` frames.
+
+    A reconnecting client passes the cursor of the last message it has as ``after`` and gets every message
+    sent since, page by page. Otherwise only the newest page is sent, older ones are loaded with
+    ``GET /chats/{chat_id}/messages?before=...``.
+    """
+    while True:
+        page = await chat_service.get_messages_page(chat_id, after=after)
+        sent = await manager.stream(json.dumps({"type": "previous_messages", **page.model_dump(mode="json")}),
+                                    websocket)
+
+        if not sent or not after or not page.has_more:
+            break
+        after = page.after
+
 @chat_logic_router.websocket("/ws/{chat_id}")
 async def chat_websocket(websocket: WebSocket, chat_id: int):
     """WebSocket for real-time chat with user verification"""
@@ -47,22 +80,14 @@ async def chat_websocket(websocket: WebSocket, chat_id: int):
         await websocket.close(code=400)  
         raise HTTPException(status_code=400, detail="Missing user_id in query parameters")
 
-    await verify_user_in_chat(websocket, chat_id, user_id)
+    # Only members join the room, otherwise they would receive the messages of the chat
+    if not await verify_user_in_chat(websocket, chat_id, user_id):
+        return
 
-    await manager.connect(websocket)
+    await manager.connect(websocket, chat_id)
     try:
-        previous_messages = await chat_service.get_chat_messages(chat_id, user_id)
-        await websocket.send_text(json.dumps({
-            "type": "previous_messages",
-            "messages": [
-                {
-                    **message.model_dump(),
-                    "sent_at": message.sent_at.isoformat()  # Konwersja datetime na string
-                }
-                for message in previous_messages.messages
-            ]
-        }))
-        
+        await send_history(websocket, chat_id, websocket.query_params.get("after"))
+
         while True:
             data = await websocket.receive_text()
             message_data = json.loads(data)
@@ -75,9 +100,18 @@ async def chat_websocket(websocket: WebSocket, chat_id: int):
             "is_read": False,
             "sent_at": datetime.now(timezone.utc).isoformat(),  # Użycie timezone.utc
         }
-            supabase.table("messages").insert(new_message).execute()
-            await manager.broadcast(json.dumps(new_message))
+            # Saved in the background, the sender gets an "ack" with the id and the stored sent_at once the message
+            # is in the database
+            saved = await message_writer.write(new_message)
+            client_id = message_data.get("client_id")
+            await manager.broadcast(chat_id, json.dumps({**new_message, "client_id": client_id}))
+            acknowledgement = asyncio.create_task(acknowledge_message(websocket, saved, client_id))
+            acknowledgements.add(acknowledgement)
+            acknowledgement.add_done_callback(acknowledgements.discard)
+            touch_chat(chat_id)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
         
 
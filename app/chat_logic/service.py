@@ -1,31 +1,39 @@
 from core.db_connection import supabase
+from core.db_executor import execute
 from .dataclasses import Message
+from .writer import MessageWriter
+from chats.membership import remember_chat
 from datetime import datetime, timezone
 
 
 class ChatLogicService:
     async def save_message(self, message_data: dict) -> Message:
         """Save a new message to the database"""
-        result = supabase.table("messages").insert(message_data).execute()
+        result = await execute(supabase.table("messages").insert(message_data))
         if not result.data:
             raise Exception("Failed to save message")
         return Message(**result.data[0])
 
+    async def save_messages(self, messages: list[dict]) -> list[dict]:
+        """Save many messages with one insert, the saved rows are returned in the same order"""
+        result = await execute(supabase.table("messages").insert(messages))
+        if len(result.data) != len(messages):
+            raise Exception("Failed to save messages")
+        return result.data
+
     async def mark_as_read(self, chat_id: int, user_id: str):
         """Mark all messages in a chat as read by a specific user"""
-        supabase.table("messages")\
+        await execute(supabase.table("messages")\
                 .update({"is_read": True})\
                 .eq("chat_id", chat_id)\
-                .eq("sender_id", user_id)\
-                .execute()
+                .eq("sender_id", user_id))
 
     async def get_unread_messages(self, chat_id: int, user_id: str):
         """Get all unread messages for a chat"""
-        messages = supabase.table("messages")\
+        messages = await execute(supabase.table("messages")\
                            .select("*")\
                            .eq("chat_id", chat_id)\
-                           .eq("is_read", False)\
-                           .execute()
+                           .eq("is_read", False))
         return [Message(**msg) for msg in messages.data]
     
     async def create_chat(self, tutor_id: str, student_id: str):
@@ -37,8 +45,12 @@ class ChatLogicService:
             "last_updated_at": datetime.now(timezone.utc).isoformat(),
         }
 
-        result = supabase.table("chats").insert(new_chat).execute()
+        result = await execute(supabase.table("chats").insert(new_chat))
 
         if not result.data:
             raise Exception("Failed to create chat")
-        return result.data[0]
\ No newline at end of file
+        remember_chat(result.data[0])
+        return result.data[0]
+
+
+message_writer = MessageWriter(ChatLogicService().save_messages)
@@ -0,0 +1,231 @@
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Inserts are sent when this many messages are waiting, or MESSAGE_FLUSH_INTERVAL seconds after the first one
+MESSAGE_BATCH_SIZE = int(os.getenv("MESSAGE_BATCH_SIZE", "50"))
+MESSAGE_FLUSH_INTERVAL = float(os.getenv("MESSAGE_FLUSH_INTERVAL", "0.05"))
+MESSAGE_SAVE_ATTEMPTS = 3
+# Messages still not saved after MESSAGE_SAVE_ATTEMPTS are tried again later, waiting twice as long every time
+MESSAGE_RETRY_DELAY = 1
+MESSAGE_RETRY_MAX_DELAY = 60
+# Messages are written here before they are saved, so they survive a crash of the worker
+MESSAGE_SPOOL_DIR = os.getenv("MESSAGE_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "chat-message-spool"))
+
+
+class _PendingMessage:
+    def __init__(self, spool_id: str, message: dict, future: Optional[asyncio.Future]):
+        self.spool_id = spool_id
+        self.message = message
+        self.future = future
+        self.retries = 0
+
+
+class MessageWriter:
+    """
+    Write-behind persistence of chat messages.
+
+    ``write`` returns right away with a future of the saved row, the messages are inserted in batches
+    by a background task and get their ``sent_at`` when inserted. Messages which can't be saved are tried again later, with a growing delay.
+    Every worker keeps its not yet saved messages in its own spool file (locked while the worker runs),
+    spool files left by crashed workers are saved again on start.
+    """
+
+    def __init__(self, save: Callable[[List[dict]], Awaitable[List[dict]]], spool_dir: str = MESSAGE_SPOOL_DIR,
+                 batch_size: int = MESSAGE_BATCH_SIZE, flush_interval: float = MESSAGE_FLUSH_INTERVAL):
+        self.save = save
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue[Optional[_PendingMessage]] = asyncio.Queue()
+        self._pending: set[str] = set()
+        self._spool = None
+        self._spool_path: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        # Batches waiting to be tried again, by id of the batch
+        self._retrying: dict[int, tuple[asyncio.TimerHandle, List[_PendingMessage]]] = {}
+
+    async def start(self):
+        if self._task:
+            return
+
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._spool_path = os.path.join(self.spool_dir, f"messages-{os.getpid()}-{uuid.uuid4().hex}.jsonl")
+        # Locked before it gets a name recovering workers look for, so they never take a spool in use
+        self._spool = open(f"{self._spool_path}.tmp", "a")
+        fcntl.flock(self._spool, fcntl.LOCK_EX)
+        os.rename(f"{self._spool_path}.tmp", self._spool_path)
+
+        self._task = asyncio.create_task(self._run())
+        self._recover_orphaned_spools()
+
+    async def stop(self):
+        """Save everything still waiting, then release the spool."""
+        if not self._task:
+            return
+
+        # One more try for the messages waiting to be retried
+        for handle, batch in list(self._retrying.values()):
+            handle.cancel()
+            self._requeue(batch)
+
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+        # Left in the spool, saved by the worker recovering it
+        for handle, batch in self._retrying.values():
+            handle.cancel()
+            for pending in batch:
+                if pending.future and not pending.future.done():
+                    pending.future.set_exception(RuntimeError("Message could not be saved"))
+        self._retrying.clear()
+
+        self._spool.close()
+        self._spool = None
+        if not self._pending:
+            os.remove(self._spool_path)
+
+    async def write(self, message: dict) -> asyncio.Future:
+        """Queue a message for saving, the returned future resolves to the saved row (with its id)."""
+        await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(message, future)
+        return future
+
+    def _enqueue(self, message: dict, future: Optional[asyncio.Future]):
+        spool_id = uuid.uuid4().hex
+        self._spool_write({"add": spool_id, "message": message})
+        self._pending.add(spool_id)
+        self._queue.put_nowait(_PendingMessage(spool_id, message, future))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[_PendingMessage]):
+        for attempt in range(MESSAGE_SAVE_ATTEMPTS):
+            # Stamped when inserted, so a message saved late (retried or recovered) is not older than
+            # messages already read by clients, which catch up with the (sent_at, id) cursor of the last one
+            sent_at = datetime.now(timezone.utc).isoformat()
+            rows = [{**pending.message, "sent_at": sent_at} for pending in batch]
+            try:
+                saved = await self.save(rows)
+                break
+            except Exception as e:
+                logger.error(f"Failed to save {len(rows)} messages (attempt {attempt + 1}): {str(e)}")
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        else:
+            # Kept in the spool (and their futures pending) until a later try saves them
+            self._retry_later(batch)
+            return
+
+        spool_ids = [pending.spool_id for pending in batch]
+        self._spool_write({"done": spool_ids})
+        self._pending.difference_update(spool_ids)
+
+        for pending, row in zip(batch, saved):
+            if pending.future and not pending.future.done():
+                pending.future.set_result(row)
+
+        if not self._pending:
+            self._spool.truncate(0)
+
+    def _retry_later(self, batch: List[_PendingMessage]):
+        for pending in batch:
+            pending.retries += 1
+        retries = max(pending.retries for pending in batch)
+        delay = min(MESSAGE_RETRY_DELAY * 2 ** (retries - 1), MESSAGE_RETRY_MAX_DELAY)
+
+        logger.warning(f"Saving {len(batch)} messages again in {delay} s")
+        handle = asyncio.get_running_loop().call_later(delay, self._requeue, batch)
+        self._retrying[id(batch)] = (handle, batch)
+
+    def _requeue(self, batch: List[_PendingMessage]):
+        self._retrying.pop(id(batch), None)
+        for pending in batch:
+            self._queue.put_nowait(pending)
+
+    def _spool_write(self, record: dict):
+        self._spool.write(json.dumps(record, default=str) + "\n")
+        self._spool.flush()
+
+    def _recover_orphaned_spools(self):
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, "*.jsonl"))):
+            if path == self._spool_path:
+                continue
+
+            try:
+                spool = open(path, "r+")
+            except FileNotFoundError:
+                # Recovered by another worker meanwhile
+                continue
+
+            with spool:
+                try:
+                    fcntl.flock(spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    # Spool of a running worker
+                    continue
+                if not _is_linked(path, spool):
+                    # Recovered and removed by another worker before we got the lock
+                    continue
+
+                messages = {}
+                for line in spool:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Last line cut by the crash
+                        continue
+                    if "add" in record:
+                        messages[record["add"]] = record["message"]
+                    for spool_id in record.get("done", []):
+                        messages.pop(spool_id, None)
+
+                # Copied to our own spool before the old one is removed, so nothing is lost on another crash
+                for message in messages.values():
+                    self._enqueue(message, None)
+
+                if messages:
+                    logger.warning(f"Saving {len(messages)} messages recovered from {path}")
+
+                os.remove(path)
+
+
+def _is_linked(path: str, file) -> bool:
+    try:
+        return os.stat(path).st_ino == os.fstat(file.fileno()).st_ino
+    except FileNotFoundError:
+        return False
@@ -39,6 +39,11 @@ class ChatReportRequest(BaseModel):
 
 class MessageResponse(BaseModel):
     messages: List[Message]
+    # More messages past this page (older ones, or newer ones when reading with ``after``)
+    has_more: bool = False
+    # Cursors of the first and the last message of the page, pass them as ``before``/``after`` to read on
+    before: Optional[str] = None
+    after: Optional[str] = None
 
     class Config:
         from_attributes = True
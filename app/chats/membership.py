@@ -0,0 +1,64 @@
+import os
+from datetime import datetime, timezone
+from typing import Optional
+
+from core.cache import TTLCache
+from core.db_connection import supabase
+from core.db_executor import execute
+from core.debounce import BatchDebouncer
+
+# Members of a chat never change, the ttl only bounds the memory used by inactive chats
+CHAT_MEMBERS_CACHE_SIZE = int(os.getenv("CHAT_MEMBERS_CACHE_SIZE", "50000"))
+CHAT_MEMBERS_CACHE_TTL = float(os.getenv("CHAT_MEMBERS_CACHE_TTL", "3600"))
+# ``last_updated_at`` of active chats is written at most this often
+CHAT_TOUCH_INTERVAL = float(os.getenv("CHAT_TOUCH_INTERVAL", "2"))
+
+chat_members_cache = TTLCache(max_size=CHAT_MEMBERS_CACHE_SIZE, ttl=CHAT_MEMBERS_CACHE_TTL)
+
+
+async def get_chat_members(chat_id: int) -> Optional[dict]:
+    """
+    Get the members of a chat, from ``chat_members_cache`` when possible.
+
+    Args:
+        chat_id (int): The unique identifier of the chat.
+
+    Returns:
+        Optional[dict]: ``{"tutor_id": ..., "student_id": ...}``, or None if the chat does not exist.
+    """
+    members = chat_members_cache.get(chat_id)
+    if members is not None:
+        return members
+
+    chat = await execute(supabase.table("chats").select("id, tutor_id, student_id").eq("id", chat_id))
+    if not chat.data:
+        # Not cached, the chat may be created in a moment
+        return None
+
+    return remember_chat(chat.data[0])
+
+
+async def is_chat_member(chat_id: int, user_id: str) -> bool:
+    members = await get_chat_members(chat_id)
+    return members is not None and user_id in (members["tutor_id"], members["student_id"])
+
+
+def remember_chat(chat: dict) -> dict:
+    """Cache the members of a created or loaded chat row."""
+    members = {"tutor_id": chat["tutor_id"], "student_id": chat["student_id"]}
+    chat_members_cache.set(chat["id"], members)
+    return members
+
+
+async def _update_last_updated_at(chat_ids: set) -> None:
+    await execute(supabase.table("chats")
+                  .update({"last_updated_at": datetime.now(timezone.utc).isoformat()})
+                  .in_("id", list(chat_ids)))
+
+
+chat_activity = BatchDebouncer(_update_last_updated_at, interval=CHAT_TOUCH_INTERVAL)
+
+
+def touch_chat(chat_id: int) -> None:
+    """Mark a chat as updated now, ``last_updated_at`` of all touched chats is written in one query."""
+    chat_activity.touch(chat_id)
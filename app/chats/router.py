@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Path, Query
 from gotrue.types import UserResponse
 from users.auth import authenticate_user
 from .dataclasses import MessageResponse, ChatReportRequest, ChatResponse, Message
-from .service import ChatsService
+from .service import ChatsService, MESSAGES_PAGE_SIZE
 
 chats_router = APIRouter(
     prefix="/chats",
@@ -44,19 +46,26 @@ async def get_student_chats(_user_response: UserResponse = Depends(authenticate_
 @chats_router.get("/{chat_id}/messages", response_model=MessageResponse)
 async def get_chat_messages(
         chat_id: int = Path(...),
+        limit: int = Query(MESSAGES_PAGE_SIZE, ge=1, le=200),
+        before: Optional[str] = Query(None, description="Cursor, returns the messages older than it"),
+        after: Optional[str] = Query(None, description="Cursor, returns the messages newer than it"),
         _user_response: UserResponse = Depends(authenticate_user)
 ):
     """
-    Retrieve all messages from a specific chat conversation.
+    Retrieve a page of messages from a specific chat conversation, the newest ones by default.
 
     Args:
         chat_id (int): The unique identifier of the chat.
+        limit (int): Maximum number of messages returned.
+        before (Optional[str]): The ``before`` cursor of a previous page, to load older messages.
+        after (Optional[str]): The ``after`` cursor of a previous page (or of an acknowledged message),
+            to load the messages sent since.
         _user_response (UserResponse): The authenticated user accessing the chat.
 
     Returns:
-        list[Message]: A list of message objects from the specified chat.
+        MessageResponse: The messages ordered from the oldest one, with the cursors of the page.
     """
-    return await chats_service.get_chat_messages(chat_id, _user_response.user.id)
+    return await chats_service.get_chat_messages(chat_id, _user_response.user.id, limit, before, after)
 
 
 
@@ -1,12 +1,20 @@
+import os
+from typing import Optional
+
 from core.db_connection import supabase
+from core.db_executor import execute
+from core.pagination import apply_keyset, encode_cursor
+from .membership import get_chat_members, is_chat_member
 from .dataclasses import MessageResponse, ChatReportRequest, ChatResponse, Message
 from fastapi import HTTPException
 
+MESSAGES_PAGE_SIZE = int(os.getenv("MESSAGES_PAGE_SIZE", "50"))
+
 
 class ChatsService:
     async def get_tutor_chats(self, tutor_id: str) -> list[ChatResponse]:
         """Get all chats for tutor with last messages"""
-        chats = supabase.rpc("get_tutor_chats_with_last_messages", {"p_tutor_id": tutor_id}).execute()
+        chats = await execute(supabase.rpc("get_tutor_chats_with_last_messages", {"p_tutor_id": tutor_id}))
 
         if not chats.data: raise HTTPException(404, "No chats found")
 
@@ -15,40 +23,55 @@ class ChatsService:
 
     async def get_student_chats(self, student_id: str):
         """Get all chats for student with last messages"""
-        chats = supabase.rpc("get_student_chats_with_last_messages", {"p_student_id": student_id}).execute()
+        chats = await execute(supabase.rpc("get_student_chats_with_last_messages", {"p_student_id": student_id}))
 
         if not chats.data: raise HTTPException(404, "No chats found")
 
         return chats.data
 
 
-    async def get_chat_messages(self, chat_id: int, user_id: str) -> MessageResponse:
-        """Get all messages for specific chat"""
+    async def get_chat_messages(self, chat_id: int, user_id: str, limit: int = MESSAGES_PAGE_SIZE,
+                                before: Optional[str] = None, after: Optional[str] = None) -> MessageResponse:
+        """Get one page of messages of a chat, the newest ones unless a cursor is given"""
+
+        if not await is_chat_member(chat_id, user_id): raise HTTPException(status_code=403, detail="You do not belong to this chat")
 
-        chat = supabase.table("chats").select("*").eq("id", chat_id).or_(f"student_id.eq.{user_id},tutor_id.eq.{user_id}").execute()
+        return await self.get_messages_page(chat_id, limit, before, after)
 
-        if not chat.data: raise HTTPException(status_code=403, detail="You do not belong to this chat")
+    async def get_messages_page(self, chat_id: int, limit: int = MESSAGES_PAGE_SIZE,
+                                before: Optional[str] = None, after: Optional[str] = None) -> MessageResponse:
+        """
+        Get a page of messages of a chat (without checking membership), ordered from the oldest one.
 
-        messages = supabase.table("messages")\
-                          .select("*")\
-                          .eq("chat_id", chat_id)\
-                          .order("sent_at")\
-                          .execute()
+        ``before`` returns the messages older than the cursor, ``after`` the newer ones (used to catch up
+        after a reconnect), neither returns the newest messages. Only ``limit`` rows are read, whatever the
+        length of the chat.
+        """
+        messages = await execute(apply_keyset(
+            supabase.table("messages").select("*").eq("chat_id", chat_id),
+            "sent_at", limit, before, after
+        ))
 
-        return MessageResponse(messages=messages.data or [])
-      
+        rows = messages.data or []
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not after:
+            rows.reverse()
+
+        return MessageResponse(
+            messages=rows,
+            has_more=has_more,
+            before=encode_cursor(rows[0]["sent_at"], rows[0]["id"]) if rows else before,
+            after=encode_cursor(rows[-1]["sent_at"], rows[-1]["id"]) if rows else after,
+        )
 
     async def report_chat(self, chat_id: int, user_id: str, request: ChatReportRequest) -> str:
         """Report a chat conversation"""
-        chat = supabase.table("chats") \
-            .select("*") \
-            .eq("id", chat_id) \
-            .execute()
+        chat_data = await get_chat_members(chat_id)
 
-        if not chat.data:
+        if not chat_data:
             raise HTTPException(status_code=404, detail="Chat not found")
 
-        chat_data = chat.data[0]
         reported_user_id = (
             chat_data["student_id"]
             if user_id == chat_data["tutor_id"]
@@ -62,7 +85,7 @@ class ChatsService:
             "message": f"Chat Report (ID: {chat_id}): {request.message}"
         }
 
-        result = supabase.table("user_reports").insert(report_data).execute()
+        result = await execute(supabase.table("user_reports").insert(report_data))
 
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create report")
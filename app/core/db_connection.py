@@ -1,15 +1,103 @@
 import os
-from supabase import create_client, Client
+
+from gotrue.http_clients import SyncClient
+from httpx import Limits, Timeout
+from supabase import create_client, Client, SupabaseAuthClient
 from supabase.lib.client_options import ClientOptions
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+# HTTP transport tuning, shared by every connection to supabase
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+SUPABASE_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_KEEPALIVE_CONNECTIONS", "10"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "60"))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+
 supabase: Client = create_client(
     SUPABASE_URL,
     SUPABASE_KEY,
     options=ClientOptions(
         auto_refresh_token=False,
-        persist_session=False
+        persist_session=False,
+        postgrest_client_timeout=Timeout(SUPABASE_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT),
+        storage_client_timeout=int(SUPABASE_TIMEOUT)
     )
 )
+
+
+def create_http_client(**kwargs) -> SyncClient:
+    """Create an HTTP/2 keep-alive connection pool configured by the SUPABASE_* environment variables."""
+    return SyncClient(
+        limits=Limits(
+            max_connections=SUPABASE_POOL_SIZE,
+            max_keepalive_connections=SUPABASE_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY
+        ),
+        timeout=Timeout(SUPABASE_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT),
+        http2=True,
+        follow_redirects=True,
+        **kwargs
+    )
+
+
+class SupabaseClientFactory:
+    """
+    Owns the connection pools used to talk to supabase.
+
+    ``open`` is called in the ``lifespan`` hook of the app and ``close`` on shutdown.
+    """
+
+    def __init__(self):
+        self._rest_http_client: SyncClient | None = None
+        self._auth_http_client: SyncClient | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._auth_http_client is not None
+
+    def open(self):
+        if self.is_open:
+            return
+
+        # Replace the default postgrest session of the shared client with a tuned pool
+        postgrest = supabase.postgrest
+        self._rest_http_client = create_http_client(
+            base_url=postgrest.session.base_url,
+            headers=postgrest.session.headers
+        )
+        postgrest.session.close()
+        postgrest.session = self._rest_http_client
+
+        self._auth_http_client = create_http_client()
+
+    def create_auth_client(self) -> SupabaseAuthClient:
+        """
+        Create an auth client with its own session storage (for code exchange and token refresh).
+
+        The client is cheap to create, all of them share one connection pool, so no new TCP+TLS handshake
+        is needed for every call.
+        """
+        if not self.is_open:
+            self.open()
+
+        return SupabaseAuthClient(
+            url=supabase.auth_url,
+            headers=dict(supabase.options.headers),
+            auto_refresh_token=False,
+            persist_session=False,
+            http_client=self._auth_http_client,
+            flow_type="pkce"
+        )
+
+    def close(self):
+        for http_client in (self._rest_http_client, self._auth_http_client):
+            if http_client is not None:
+                http_client.close()
+
+        self._rest_http_client = None
+        self._auth_http_client = None
+
+
+client_factory = SupabaseClientFactory()
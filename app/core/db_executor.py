@@ -0,0 +1,111 @@
+import functools
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, TypeVar
+
+from anyio import CapacityLimiter, to_thread
+from postgrest import SyncQueryRequestBuilder
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of supabase calls running at the same time in worker threads.
+# Calls above the limit wait for a free slot instead of blocking the event loop.
+DB_MAX_CONCURRENCY = int(os.getenv("DB_MAX_CONCURRENCY", "20"))
+
+_limiter: CapacityLimiter | None = None
+
+
+def get_limiter() -> CapacityLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = CapacityLimiter(DB_MAX_CONCURRENCY)
+    return _limiter
+
+
+class QueryStats:
+    """Supabase calls made while handling one operation, see ``query_budget``."""
+
+    def __init__(self, name: str, budget: int):
+        self.name = name
+        self.budget = budget
+        self.timings: list[tuple[str, float]] = []
+        self.elapsed = 0.0
+
+    @property
+    def count(self) -> int:
+        return len(self.timings)
+
+    def record(self, label: str, duration: float) -> None:
+        self.timings.append((label, duration))
+
+    def summary(self) -> str:
+        breakdown = ", ".join(f"{label} {duration * 1000:.1f}ms" for label, duration in self.timings)
+        return f"{self.name}: {self.count}/{self.budget} queries in {self.elapsed * 1000:.1f}ms ({breakdown})"
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def query_budget(name: str, budget: int) -> Iterator[QueryStats]:
+    """
+    Count and time every supabase call made inside the block, including calls from tasks started in it.
+
+    The timing breakdown is logged on exit, as a warning when more than ``budget`` calls were made.
+    """
+    stats = QueryStats(name, budget)
+    token = _query_stats.set(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.elapsed = time.perf_counter() - start
+        _query_stats.reset(token)
+
+        if stats.count > stats.budget:
+            logger.warning(f"Query budget exceeded - {stats.summary()}")
+        else:
+            logger.debug(stats.summary())
+
+
+async def _run(label: str, call: Callable[[], T]) -> T:
+    stats = _query_stats.get()
+    if stats is None:
+        return await to_thread.run_sync(call, limiter=get_limiter())
+
+    start = time.perf_counter()
+    try:
+        return await to_thread.run_sync(call, limiter=get_limiter())
+    finally:
+        stats.record(label, time.perf_counter() - start)
+
+
+async def run_sync(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking supabase call (auth, storage, rpc...) in a worker thread.
+
+    The sync supabase client does network I/O on the calling thread, so calling it directly
+    from a coroutine stalls every other request on the worker.
+    """
+    label = getattr(func, "__qualname__", repr(func))
+    return await _run(label, functools.partial(func, *args, **kwargs))
+
+
+async def execute(query: SyncQueryRequestBuilder):
+    """Async replacement for ``query.execute()``."""
+    label = f"{getattr(query, 'http_method', '')} {getattr(query, 'path', '')}".strip()
+    return await _run(label, query.execute)
+
+
+def returning(query: SyncQueryRequestBuilder, columns: str) -> SyncQueryRequestBuilder:
+    """
+    Select the columns (embedded resources too) of the rows returned by an insert, update, upsert or delete,
+    so the write and the read of the result are a single request.
+    """
+    query.params = query.params.set("select", columns)
+    return query
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class BatchDebouncer:
+    """
+    Collects keys marked with ``touch`` and hands them to ``flush`` together, at most once every ``interval`` seconds.
+
+    Used for writes where only the last one matters (e.g. a "last updated" timestamp), so a burst of
+    changes becomes a single query. Keys are kept for the next round if ``flush`` fails.
+    """
+
+    def __init__(self, flush: Callable[[Set[Hashable]], Awaitable[None]], interval: float):
+        self.flush = flush
+        self.interval = interval
+        self._keys: Set[Hashable] = set()
+        self._task: Optional[asyncio.Task] = None
+        # Held while flushing, so stop waits for a flush already running instead of cancelling it
+        self._lock = asyncio.Lock()
+
+    def touch(self, key: Hashable) -> None:
+        self._keys.add(key)
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_later())
+
+    async def stop(self) -> None:
+        """Flush the pending keys now, after the flush already running (if any)."""
+        await self._flush_pending(retry=False)
+        # Only a task waiting for the next round is left, nothing is lost by cancelling it
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.interval)
+        # Cleared before flushing, so stop never cancels a running flush
+        self._task = None
+        await self._flush_pending()
+
+    async def _flush_pending(self, retry: bool = True) -> None:
+        async with self._lock:
+            if not self._keys:
+                return
+
+            keys, self._keys = self._keys, set()
+            try:
+                await self.flush(keys)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(keys)} debounced updates: {str(e)}")
+                self._keys |= keys
+                if retry and self._task is None:
+                    self._task = asyncio.create_task(self._flush_later())
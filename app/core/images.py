@@ -0,0 +1,71 @@
+import hashlib
+import io
+import re
+from typing import Optional
+
+# Avatars are stored as square WebP images in these sizes (px), listings use the thumbnail
+AVATAR_SIZE = 512
+AVATAR_THUMBNAIL_SIZE = 128
+AVATAR_SIZES = (AVATAR_SIZE, AVATAR_THUMBNAIL_SIZE)
+WEBP_QUALITY = 80
+
+# Variants are stored by content hash, so the same image uploaded twice is stored once
+VARIANTS_FOLDER = "variants"
+_VARIANT_URL = re.compile(rf"(/{VARIANTS_FOLDER}/[0-9a-f]{{64}}/){AVATAR_SIZE}\.webp$")
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def variant_path(digest: str, size: int) -> str:
+    return f"{VARIANTS_FOLDER}/{digest}/{size}.webp"
+
+
+def is_variant_path(path: str) -> bool:
+    return path.startswith(f"{VARIANTS_FOLDER}/")
+
+
+def variant_digest(path: str) -> str:
+    """Content hash of the image a variant path was rendered from."""
+    return path.split("/")[1]
+
+
+def thumbnail_url(avatar_url: Optional[str]) -> Optional[str]:
+    """
+    URL of the thumbnail of an avatar, for lists of offers, reviews...
+    Avatars that were not processed (yet) or come from an OAuth provider are returned as they are.
+    """
+    if not avatar_url:
+        return avatar_url
+    return _VARIANT_URL.sub(rf"\g<1>{AVATAR_THUMBNAIL_SIZE}.webp", avatar_url)
+
+
+def render_variants(data: bytes, sizes: tuple[int, ...] = AVATAR_SIZES) -> dict[int, bytes]:
+    """
+    Crop an image to a square and encode it as WebP in every size.
+
+    CPU bound, meant to run in a process pool.
+
+    Args:
+        data (bytes): The original image (any format readable by Pillow).
+        sizes (tuple[int, ...]): Side lengths of the variants in pixels.
+
+    Returns:
+        dict[int, bytes]: WebP image of every size.
+    """
+    # Optional dependency, only needed by the avatar workers
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+        variants = {}
+        for size in sizes:
+            variant = ImageOps.fit(image, (size, size), method=Image.Resampling.LANCZOS)
+            output = io.BytesIO()
+            variant.save(output, format="WEBP", quality=WEBP_QUALITY, method=4)
+            variants[size] = output.getvalue()
+
+        return variants
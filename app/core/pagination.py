@@ -0,0 +1,86 @@
+import base64
+import json
+from typing import Any, Optional, Tuple, Union
+
+from fastapi import HTTPException
+
+Cursor = Tuple[Any, int]
+
+
+def encode_cursor(value: Any, id: int) -> str:
+    """
+    Opaque cursor pointing at a row of a list ordered by ``(value, id)``.
+
+    Args:
+        value: Value of the ordering column of the row (e.g. ``sent_at``).
+        id (int): Id of the row, breaks ties between rows with the same value.
+
+    Returns:
+        str: URL-safe cursor.
+    """
+    data = json.dumps([value, id], default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Read a cursor made by ``encode_cursor``.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        value, id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return value, int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(column: str, cursor: Cursor, direction: str, nullable: bool = False) -> str:
+    """
+    PostgREST ``or`` filter selecting the rows after (``gt``) or before (``lt``) the cursor
+    in the ``(column, id)`` order. Use with ``query.or_(...)`` and the same order on both columns.
+
+    For a ``nullable`` column the rows with nulls are expected last (``nullslast``).
+    """
+    value, id = cursor
+    if value is None:
+        return f"and({column}.is.null,id.{direction}.{id})"
+
+    keyset = f'{column}.{direction}."{value}",and({column}.eq."{value}",id.{direction}.{id})'
+    if nullable:
+        keyset += f",{column}.is.null"
+    return keyset
+
+
+def paginate(query, column: str, limit: int, cursor: Optional[Union[str, Cursor]] = None, desc: bool = False,
+             nullable: bool = False):
+    """
+    Limit a query to the page of rows following ``cursor`` in the ``(column, id)`` order,
+    one extra row is requested to tell if there is another page.
+
+    ``cursor`` is made by ``encode_cursor`` or already decoded (e.g. after checking what it was made for).
+    """
+    if cursor:
+        if isinstance(cursor, str):
+            cursor = decode_cursor(cursor)
+        query = query.or_(keyset_filter(column, cursor, "lt" if desc else "gt", nullable))
+
+    if nullable:
+        query = query.order(column, desc=desc, nullsfirst=False)
+    else:
+        query = query.order(column, desc=desc)
+
+    return query.order("id", desc=desc).limit(limit + 1)
+
+
+def apply_keyset(query, column: str, limit: int, before: Optional[str] = None, after: Optional[str] = None):
+    """
+    Limit a query to one page of rows ordered by ``(column, id)``.
+
+    Rows are ordered ascending when reading ``after`` a cursor and descending otherwise (newest first),
+    one extra row is requested to tell if there is another page.
+    """
+    if after:
+        return paginate(query, column, limit, after)
+    return paginate(query, column, limit, before, desc=True)
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from fastapi import Request, Response
+
+from core.db_connection import supabase
+from core.db_executor import execute
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_DATA_TTL = float(os.getenv("REFERENCE_DATA_TTL", "300"))
+# Lookups of unknown ids reload the table (rows can be added by another worker), at most this often
+REFERENCE_DATA_MIN_REFRESH_INTERVAL = 5
+
+
+class TableSnapshot:
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.by_id = {row.get("id"): row for row in rows}
+        self.etag = '"' + hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode()).hexdigest() + '"'
+        self.loaded_at = time.monotonic()
+
+
+class ReferenceDataCache:
+    """
+    In-process copy of small, nearly static tables (subjects, levels, test_lessons).
+
+    Tables are loaded in the ``lifespan`` hook of the app and reloaded every ``ttl`` seconds by a background task.
+    Writes going through the services call ``invalidate``, so the next read loads fresh rows.
+    Returned rows are shared between requests and must not be modified.
+    """
+
+    TABLES = ("subjects", "levels", "test_lessons")
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshots: dict[str, TableSnapshot] = {}
+        self._locks = {table: asyncio.Lock() for table in self.TABLES}
+        self._refresh_task: asyncio.Task | None = None
+
+    async def get(self, table: str) -> list[dict]:
+        return (await self._get_snapshot(table)).rows
+
+    async def get_by_id(self, table: str, id: int) -> Optional[dict]:
+        snapshot = await self._get_snapshot(table)
+        if id not in snapshot.by_id and time.monotonic() - snapshot.loaded_at > REFERENCE_DATA_MIN_REFRESH_INTERVAL:
+            snapshot = await self.refresh(table)
+        return snapshot.by_id.get(id)
+
+    def etag(self, table: str) -> Optional[str]:
+        snapshot = self._snapshots.get(table)
+        return snapshot.etag if snapshot else None
+
+    def invalidate(self, table: str) -> None:
+        self._snapshots.pop(table, None)
+
+    async def refresh(self, table: str) -> TableSnapshot:
+        response = await execute(supabase.table(table).select("*").order("id"))
+        snapshot = TableSnapshot(response.data)
+        self._snapshots[table] = snapshot
+        return snapshot
+
+    async def load(self) -> None:
+        await asyncio.gather(*(self.refresh(table) for table in self.TABLES))
+
+    async def start(self) -> None:
+        try:
+            await self.load()
+        except Exception as e:
+            # Not fatal, tables are loaded on first use
+            logger.error(f"Failed to load reference data: {str(e)}")
+
+        self._refresh_task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    async def _get_snapshot(self, table: str) -> TableSnapshot:
+        snapshot = self._snapshots.get(table)
+        if snapshot and time.monotonic() - snapshot.loaded_at < self.ttl:
+            return snapshot
+
+        # Only one request reloads an expired table, the others wait for its result
+        async with self._locks[table]:
+            snapshot = self._snapshots.get(table)
+            if snapshot and time.monotonic() - snapshot.loaded_at < self.ttl:
+                return snapshot
+            return await self.refresh(table)
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"Failed to refresh reference data: {str(e)}")
+
+
+reference_data = ReferenceDataCache(ttl=REFERENCE_DATA_TTL)
+
+
+def not_modified(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    """
+    Set the ``ETag`` header and return a ``304 Not Modified`` response if the client already has this version.
+    """
+    if not etag:
+        return None
+
+    response.headers["ETag"] = etag
+    # Clients may keep the list, but have to check the ETag before using it
+    response.headers["Cache-Control"] = "no-cache"
+
+    if_none_match = request.headers.get("if-none-match", "")
+    client_etags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if etag in client_etags or "*" in client_etags:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    return None
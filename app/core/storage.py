@@ -0,0 +1,105 @@
+import logging
+import os
+import uuid
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from core.db_connection import supabase
+from core.db_executor import run_sync
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+
+
+class UploadUrlRequest(BaseModel):
+    content_type: str
+
+
+class UploadUrl(BaseModel):
+    """
+    Where to upload one file: ``PUT`` the file to ``signed_url`` (or use ``uploadToSignedUrl`` of a supabase client
+    with ``path`` and ``token``), then confirm ``path`` with the API.
+    Supabase keeps signed upload URLs valid for 2 hours.
+    """
+    signed_url: str
+    token: str
+    path: str
+
+
+class ConfirmUploadRequest(BaseModel):
+    path: str
+
+
+def new_object_path(prefix: str | int) -> str:
+    return f"{prefix}/{uuid.uuid4()}"
+
+
+def public_url(bucket: str, path: str) -> str:
+    return f"{SUPABASE_URL}/storage/v1/object/public/{bucket}/{path}"
+
+
+async def create_upload_url(bucket: str, path: str) -> UploadUrl:
+    """
+    Let the client upload a file directly to storage, the file never goes through the API.
+
+    Args:
+        bucket (str): Name of the storage bucket.
+        path (str): Path of the object to create in the bucket.
+
+    Returns:
+        UploadUrl: The signed URL with its token.
+    """
+    signed = await run_sync(supabase.storage.from_(bucket).create_signed_upload_url, path)
+    return UploadUrl(signed_url=signed["signed_url"], token=signed["token"], path=path)
+
+
+async def verify_upload(bucket: str, path: str, prefix: str | int, allowed_content_types: Iterable[str],
+                        max_size: int) -> dict:
+    """
+    Check a file uploaded through ``create_upload_url`` before it is referenced anywhere.
+
+    Objects of the wrong type or size are removed from the bucket.
+
+    Args:
+        bucket (str): Name of the storage bucket.
+        path (str): Path confirmed by the client.
+        prefix (str | int): Folder the path has to be in (the owner of the upload).
+        allowed_content_types (Iterable[str]): Accepted content types.
+        max_size (int): Maximum size in bytes.
+
+    Returns:
+        dict: The storage metadata of the object (``size``, ``mimetype``...).
+    """
+    folder, _, name = path.rpartition("/")
+    if folder != str(prefix) or not name or ".." in path:
+        raise HTTPException(status_code=403, detail="Upload does not belong to you")
+
+    objects = await run_sync(supabase.storage.from_(bucket).list, folder, {"search": name, "limit": 1})
+    metadata = next((obj.get("metadata") for obj in objects if obj.get("name") == name), None)
+    if not metadata:
+        raise HTTPException(status_code=404, detail="Uploaded file not found")
+
+    error = None
+    if metadata.get("mimetype") not in allowed_content_types:
+        error = HTTPException(status_code=400, detail=f"Unsupported file type: {metadata.get('mimetype')}")
+    elif metadata.get("size", 0) > max_size:
+        error = HTTPException(status_code=413, detail=f"File exceeds size limit of {max_size // (1024 * 1024)} MB")
+
+    if error:
+        await remove_objects(bucket, [path])
+        raise error
+
+    return metadata
+
+
+async def remove_objects(bucket: str, paths: list[str]) -> None:
+    if not paths:
+        return
+
+    try:
+        await run_sync(supabase.storage.from_(bucket).remove, paths)
+    except Exception as e:
+        logger.error(f"Failed to remove {len(paths)} objects from {bucket}: {str(e)}")
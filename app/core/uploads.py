@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+from core.db_connection import supabase
+from core.db_executor import execute
+from core.storage import public_url, remove_objects
+
+logger = logging.getLogger(__name__)
+
+# Supabase keeps signed upload URLs valid for 2 hours, files not confirmed a bit later than that are removed
+UNCONFIRMED_UPLOAD_TTL = float(os.getenv("UNCONFIRMED_UPLOAD_TTL", "7800"))
+UNCONFIRMED_UPLOAD_SWEEP_INTERVAL = float(os.getenv("UNCONFIRMED_UPLOAD_SWEEP_INTERVAL", "600"))
+
+
+class UnconfirmedUploads:
+    """
+    Paths of a bucket signed for upload on this worker and not confirmed yet.
+
+    Once a path is older than ``UNCONFIRMED_UPLOAD_TTL`` its object is removed from the bucket, unless a row
+    of ``table`` references its public url in ``column`` (the upload was confirmed on another worker).
+    """
+
+    def __init__(self, bucket: str, table: str, column: str, ttl: float = UNCONFIRMED_UPLOAD_TTL):
+        self.bucket = bucket
+        self.table = table
+        self.column = column
+        self.ttl = ttl
+        # Path -> when it expires (monotonic time)
+        self._expires: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def add(self, paths: Iterable[str]) -> None:
+        expires = time.monotonic() + self.ttl
+        for path in paths:
+            self._expires[path] = expires
+
+    def confirm(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            self._expires.pop(path, None)
+
+    async def sweep(self) -> None:
+        """Remove the expired uploads nothing references."""
+        now = time.monotonic()
+        expired = [path for path, expires in self._expires.items() if expires <= now]
+        if not expired:
+            return
+
+        urls = {public_url(self.bucket, path): path for path in expired}
+        referenced = await execute(supabase.table(self.table).select(self.column).in_(self.column, list(urls)))
+        confirmed = {urls[row[self.column]] for row in referenced.data}
+
+        await remove_objects(self.bucket, [path for path in expired if path not in confirmed])
+        self.confirm(expired)
+
+    async def start(self) -> None:
+        if not self._task:
+            self._task = asyncio.create_task(self._sweep_periodically())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _sweep_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(UNCONFIRMED_UPLOAD_SWEEP_INTERVAL)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Failed to remove unconfirmed uploads of {self.bucket}: {str(e)}")
@@ -1,4 +1,5 @@
 from core.db_connection import supabase
+from core.db_executor import execute
 from fastapi import HTTPException
 from postgrest import SyncQueryRequestBuilder
 
@@ -90,7 +91,7 @@ class CRUDProvider:
     async def __execute_query(self, query: SyncQueryRequestBuilder) -> list[dict]:
         try:
 
-            response = query.execute()
+            response = await execute(query)
 
         except Exception as e:
             raise HTTPException(500, f'Error while executing query: {e.message}')
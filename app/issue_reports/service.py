@@ -1,4 +1,5 @@
 from core.db_connection import supabase
+from core.db_executor import execute
 from crud.crud_provider import CRUDProvider
 from fastapi import HTTPException
 
@@ -14,10 +15,9 @@ class IssueReportsService:
         issue_data = report.model_dump()
         issue_data["user_id"] = user_id
 
-        result = (
+        result = await execute(
             supabase.table("issue_reports")
             .insert(issue_data)
-            .execute()
         )
 
         if not result.data:
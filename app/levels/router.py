@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from core.reference_data import reference_data, not_modified
+from fastapi import APIRouter, Request, Response
 from levels.dataclasses import Level, CreateLevelRequest
 from levels.service import LevelsService
 
@@ -7,14 +8,21 @@ levels_service = LevelsService()
 
 
 @levels_router.get("/levels", response_model=list[Level])
-async def get_levels():
+async def get_levels(request: Request, response: Response):
     """
     Retrieve a list of all available learning levels.
 
+    Supports conditional requests: responds with 304 when ``If-None-Match`` matches the current ``ETag``.
+
     Returns:
         list[Level]: A list of level objects, each containing id: int, and level: str.
     """
-    return await levels_service.get_levels()
+    levels = await levels_service.get_levels()
+
+    if not_modified_response := not_modified(request, response, reference_data.etag("levels")):
+        return not_modified_response
+
+    return levels
 
 
 @levels_router.post("/levels", response_model=str)
@@ -1,12 +1,14 @@
 from core.db_connection import supabase
+from core.db_executor import execute
+from core.reference_data import reference_data
 from levels.dataclasses import Level, CreateLevelRequest
 
 
 class LevelsService:
     async def get_levels(self) -> list[Level]:
-        levels = supabase.table("levels").select("*").execute()
-        return levels.data
+        return await reference_data.get("levels")
 
     async def create_level(self, create_level_data: CreateLevelRequest) -> str:
-        supabase.table("levels").insert(create_level_data.model_dump()).execute()
+        await execute(supabase.table("levels").insert(create_level_data.model_dump()))
+        reference_data.invalidate("levels")
         return 'Level created successfully'
@@ -2,16 +2,50 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
 from middleware import add_request_logging
+from core.db_connection import client_factory
+from core.reference_data import reference_data
+from chat_logic.events import manager as chat_connection_manager
+from chat_logic.service import message_writer
+from chats.membership import chat_activity
+from profiles.avatars import avatar_processor, unconfirmed_avatars
+from booking_attachments.service import unconfirmed_uploads
+from reviews.ratings import rating_aggregates
+from offers.search import offer_search
+from tutors_availability.availability_index import availability_index
+from tutors_availability.invalidation import free_slot_invalidations
 from core.routers import registered_routers
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # on_startup
+    client_factory.open()
+    await reference_data.start()
+    await chat_connection_manager.start()
+    await message_writer.start()
+    await avatar_processor.start()
+    await unconfirmed_uploads.start()
+    await unconfirmed_avatars.start()
+    await rating_aggregates.start()
+    await offer_search.start()
+    await free_slot_invalidations.start()
+    await availability_index.start()
 
     yield 
 
     # on_shutdown
     print("Shutting down")
+    await reference_data.stop()
+    await chat_connection_manager.stop()
+    await message_writer.stop()
+    await chat_activity.stop()
+    await avatar_processor.stop()
+    await unconfirmed_uploads.stop()
+    await unconfirmed_avatars.stop()
+    await rating_aggregates.stop()
+    await offer_search.stop()
+    await availability_index.stop()
+    await free_slot_invalidations.stop()
+    client_factory.close()
 
 app = FastAPI(docs_url="/", lifespan=lifespan)
 add_request_logging(app)
@@ -1,5 +1,7 @@
 from core.db_connection import supabase
+from core.db_executor import execute
 from crud.crud_provider import CRUDProvider
+from chats.membership import remember_chat, touch_chat
 
 from .dataclasses import UpsertSubject, Message
 
@@ -20,7 +22,7 @@ class SubjectService:
         # If chat_id is provided, we just need to create the message
         if message.chat_id is not None:
             new_message = await crud_provider_message.create(message.model_dump(exclude="sent_at"), id)
-            await self.__update_chat(message.chat_id)
+            self.__update_chat(message.chat_id)
             return Message.model_validate(new_message)
 
         if message.sender_id == receiver_id:
@@ -36,7 +38,7 @@ class SubjectService:
         )
 
         try:
-            chats = query.execute().data
+            chats = (await execute(query)).data
         except Exception as e:
             raise MessageException(f"Error while checking if chat exists: {e}")
 
@@ -45,7 +47,7 @@ class SubjectService:
             message.chat_id = chats[0]["id"]
             new_message = await crud_provider_message.create(message.model_dump(exclude="sent_at", exclude_none=True),
                                                              id)
-            await self.__update_chat(message.chat_id)
+            self.__update_chat(message.chat_id)
             return Message.model_validate(new_message)
 
         # If we don't find a chat, we need to create a new one
@@ -57,7 +59,7 @@ class SubjectService:
         )
 
         try:
-            profile = query.execute().data[0]
+            profile = (await execute(query)).data[0]
         except Exception as e:
             raise MessageException(f"Error while checking if sender is tutor, profile might not exist: {e}")
 
@@ -81,22 +83,22 @@ class SubjectService:
         updated_message = await crud_provider_message.update(message.model_dump(exclude="sent_at", exclude_none=True),
                                                              id)
 
-        await self.__update_chat(updated_message["chat_id"])
+        self.__update_chat(updated_message["chat_id"])
         return Message.model_validate(updated_message)
 
     async def delete_message(self, id: int) -> Message:
         deleted_message = await crud_provider_message.delete(id)
 
-        await self.__update_chat(deleted_message["chat_id"])
+        self.__update_chat(deleted_message["chat_id"])
         return Message.model_validate(deleted_message)
 
-    async def __create_chat(self, student_id: str, tutor_id: str) -> int:
+    async def __create_chat(self, student_id: str, tutor_id: str) -> dict:
         chat = {"student_id": student_id, "tutor_id": tutor_id}
 
-        return await crud_provider_chat.create(chat)
+        new_chat = await crud_provider_chat.create(chat)
+        remember_chat(new_chat)
+        return new_chat
 
-    async def __update_chat(self, chat_id: int) -> int:
-        update = {"last_updated_at": "now()"}
-
-        chat = await crud_provider_chat.update(update, chat_id)
-        return chat
+    def __update_chat(self, chat_id: int) -> None:
+        # Debounced, chats touched within a short window are updated with one query
+        touch_chat(chat_id)
@@ -1,43 +1,122 @@
 # middleware.py
-from fastapi import Request, UploadFile
-from starlette.datastructures import UploadFile, FormData
+import atexit
 import json
+import logging
+import os
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Only the first LOG_BODY_MAX_BYTES of a request body are logged, for LOG_BODY_SAMPLE_RATE of the requests
+LOG_BODY_MAX_BYTES = int(os.getenv("LOG_BODY_MAX_BYTES", "2048"))
+LOG_BODY_SAMPLE_RATE = float(os.getenv("LOG_BODY_SAMPLE_RATE", "1.0"))
+
+# Bodies of these types are never captured (uploaded files), only their size is logged
+SKIPPED_CONTENT_TYPES = ("multipart/form-data", "application/octet-stream", "image/", "video/", "audio/")
+
+logger = logging.getLogger("request")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        data.update(getattr(record, "request", {}))
+        return json.dumps(data, default=str)
+
+
+class RequestLoggingMiddleware:
+    """
+    Logs method, path, status, timing and a capped preview of the body of every HTTP request.
+
+    The body is not buffered: chunks are copied while the endpoint reads them, and only up to
+    ``LOG_BODY_MAX_BYTES``. File uploads are never copied.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        content_type = headers.get("content-type", "")
+        capture = (
+                LOG_BODY_MAX_BYTES > 0
+                and not content_type.startswith(SKIPPED_CONTENT_TYPES)
+                and random.random() < LOG_BODY_SAMPLE_RATE
+        )
+
+        body = bytearray()
+        request_size = 0
+        status_code = 500
+        response_size = 0
+
+        async def logging_receive() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                request_size += len(chunk)
+                if capture and len(body) < LOG_BODY_MAX_BYTES:
+                    body.extend(chunk[:LOG_BODY_MAX_BYTES - len(body)])
+            return message
+
+        async def logging_send(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, logging_receive, logging_send)
+        finally:
+            request = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "content_type": content_type,
+                "request_bytes": request_size,
+                "response_bytes": response_size,
+            }
+            if capture and body:
+                request["body"] = body.decode("utf-8", errors="replace")
+                request["body_truncated"] = request_size > len(body)
+
+            logger.info(f"{scope['method']} {scope['path']} {status_code}", extra={"request": request})
+
+
+def _setup_request_logger() -> None:
+    """Formatting and writing happen on a listener thread, the request only puts the record on a queue."""
+    if logger.handlers:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
 
-async def receive_with_body(body: bytes):
-    """Returns a receive function that feeds a fixed body"""
-    async def receive():
-        return {"type": "http.request", "body": body, "more_body": False}
-    return receive
 
 def add_request_logging(app):
-    @app.middleware("http")
-    async def log_request_body(request: Request, call_next):
-        body = await request.body()
-        content_type = request.headers.get("content-type", "")
-
-        print("#######################################################")
-        if "multipart/form-data" in content_type:
-            request = Request(request.scope, receive=await receive_with_body(body))
-            form: FormData = await request.form()
-            log_data = {}
-            for key in form:
-                value = form.getlist(key)
-                log_data[key] = []
-                for item in value:
-                    if isinstance(item, UploadFile):
-                        log_data[key].append({
-                            "filename": item.filename,
-                            "content_type": item.content_type,
-                        })
-                    else:
-                        log_data[key].append(item)
-                if len(log_data[key]) == 1:
-                    log_data[key] = log_data[key][0]  # simplify single-item lists
-            print("Multipart Form Data:\n", json.dumps(log_data, indent=2))
-        else:
-            try:
-                print("Request Body:\n", json.dumps(json.loads(body), indent=2))
-            except Exception:
-                print("Request Body (raw):\n", body.decode("utf-8", errors="ignore"))
-        print("#######################################################")
-        return await call_next(request)
+    _setup_request_logger()
+    app.add_middleware(RequestLoggingMiddleware)
@@ -1,4 +1,5 @@
 from core.db_connection import supabase
+from core.db_executor import execute
 from datetime import datetime
 from fastapi import HTTPException
 
@@ -8,7 +9,7 @@ from .dataclasses import CreateOfferReport
 class OfferReportsService:
     async def create_offer_report(self, offer_id: int, report: CreateOfferReport, user_id: str) -> str:
         """Create a new user report related to an offer"""
-        offer = supabase.table("offers").select("*").eq("id", offer_id).execute()
+        offer = await execute(supabase.table("offers").select("*").eq("id", offer_id))
 
         if not offer.data or len(offer.data) == 0:
             raise HTTPException(status_code=404, detail="Offer not found")
@@ -22,7 +23,7 @@ class OfferReportsService:
             "message": f"Offer ID: {offer_id}\nMessage: {report.message}"
         }
 
-        result = supabase.table("user_reports").insert(report_data).execute()
+        result = await execute(supabase.table("user_reports").insert(report_data))
 
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create user report")
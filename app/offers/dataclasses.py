@@ -1,8 +1,10 @@
 from datetime import datetime
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from subjects.dataclasses import Subject
 from typing import Optional
 
+MAX_BATCH_OFFERS = 100
+
 
 class OfferInterface(BaseModel):
     id: int
@@ -41,6 +43,35 @@ class ActiveOfferResponse(OfferInterface):
     tutor_rating: Optional[float] = None
     total_records: Optional[int] = None
 
+
+class ActiveOffersPage(BaseModel):
+    offers: list[ActiveOfferResponse]
+    has_more: bool
+    next_cursor: Optional[str] = None
+    # None when the count was not asked for
+    total_records: Optional[int] = None
+    total_is_exact: Optional[bool] = None
+
+
+class OfferSearchFacet(BaseModel):
+    value: int | str
+    label: Optional[str] = None
+    count: int
+
+
+class OfferSearchFacets(BaseModel):
+    subject: list[OfferSearchFacet]
+    level: list[OfferSearchFacet]
+    price: list[OfferSearchFacet]
+
+
+class OfferSearchResponse(BaseModel):
+    offers: list[ActiveOfferResponse]
+    total: int
+    facets: OfferSearchFacets
+    has_more: bool
+    next_cursor: Optional[str] = None
+
 # CRUD
 class Level(BaseModel):
     id: int
@@ -75,3 +106,32 @@ class CreateOffer(BaseOffer):
 
 class UpdateOffer(CreateOffer):
     id: int
+
+
+class OfferIdsRequest(BaseModel):
+    offer_ids: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_OFFERS)
+
+
+class OfferPriceUpdate(BaseModel):
+    id: int
+    price: float = Field(..., ge=0)
+
+
+class OfferPricesRequest(BaseModel):
+    offers: list[OfferPriceUpdate] = Field(..., min_length=1, max_length=MAX_BATCH_OFFERS)
+
+
+class CreateOffersRequest(BaseModel):
+    offers: list[CreateOffer] = Field(..., min_length=1, max_length=MAX_BATCH_OFFERS)
+
+
+class OfferBatchResult(BaseModel):
+    # None for offers which were not created
+    id: Optional[int] = None
+    status: int
+    detail: Optional[str] = None
+    offer: Optional[Offer] = None
+
+
+class OfferBatchResponse(BaseModel):
+    results: list[OfferBatchResult]
@@ -6,13 +6,109 @@ from gotrue.types import UserResponse
 from typing_extensions import Literal
 from users.auth import authenticate_user
 
-from .dataclasses import OfferResponse, UpdateOfferRequest, TutorOfferResponse, ActiveOfferResponse
-from .service import OffersService, Order
+from .dataclasses import OfferResponse, UpdateOfferRequest, TutorOfferResponse, ActiveOfferResponse, \
+    OfferSearchResponse, ActiveOffersPage, OfferIdsRequest, OfferPricesRequest, CreateOffersRequest, OfferBatchResponse
+from .service import OffersService, Order, OfferSortBy, CountMode, OFFERS_PAGE_SIZE
 
 offers_router = APIRouter()
 offers_service = OffersService()
 
 
+@offers_router.get("/offers/search", response_model=OfferSearchResponse)
+async def search_offers(
+        q: Optional[str] = Query(None, max_length=200),
+        subject_id: Optional[int] = None,
+        level_id: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        limit: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None
+) -> OfferSearchResponse:
+    """
+    Full-text search of the active offers with facet counts.
+
+    Args:
+        q - free text matched against the title, description and subject of the offers (optional, without it
+            offers are ordered by the rating of the tutor)
+        subject_id, level_id - optional filters
+        min_price, max_price - optional
+        limit - page size
+        cursor - `next_cursor` of the previous page
+    Returns:
+        OfferSearchResponse: Best matching offers first, total number of matches, counts of matching offers
+        by subject, level and price range, and the cursor of the next page.
+    """
+    return await offers_service.search_offers(q, subject_id, level_id, min_price, max_price, limit, cursor)
+
+
+@offers_router.post("/offers/batch", response_model=OfferBatchResponse)
+async def create_offers(request: CreateOffersRequest,
+                        _user_response: UserResponse = Depends(authenticate_user)) -> OfferBatchResponse:
+    """
+    Create several offers at once.
+
+    Args:
+        request (CreateOffersRequest): The offers to create.
+        _user_response (UserResponse): The currently authenticated user.
+
+    Returns:
+        OfferBatchResponse: Result of every offer in the order of the request, with status 201 and the created
+        offer, or the status and detail of the error.
+    """
+    return await offers_service.create_offers(request.offers, _user_response.user.id)
+
+
+@offers_router.put("/offers/batch/prices", response_model=OfferBatchResponse)
+async def update_offer_prices(request: OfferPricesRequest,
+                              _user_response: UserResponse = Depends(authenticate_user)) -> OfferBatchResponse:
+    """
+    Change the prices of several offers at once.
+
+    Args:
+        request (OfferPricesRequest): IDs of the offers and their new prices.
+        _user_response (UserResponse): The currently authenticated user.
+
+    Returns:
+        OfferBatchResponse: Result of every offer, with status 200 and the updated offer, or the status
+        and detail of the error (404 not found, 403 not owned by the tutor).
+    """
+    return await offers_service.update_offer_prices(request.offers, _user_response.user.id)
+
+
+@offers_router.post("/offers/batch:disable", response_model=OfferBatchResponse)
+async def disable_offers(request: OfferIdsRequest,
+                         _user_response: UserResponse = Depends(authenticate_user)) -> OfferBatchResponse:
+    """
+    Disable several offers at once, set `is_active` to False.
+
+    Args:
+        request (OfferIdsRequest): IDs of the offers to disable.
+        _user_response (UserResponse): The currently authenticated user.
+
+    Returns:
+        OfferBatchResponse: Result of every offer, with status 200 and the updated offer, or the status
+        and detail of the error (404 not found, 403 not owned by the tutor).
+    """
+    return await offers_service.set_offers_active(request.offer_ids, False, _user_response.user.id)
+
+
+@offers_router.post("/offers/batch:enable", response_model=OfferBatchResponse)
+async def enable_offers(request: OfferIdsRequest,
+                        _user_response: UserResponse = Depends(authenticate_user)) -> OfferBatchResponse:
+    """
+    Enable several offers at once, set `is_active` to True.
+
+    Args:
+        request (OfferIdsRequest): IDs of the offers to enable.
+        _user_response (UserResponse): The currently authenticated user.
+
+    Returns:
+        OfferBatchResponse: Result of every offer, with status 200 and the updated offer, or the status
+        and detail of the error (404 not found, 403 not owned by the tutor).
+    """
+    return await offers_service.set_offers_active(request.offer_ids, True, _user_response.user.id)
+
+
 @offers_router.get("/offers/{offer_id}", response_model=OfferResponse)
 async def get_offer(offer_id: int = Path(...)) ->   OfferResponse:
     """
@@ -105,6 +201,39 @@ async def get_tutor_offer(offer_id: int = Path(...),
     return await offers_service.get_tutor_offer(offer_id, _user_response.user.id)
 
 
+@offers_router.get("/active-offers/page", response_model=ActiveOffersPage)
+async def get_active_offers_page(
+        level_id: Optional[int] = None,
+        subject_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        sort_by: OfferSortBy = OfferSortBy.price,
+        order: Order = Order.increasing,
+        limit: int = Query(OFFERS_PAGE_SIZE, ge=1, le=100),
+        cursor: Optional[str] = None,
+        count: CountMode = CountMode.estimated
+) -> ActiveOffersPage:
+    """
+    Retrieve one page of the active offers, pages are read with cursors instead of offsets.
+
+    Args:
+        level_id, subject_id - optional filters
+        start_date, end_date - together they form a date frame for which you want tutor to be available at (optional)
+        min_price, max_price - optional
+        sort_by - price, rating (of the tutor) or id
+        order - order direction, either ASC or DESC
+        limit - page size
+        cursor - `next_cursor` of the previous page, read with the same sort_by and order
+        count - `exact`, `estimated` (exact up to a threshold, cheaper for large results) or `none`
+    Returns:
+        ActiveOffersPage: Offers of the page, cursor of the next page and the number of matching offers.
+    """
+    return await offers_service.get_active_offers_page(level_id, subject_id, start_date, end_date, min_price,
+                                                       max_price, sort_by, order, limit, cursor, count)
+
+
 @offers_router.get("/active-offers/{tutor_id}", response_model=list[TutorOfferResponse])
 async def get_tutor_active_offer(tutor_id: str = Path(...)) -> list[TutorOfferResponse]:
     """
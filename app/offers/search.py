@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import os
+from typing import Iterable, Optional
+
+from core.db_connection import supabase
+from core.db_executor import execute
+from core.images import thumbnail_url
+from .search_index import OfferSearchIndex
+
+logger = logging.getLogger(__name__)
+
+# The index is rebuilt from the database this often, picking up offers written by other workers and rating changes
+OFFER_SEARCH_REFRESH_INTERVAL = float(os.getenv("OFFER_SEARCH_REFRESH_INTERVAL", "300"))
+OFFER_SEARCH_PAGE_SIZE = 1000
+
+SEARCH_DOCUMENT_SELECT = (
+    "id, tutor_id, title, description, price, subject_id, level_id, is_active, "
+    "tutor_profiles(rating, profiles(full_name, avatar_url)), "
+    "subjects(name, icon_url), "
+    "levels(level)"
+)
+
+
+def to_search_document(row: dict) -> dict:
+    """Flatten an offer selected with ``SEARCH_DOCUMENT_SELECT`` into the fields of ``ActiveOfferResponse``."""
+    tutor_profile = row.get("tutor_profiles") or {}
+    profile = tutor_profile.get("profiles") or {}
+    subject = row.get("subjects") or {}
+    level = row.get("levels") or {}
+
+    return {
+        "id": row["id"],
+        "tutor_id": row.get("tutor_id"),
+        "title": row.get("title"),
+        "description": row.get("description"),
+        "price": row.get("price"),
+        "subject_id": row.get("subject_id"),
+        "subject_name": subject.get("name"),
+        "icon_url": subject.get("icon_url"),
+        "level_id": row.get("level_id"),
+        "level": level.get("level"),
+        "tutor_full_name": profile.get("full_name", "Unknown"),
+        "tutor_avatar_url": thumbnail_url(profile.get("avatar_url")),
+        "tutor_rating": tutor_profile.get("rating"),
+    }
+
+
+class OfferSearch:
+    """
+    Keeps an ``OfferSearchIndex`` of the active offers in sync with the database.
+
+    The index is loaded in the ``lifespan`` hook of the app and rebuilt every ``OFFER_SEARCH_REFRESH_INTERVAL``
+    seconds. Offer writes going through ``OffersService`` call ``apply`` with the written rows (or ``remove``), so they are searchable
+    right away in this worker.
+    """
+
+    def __init__(self):
+        self.index: Optional[OfferSearchIndex] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Offers written while the index is rebuilt, the rebuild may have read them before the write
+        self._written_during_load: Optional[set[int]] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None
+
+    async def load(self) -> None:
+        self._written_during_load = set()
+        try:
+            index = await self._build()
+        finally:
+            written, self._written_during_load = self._written_during_load, None
+
+        self.index = index
+        logger.info(f"Indexed {len(index)} active offers")
+        await self.refresh(written)
+
+    async def _build(self) -> OfferSearchIndex:
+        index = OfferSearchIndex()
+        offset = 0
+        while True:
+            page = await execute(supabase.table("offers")
+                                 .select(SEARCH_DOCUMENT_SELECT)
+                                 .eq("is_active", True)
+                                 .order("id")
+                                 .range(offset, offset + OFFER_SEARCH_PAGE_SIZE - 1))
+            for row in page.data:
+                index.add(to_search_document(row))
+
+            if len(page.data) < OFFER_SEARCH_PAGE_SIZE:
+                break
+            offset += OFFER_SEARCH_PAGE_SIZE
+
+        return index
+
+    async def refresh(self, offer_ids: Iterable[int]) -> None:
+        """Reindex offers after they were written, inactive or deleted offers are removed from the index."""
+        offer_ids = list(offer_ids)
+        if self._written_during_load is not None:
+            self._written_during_load.update(offer_ids)
+        if self.index is None or not offer_ids:
+            return
+
+        try:
+            response = await execute(supabase.table("offers").select(SEARCH_DOCUMENT_SELECT).in_("id", offer_ids))
+        except Exception as e:
+            # Not fatal for the write, the offers are fixed by the next rebuild
+            logger.error(f"Failed to reindex offers {offer_ids}: {str(e)}")
+            return
+
+        found = {row["id"] for row in response.data}
+        self.apply(response.data)
+        for offer_id in offer_ids:
+            if offer_id not in found:
+                self.index.remove(offer_id)
+
+    def apply(self, rows: Iterable[dict]) -> None:
+        """Reindex offers from rows written with their ``SEARCH_DOCUMENT_SELECT`` columns, without reading them again."""
+        rows = list(rows)
+        if self._written_during_load is not None:
+            self._written_during_load.update(row["id"] for row in rows)
+        if self.index is None:
+            return
+
+        for row in rows:
+            if row.get("is_active"):
+                self.index.add(to_search_document(row))
+            else:
+                self.index.remove(row["id"])
+
+    def remove(self, offer_id: int) -> None:
+        if self._written_during_load is not None:
+            self._written_during_load.add(offer_id)
+        if self.index is not None:
+            self.index.remove(offer_id)
+
+    async def start(self) -> None:
+        try:
+            await self.load()
+        except Exception as e:
+            # Not fatal, search answers 503 until the next rebuild
+            logger.error(f"Failed to load the offer search index: {str(e)}")
+
+        self._refresh_task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(OFFER_SEARCH_REFRESH_INTERVAL)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"Failed to rebuild the offer search index: {str(e)}")
+
+
+offer_search = OfferSearch()
@@ -0,0 +1,399 @@
+import heapq
+import itertools
+import math
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from collections.abc import KeysView
+from typing import Any, Collection, Iterable, NamedTuple, Optional
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Terms of the title count more than terms of the description
+FIELD_WEIGHTS = {"title": 2.0, "subject_name": 1.5, "description": 1.0}
+# Query terms also match longer terms starting with them ("matem" -> "matematyka", "matematyki"), scored lower
+MIN_PREFIX_LENGTH = 3
+PREFIX_WEIGHT = 0.7
+# Upper bounds of the price facet buckets, the last bucket has no upper bound
+PRICE_BUCKETS = (50, 100, 150, 200)
+
+_TOKEN = re.compile(r"\w+")
+# Versions are unique across indexes, so a rebuilt index never reuses the version of the previous one
+_versions = itertools.count(1)
+# Queries are often typed without diacritics ("jezyk polski")
+_POLISH_LETTERS = tuple(zip("ąćęłńóśźż", "acelnoszz"))
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """Lowercase words of a text without Polish diacritics ("Język Polski" -> ["jezyk", "polski"])."""
+    if not text:
+        return []
+    text = text.casefold()
+    if not text.isascii():
+        for letter, replacement in _POLISH_LETTERS:
+            text = text.replace(letter, replacement)
+    return [token for token in _TOKEN.findall(text) if len(token) > 1]
+
+
+def price_bucket(price: Optional[float]) -> Optional[str]:
+    if price is None:
+        return None
+    lower = 0
+    for upper in PRICE_BUCKETS:
+        if price < upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f"{lower}+"
+
+
+class FacetCount(NamedTuple):
+    value: Any
+    label: Optional[str]
+    count: int
+
+
+class SearchResult(NamedTuple):
+    offers: list[dict]
+    total: int
+    facets: dict[str, list[FacetCount]]
+    # (score, id) of the last offer of the page, None on the last page
+    next_after: Optional[tuple[float, int]]
+
+
+class BrowseResult(NamedTuple):
+    offers: list[dict]
+    # (sort key, id) of the last offer of the page, None on the last page
+    next_after: Optional[tuple[float, int]]
+
+
+class OfferSearchIndex:
+    """
+    In-memory inverted index of the active offers with BM25 ranking and facet counts.
+
+    Documents are flat dicts with at least ``id``, ``title``, ``description``, ``subject_name``,
+    ``subject_id``, ``level_id``, ``level``, ``price`` and ``tutor_rating``; they are returned as they are.
+    Results are ordered by ``(score, id)`` (score descending), pages continue after the ``(score, id)``
+    of the last offer of the previous one. Without query text the score is the rating of the tutor.
+
+    Not thread safe, meant to be used from the event loop.
+    """
+
+    def __init__(self, documents: Iterable[dict] = ()):
+        self._documents: dict[int, dict] = {}
+        self._terms: dict[int, dict[str, float]] = {}
+        self._postings: dict[str, dict[int, float]] = {}
+        self._lengths: dict[int, float] = {}
+        self._total_length = 0.0
+        # Sorted terms for prefix matching and BM25 length norms, rebuilt on the first search after a change
+        self._vocabulary: Optional[list[str]] = None
+        self._norms: Optional[dict[int, float]] = None
+        # Offers sorted by (key, id) for every (field, descending) browsed, see ``browse``
+        self._orders: dict[tuple[str, bool], list[tuple[float, int]]] = {}
+        # Changes on every write, for caches of results
+        self.version = next(_versions)
+        # Fields of the filters and facets by offer id
+        self._ratings: dict[int, float] = {}
+        self._tutors: dict[int, Any] = {}
+        self._subjects: dict[int, Any] = {}
+        self._levels: dict[int, Any] = {}
+        self._prices: dict[int, Optional[float]] = {}
+        self._price_buckets: dict[int, Optional[str]] = {}
+        self._by_subject: dict[Any, set[int]] = {}
+        self._by_level: dict[Any, set[int]] = {}
+        self._labels: dict[str, dict[Any, Optional[str]]] = {"subject": {}, "level": {}}
+        for document in documents:
+            self.add(document)
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, offer_id: int) -> bool:
+        return offer_id in self._documents
+
+    def add(self, document: dict) -> None:
+        """Index an offer, replacing the previous version of it."""
+        offer_id = document["id"]
+        self.remove(offer_id)
+
+        terms: dict[str, float] = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(document.get(field)):
+                terms[token] += weight
+
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._vocabulary = None
+            postings[offer_id] = frequency
+
+        self._documents[offer_id] = document
+        self._terms[offer_id] = terms
+        self._lengths[offer_id] = sum(terms.values())
+        self._total_length += self._lengths[offer_id]
+        self._norms = None
+        self._orders = {}
+        self.version = next(_versions)
+
+        subject_id, level_id, price = document.get("subject_id"), document.get("level_id"), document.get("price")
+        self._ratings[offer_id] = document.get("tutor_rating") or 0
+        self._tutors[offer_id] = document.get("tutor_id")
+        self._subjects[offer_id] = subject_id
+        self._levels[offer_id] = level_id
+        self._prices[offer_id] = price
+        self._price_buckets[offer_id] = price_bucket(price)
+        self._by_subject.setdefault(subject_id, set()).add(offer_id)
+        self._by_level.setdefault(level_id, set()).add(offer_id)
+        self._labels["subject"][subject_id] = document.get("subject_name")
+        self._labels["level"][level_id] = document.get("level")
+
+    def remove(self, offer_id: int) -> None:
+        if offer_id not in self._documents:
+            return
+
+        for term in self._terms.pop(offer_id):
+            postings = self._postings[term]
+            del postings[offer_id]
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+
+        del self._documents[offer_id]
+        self._total_length -= self._lengths.pop(offer_id)
+        self._norms = None
+        self._orders = {}
+        self.version = next(_versions)
+
+        del self._ratings[offer_id], self._tutors[offer_id], self._prices[offer_id], self._price_buckets[offer_id]
+        self._by_subject[self._subjects.pop(offer_id)].discard(offer_id)
+        self._by_level[self._levels.pop(offer_id)].discard(offer_id)
+
+    def search(self, query: Optional[str] = None, subject_id: Optional[int] = None, level_id: Optional[int] = None,
+               min_price: Optional[float] = None, max_price: Optional[float] = None, limit: int = 20,
+               after: Optional[tuple[float, int]] = None, offset: int = 0, order: Optional[str] = None,
+               tutor_ids: Optional[Collection[Any]] = None) -> SearchResult:
+        """
+        Find the active offers matching every term of ``query`` and the filters.
+
+        Facet counts of a field are computed with the filters of the other fields only, so they show how many
+        offers another subject (level, price range) would give.
+
+        Args:
+            query (Optional[str]): Free text, matched against the title, description and subject name.
+            subject_id (Optional[int]): Only offers of this subject.
+            level_id (Optional[int]): Only offers of this level.
+            min_price (Optional[float]): Minimum price, inclusive.
+            max_price (Optional[float]): Maximum price, inclusive.
+            limit (int): Maximum number of offers returned.
+            after (Optional[tuple[float, int]]): ``(score, id)`` of the last offer of the previous page.
+            offset (int): Number of offers skipped (after ``after``).
+            order (Optional[str]): ``ASC`` or ``DESC`` to order by price instead of relevance, offers without
+                a price come last.
+            tutor_ids (Optional[Collection[Any]]): Only offers of these tutors (e.g. tutors free at some time),
+                facets are counted among them too.
+
+        Returns:
+            SearchResult: One page of offers, the number of all matching offers and the facet counts.
+        """
+        terms = tokenize(query)
+        scores = self._score(terms) if terms else self._ratings
+        if order is not None:
+            prices, sign = self._prices, -1 if order.upper() == "ASC" else 1
+            scores = {offer_id: -math.inf if prices[offer_id] is None else sign * prices[offer_id]
+                      for offer_id in scores}
+        if tutor_ids is not None:
+            tutors = self._tutors
+            scores = {offer_id: score for offer_id, score in scores.items() if tutors[offer_id] in tutor_ids}
+
+        # Offers passing the filter of each field, set operations keep the work out of the interpreter
+        candidates = scores.keys()
+        by_subject = candidates if subject_id is None else candidates & self._by_subject.get(subject_id, set())
+        by_level = candidates if level_id is None else candidates & self._by_level.get(level_id, set())
+        by_price = candidates
+        if min_price is not None or max_price is not None:
+            low = min_price if min_price is not None else -math.inf
+            high = max_price if max_price is not None else math.inf
+            prices = self._prices
+            by_price = {offer_id for offer_id in candidates
+                        if prices[offer_id] is not None and low <= prices[offer_id] <= high}
+
+        matches = _intersect(_intersect(by_subject, by_level), by_price)
+        ordered = sorted(matches)
+        if after is not None:
+            after_score, after_id = after
+            ordered = [offer_id for offer_id in ordered if scores[offer_id] < after_score
+                       or (scores[offer_id] == after_score and offer_id > after_id)]
+        # Stable: offers with the same score stay ordered by id
+        page = heapq.nlargest(offset + limit + 1, ordered, key=scores.__getitem__)[offset:]
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        prices = Counter(map(self._price_buckets.__getitem__, _intersect(by_subject, by_level)))
+        return SearchResult(
+            offers=[self._documents[offer_id] for offer_id in page],
+            total=len(matches),
+            facets={
+                "subject": self._facet("subject", map(self._subjects.__getitem__, _intersect(by_level, by_price))),
+                "level": self._facet("level", map(self._levels.__getitem__, _intersect(by_subject, by_price))),
+                "price": sorted((FacetCount(bucket, bucket, count) for bucket, count in prices.items()
+                                 if bucket is not None), key=lambda facet: _bucket_lower(facet.value)),
+            },
+            next_after=(scores[page[-1]], page[-1]) if has_more else None,
+        )
+
+    def browse(self, sort_by: str = "price", descending: bool = False, subject_id: Optional[int] = None,
+               level_id: Optional[int] = None, min_price: Optional[float] = None, max_price: Optional[float] = None,
+               tutor_ids: Optional[Collection[Any]] = None, limit: int = 20,
+               after: Optional[tuple[float, int]] = None) -> BrowseResult:
+        """
+        List the offers matching the filters ordered by ``price``, ``rating`` or ``id`` (ties by id).
+
+        Offers are kept sorted, a page is read from the position of the cursor on, so it costs about
+        ``limit / share of offers matching the filters`` whatever the depth of the page.
+        Offers without a price come last in both directions.
+
+        Args:
+            sort_by (str): ``price``, ``rating`` or ``id``.
+            descending (bool): Highest values first.
+            subject_id, level_id, min_price, max_price, tutor_ids: Filters, as in ``search``.
+            limit (int): Maximum number of offers returned.
+            after (Optional[tuple[float, int]]): ``next_after`` of the previous page.
+
+        Returns:
+            BrowseResult: One page of offers and the cursor of the next one.
+        """
+        order = self._order(sort_by, descending)
+        matches = self._filter(subject_id, level_id, min_price, max_price, tutor_ids)
+
+        page = []
+        for position in range(bisect_right(order, after) if after is not None else 0, len(order)):
+            if matches(order[position][1]):
+                if len(page) == limit:
+                    return BrowseResult([self._documents[offer_id] for _, offer_id in page], page[-1])
+                page.append(order[position])
+
+        return BrowseResult([self._documents[offer_id] for _, offer_id in page], None)
+
+    def count(self, subject_id: Optional[int] = None, level_id: Optional[int] = None,
+              min_price: Optional[float] = None, max_price: Optional[float] = None,
+              tutor_ids: Optional[Collection[Any]] = None, exact_up_to: Optional[int] = None) -> tuple[int, bool]:
+        """
+        Number of offers matching the filters.
+
+        Counting stops after ``exact_up_to`` matches, the rest is estimated from the share of the offers
+        read so far that matched.
+
+        Returns:
+            tuple[int, bool]: The count and whether it is exact.
+        """
+        matches = self._filter(subject_id, level_id, min_price, max_price, tutor_ids)
+        matched = 0
+        for read, offer_id in enumerate(self._documents, 1):
+            if matches(offer_id):
+                matched += 1
+                if exact_up_to is not None and matched > exact_up_to:
+                    return round(matched / read * len(self._documents)), False
+        return matched, True
+
+    def _order(self, sort_by: str, descending: bool) -> list[tuple[float, int]]:
+        order = self._orders.get((sort_by, descending))
+        if order is None:
+            if sort_by == "id":
+                values = {offer_id: offer_id for offer_id in self._documents}
+            else:
+                values = {"price": self._prices, "rating": self._ratings}[sort_by]
+            sign = -1 if descending else 1
+            order = sorted((math.inf if value is None else sign * value, offer_id)
+                           for offer_id, value in values.items())
+            self._orders[(sort_by, descending)] = order
+        return order
+
+    def _filter(self, subject_id: Optional[int], level_id: Optional[int], min_price: Optional[float],
+                max_price: Optional[float], tutor_ids: Optional[Collection[Any]]):
+        subjects, levels, prices, tutors = self._subjects, self._levels, self._prices, self._tutors
+        low = min_price if min_price is not None else -math.inf
+        high = max_price if max_price is not None else math.inf
+        check_price = min_price is not None or max_price is not None
+
+        def matches(offer_id: int) -> bool:
+            return ((subject_id is None or subjects[offer_id] == subject_id)
+                    and (level_id is None or levels[offer_id] == level_id)
+                    and (not check_price or (prices[offer_id] is not None and low <= prices[offer_id] <= high))
+                    and (tutor_ids is None or tutors[offer_id] in tutor_ids))
+
+        return matches
+
+    def _score(self, terms: list[str]) -> dict[int, float]:
+        """BM25 score of the offers containing every term (or a term starting with it)."""
+        count = len(self._documents)
+        norms = self._length_norms()
+        scores: Optional[dict[int, float]] = None
+
+        for term in terms:
+            term_scores: dict[int, float] = {}
+            for matched, weight in self._expand(term):
+                postings = self._postings[matched]
+                factor = weight * math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)) * (K1 + 1)
+                if scores is not None and len(scores) < len(postings):
+                    # Only the offers matching the previous terms can match, look them up instead
+                    postings = {offer_id: postings[offer_id] for offer_id in scores if offer_id in postings}
+                matched_scores = {offer_id: factor * frequency / (frequency + norms[offer_id])
+                                  for offer_id, frequency in postings.items()}
+                if not term_scores:
+                    term_scores = matched_scores
+                else:
+                    for offer_id, score in matched_scores.items():
+                        if score > term_scores.get(offer_id, 0):
+                            term_scores[offer_id] = score
+
+            if scores is None:
+                scores = term_scores
+            else:
+                if len(term_scores) > len(scores):
+                    scores, term_scores = term_scores, scores
+                scores = {offer_id: score + scores[offer_id] for offer_id, score in term_scores.items()
+                          if offer_id in scores}
+            if not scores:
+                break
+
+        return scores or {}
+
+    def _length_norms(self) -> dict[int, float]:
+        if self._norms is None:
+            average_length = self._total_length / len(self._lengths) if self._lengths else 0
+            self._norms = {offer_id: K1 * (1 - B + B * length / average_length) if average_length else K1
+                           for offer_id, length in self._lengths.items()}
+        return self._norms
+
+    def _expand(self, term: str) -> list[tuple[str, float]]:
+        expanded = [(term, 1.0)] if term in self._postings else []
+        if len(term) < MIN_PREFIX_LENGTH:
+            return expanded
+
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        index = bisect_left(self._vocabulary, term)
+        while index < len(self._vocabulary) and self._vocabulary[index].startswith(term):
+            if self._vocabulary[index] != term:
+                expanded.append((self._vocabulary[index], PREFIX_WEIGHT))
+            index += 1
+        return expanded
+
+    def _facet(self, field: str, values: Iterable[Any]) -> list[FacetCount]:
+        labels = self._labels[field]
+        return [FacetCount(value, labels.get(value), count)
+                for value, count in Counter(values).most_common() if value is not None]
+
+
+def _intersect(first, second):
+    """Offers in both sets, a ``keys()`` view stands for all candidates (no filter)."""
+    if isinstance(first, KeysView):
+        return second
+    if isinstance(second, KeysView):
+        return first
+    return first & second
+
+
+def _bucket_lower(bucket: str) -> float:
+    return float(bucket.split("-")[0].rstrip("+"))
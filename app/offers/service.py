@@ -1,15 +1,37 @@
+import asyncio
+import logging
+import os
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterable, Optional
 
 from core.db_connection import supabase
+from core.db_executor import execute, returning
+from core.pagination import decode_cursor, encode_cursor
+from core.reference_data import reference_data
 from crud.crud_provider import CRUDProvider
 from enum import Enum
 from fastapi import HTTPException
-from subjects.service import crud_provider as subject_crud_provider
+from postgrest.types import ReturnMethod
+from postgrest.exceptions import APIError
+from tutors_availability.availability_index import availability_index
+from tutors_availability.utils import parse_datetime, standardize_datetime
 
 from .dataclasses import OfferResponse, UpdateOfferRequest, TutorOfferResponse, ActiveOfferResponse, Offer, CreateOffer, \
-    UpdateOffer
-from .utils import flatten_offer_data, flatten_tutor_offers_data, flatten_tutor_offer_data, flatten_active_offers
+    UpdateOffer, OfferSearchResponse, OfferSearchFacets, ActiveOffersPage, OfferBatchResponse, OfferBatchResult, \
+    OfferPriceUpdate
+from .search import offer_search
+from .utils import flatten_offer_data, flatten_tutor_offers_data, flatten_tutor_offer_data, flatten_active_offers, \
+    offer_count_cache, to_offer
+
+logger = logging.getLogger(__name__)
+
+# Columns returned by offer writes: everything the Offer model and the search index need
+OFFER_WRITE_SELECT = "*, subjects(*), levels(*), tutor_profiles(rating, profiles(full_name, avatar_url))"
+FOREIGN_KEY_VIOLATION = "23503"
+
+OFFERS_PAGE_SIZE = 20
+# Offer counts above this are estimated (unless an exact count is asked for)
+OFFER_EXACT_COUNT_THRESHOLD = int(os.getenv("OFFER_EXACT_COUNT_THRESHOLD", "1000"))
 
 
 class Order(str, Enum):
@@ -17,9 +39,21 @@ class Order(str, Enum):
     decreasing = "DESC"
 
 
+class OfferSortBy(str, Enum):
+    price = "price"
+    rating = "rating"
+    id = "id"
+
+
+class CountMode(str, Enum):
+    exact = "exact"
+    estimated = "estimated"
+    none = "none"
+
+
 class OffersService:
     async def get_offer(self, offer_id: int) -> OfferResponse:
-        response = (
+        response = await execute(
             supabase
             .table("offers")
             .select(
@@ -29,7 +63,6 @@ class OffersService:
                 "levels(level)"
             )
             .eq("id", offer_id)
-            .execute()
         )
 
         if not response.data or len(response.data) == 0:
@@ -38,15 +71,7 @@ class OffersService:
         return flatten_offer_data(response.data[0])
 
     async def update_offer(self, offer_id: int, request: UpdateOfferRequest, tutor_id: str) -> str:
-        await self._check_tutor_exists(tutor_id)
-        await self._check_tutor_owns_offer(tutor_id, offer_id)
-
-        service = OffersService()
-        offer = await service.get_offer(offer_id)
-
-        if not offer:
-            raise HTTPException(status_code=404, detail="Offer not found")
-        update_offer = (
+        await self.__write(
             supabase
             .table("offers")
             .update({
@@ -55,39 +80,32 @@ class OffersService:
                 "description": request.description,
                 "level_id": request.level_id})
             .eq("id", offer_id)
-            .execute()
+            .eq("tutor_id", tutor_id),
+            offer_id, tutor_id, link_subject=True
         )
 
-        return f"Offer id:{offer.id} updated"
+        return f"Offer id:{offer_id} updated"
 
     async def disable_enable_offer(self, offer_id: int, is_active: bool, tutor_id: str) -> str:
-        await self._check_tutor_exists(tutor_id)
-        await self._check_tutor_owns_offer(tutor_id, offer_id)
-
-        service = OffersService()
-        offer = await service.get_offer(offer_id)
-
-        if not offer:
-            raise HTTPException(status_code=404, detail="Offer not found")
-        update_offer = (
+        await self.__write(
             supabase
             .table("offers")
             .update({"is_active": is_active})
             .eq("id", offer_id)
-            .execute()
+            .eq("tutor_id", tutor_id),
+            offer_id, tutor_id
         )
 
-        return f"Offer id: {offer.id} {"enabled" if is_active else "disabled"}"
+        return f"Offer id: {offer_id} {"enabled" if is_active else "disabled"}"
 
     async def get_tutor_offers(self, tutor_id: str) -> list[TutorOfferResponse]:
         await self._check_tutor_exists(tutor_id)
 
-        offers = (
+        offers = await execute(
             supabase
             .table("offers")
             .select("id, tutor_id, price, description, subjects(name, icon_url), levels(level), is_active")
             .eq("tutor_id", str(tutor_id))
-            .execute()
         )
 
         if offers.data is None or len(offers.data) == 0:
@@ -98,12 +116,11 @@ class OffersService:
     async def get_tutor_offer(self, offer_id: int, tutor_id: str) -> TutorOfferResponse:
         await self._check_tutor_exists(tutor_id)
 
-        offers = (
+        offers = await execute(
             supabase
             .table("offers")
             .select("id, tutor_id, price, description, subjects(name, icon_url), levels(level), is_active")
             .eq("id", offer_id)
-            .execute()
         )
 
         if offers.data is None or len(offers.data) == 0:
@@ -112,13 +129,12 @@ class OffersService:
         return flatten_tutor_offer_data(offers.data[0])
 
     async def get_tutor_active_offer(self, tutor_id: str) -> list[TutorOfferResponse]:
-        offers = (
+        offers = await execute(
             supabase
             .table("offers")
             .select("id, tutor_id, price, title, description, subjects(name, icon_url), levels(level), is_active")
             .eq("tutor_id", tutor_id)
             .eq("is_active", True)
-            .execute()
         )
 
         if offers.data is None or len(offers.data) == 0:
@@ -127,9 +143,13 @@ class OffersService:
         return flatten_tutor_offers_data(offers.data)
 
     async def get_active_offers(self, level_id: int, subject_id: int, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, min_price: Optional[float] = None, max_price: Optional[float] = None, order: Optional[str] = 'ASC', limit: Optional[int] = 5, offset: Optional[int] = 0) -> list[ActiveOfferResponse]:
+        if start_date and end_date:
+            offers = await self.__get_available_offers(level_id, subject_id, start_date, end_date, min_price,
+                                                       max_price, order, limit, offset)
+            if offers is not None:
+                return offers
 
-
-        filtered_offers = supabase.rpc('filter_offers', {
+        filtered_offers = await execute(supabase.rpc('filter_offers', {
             'p_level_id': level_id,
             'p_subject_id': subject_id,
             'p_start_date': start_date,
@@ -139,10 +159,116 @@ class OffersService:
             'p_sort_order': order,
             'p_limit': limit,
             'p_offset': offset
-        }).execute()
+        }))
 
         return filtered_offers.data
 
+    async def get_active_offers_page(self, level_id: Optional[int] = None, subject_id: Optional[int] = None,
+                                     start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                     min_price: Optional[float] = None, max_price: Optional[float] = None,
+                                     sort_by: OfferSortBy = OfferSortBy.price, order: Order = Order.increasing,
+                                     limit: int = OFFERS_PAGE_SIZE, cursor: Optional[str] = None,
+                                     count: CountMode = CountMode.estimated) -> ActiveOffersPage:
+        """
+        One page of the active offers, read from the search index after the cursor of the previous page.
+
+        Args:
+            level_id, subject_id, min_price, max_price: Optional filters.
+            start_date, end_date: Only offers of tutors free within these dates (optional, together).
+            sort_by (OfferSortBy): Order of the offers, ties are ordered by id.
+            order (Order): ASC or DESC.
+            limit (int): Page size.
+            cursor (Optional[str]): ``next_cursor`` of the previous page.
+            count (CountMode): ``exact`` count, ``estimated`` count (exact up to ``OFFER_EXACT_COUNT_THRESHOLD``)
+                or ``none``.
+
+        Returns:
+            ActiveOffersPage: The offers with the cursor of the next page and the number of all matching offers.
+        """
+        if not offer_search.ready:
+            raise HTTPException(status_code=503, detail="Offer list is not available yet")
+
+        after = None
+        if cursor:
+            # The cursor records the order it was made for, its key means nothing in another one
+            (cursor_sort_by, cursor_order, key), id = _decode_offers_cursor(cursor)
+            if (cursor_sort_by, cursor_order) != (sort_by.value, order.value):
+                raise HTTPException(status_code=400, detail="Cursor was made for another sort_by or order")
+            after = (key, id)
+
+        free_tutors = None
+        if start_date and end_date:
+            free_tutors = await self.__get_free_tutors(start_date, end_date)
+            if free_tutors is None:
+                raise HTTPException(status_code=503, detail="Offers can't be filtered by these dates right now")
+
+        index = offer_search.index
+        filters = dict(subject_id=subject_id, level_id=level_id, min_price=min_price, max_price=max_price,
+                       tutor_ids=free_tutors)
+        result = index.browse(sort_by.value, order == Order.decreasing, limit=limit, after=after, **filters)
+
+        total_records, total_is_exact = None, None
+        if count != CountMode.none:
+            # Counts filtered by dates change with the free time of the tutors as well
+            availability_version = availability_index.version if free_tutors is not None else None
+            cache_key = (index.version, availability_version, count, subject_id, level_id, min_price, max_price,
+                         start_date, end_date)
+            counted = offer_count_cache.get(cache_key)
+            if counted is None:
+                exact_up_to = OFFER_EXACT_COUNT_THRESHOLD if count == CountMode.estimated else None
+                counted = index.count(exact_up_to=exact_up_to, **filters)
+                offer_count_cache.set(cache_key, counted)
+            total_records, total_is_exact = counted
+
+        return ActiveOffersPage(
+            offers=[ActiveOfferResponse(**offer) for offer in result.offers],
+            has_more=result.next_after is not None,
+            next_cursor=_encode_offers_cursor(sort_by, order, *result.next_after) if result.next_after else None,
+            total_records=total_records,
+            total_is_exact=total_is_exact,
+        )
+
+    async def search_offers(self, query: Optional[str] = None, subject_id: Optional[int] = None,
+                            level_id: Optional[int] = None, min_price: Optional[float] = None,
+                            max_price: Optional[float] = None, limit: int = 20,
+                            cursor: Optional[str] = None) -> OfferSearchResponse:
+        """
+        Full-text search of the active offers, served from the in-memory index.
+
+        Args:
+            query (Optional[str]): Free text matched against the title, description and subject name.
+            subject_id (Optional[int]): Only offers of this subject.
+            level_id (Optional[int]): Only offers of this level.
+            min_price (Optional[float]): Minimum price.
+            max_price (Optional[float]): Maximum price.
+            limit (int): Page size.
+            cursor (Optional[str]): ``next_cursor`` of the previous page.
+
+        Returns:
+            OfferSearchResponse: Best matching offers first, with the facet counts and the cursor of the next page.
+        """
+        if not offer_search.ready:
+            raise HTTPException(status_code=503, detail="Offer search is not available yet")
+
+        after = None
+        if cursor:
+            score, id = decode_cursor(cursor)
+            if not isinstance(score, (int, float)):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            after = (score, id)
+
+        result = offer_search.index.search(query, subject_id, level_id, min_price, max_price, limit, after)
+
+        return OfferSearchResponse(
+            offers=[ActiveOfferResponse(**offer) for offer in result.offers],
+            total=result.total,
+            facets=OfferSearchFacets(**{
+                name: [facet._asdict() for facet in facets] for name, facets in result.facets.items()
+            }),
+            has_more=result.next_after is not None,
+            next_cursor=encode_cursor(*result.next_after) if result.next_after else None,
+        )
+
     # CRUD
     async def create_offer(self, tutor_id: str, offer: CreateOffer) -> Offer:
         """
@@ -158,12 +284,9 @@ class OffersService:
         offer = offer.model_dump()
         offer['tutor_id'] = tutor_id
 
-        new_offer = await offers_crud_provider.create(offer)
-
-        await self.__update_tutor_subjects(new_offer)
-        await self.__attach_related_objects(new_offer)
+        new_offer = await self.__write(supabase.table("offers").insert(offer), None, tutor_id, link_subject=True)
 
-        return Offer.model_validate(new_offer)
+        return to_offer(new_offer)
 
     async def get_offer2(self, id: int, tutor_id: str) -> Offer:
         """
@@ -176,11 +299,14 @@ class OffersService:
         Returns:
             Offer: The requested offer with related objects attached.
         """
-        offer = await offers_crud_provider.get(id, tutor_id)
+        response = await execute(
+            supabase.table("offers").select(OFFER_WRITE_SELECT).eq("id", id).eq("tutor_id", tutor_id)
+        )
 
-        await self.__attach_related_objects(offer)
+        if not response.data:
+            raise HTTPException(404, f"Offer with id {id} not found.")
 
-        return Offer.model_validate(offer)
+        return to_offer(response.data[0])
 
     async def update_offer2(self, tutor_id: str, offer: UpdateOffer) -> Offer:
         """
@@ -193,12 +319,12 @@ class OffersService:
         Returns:
             Offer: The updated offer with related subjects and objects attached.
         """
-        updated_offer = await offers_crud_provider.update(offer.model_dump(), None, tutor_id)
-
-        await self.__update_tutor_subjects(updated_offer)
-        await self.__attach_related_objects(updated_offer)
+        updated_offer = await self.__write(
+            supabase.table("offers").update(offer.model_dump(exclude={'id'})).eq("id", offer.id).eq("tutor_id", tutor_id),
+            offer.id, tutor_id, link_subject=True
+        )
 
-        return Offer.model_validate(updated_offer)
+        return to_offer(updated_offer)
 
     async def delete_offer(self, id: int, tutor_id: str) -> Offer:
         """
@@ -211,37 +337,210 @@ class OffersService:
         Returns:
             Offer: The deleted offer with related objects attached.
         """
-        deleted_offer = await offers_crud_provider.delete(id, tutor_id)
+        deleted_offer = await self.__write(
+            supabase.table("offers").delete().eq("id", id).eq("tutor_id", tutor_id), id, tutor_id, deleted=True
+        )
 
-        await self.__attach_related_objects(deleted_offer)
+        return to_offer(deleted_offer)
 
-        return Offer.model_validate(deleted_offer)
+    # Batch
+    async def set_offers_active(self, offer_ids: list[int], is_active: bool, tutor_id: str) -> OfferBatchResponse:
+        """
+        Enable or disable several offers of a tutor with one statement.
 
-    async def __attach_related_objects(self, offer: dict) -> None:
-        if id := offer.get('level_id'):
-            level = await levels_crud_provider.get(id)
-            offer['level'] = level
-        else:
-            offer['level'] = None
+        Args:
+            offer_ids (list[int]): IDs of the offers.
+            is_active (bool): Whether the offers are enabled.
+            tutor_id (str): UUID of the tutor who owns the offers.
+
+        Returns:
+            OfferBatchResponse: Result of every offer, in the order of ``offer_ids``.
+        """
+        offer_ids = list(dict.fromkeys(offer_ids))
+        rows = await self.__write_many(
+            supabase.table("offers").update({"is_active": is_active}).in_("id", offer_ids).eq("tutor_id", tutor_id),
+            tutor_id
+        )
+
+        return await self.__batch_response(offer_ids, rows)
+
+    async def update_offer_prices(self, prices: list[OfferPriceUpdate], tutor_id: str) -> OfferBatchResponse:
+        """
+        Change the prices of several offers of a tutor.
+
+        Offers getting the same price are updated by one statement, the statements of different prices are sent
+        together.
 
-        if id := offer.get('subject_id'):
-            subject = await subject_crud_provider.get(id)
-            offer['subject'] = subject
+        Args:
+            prices (list[OfferPriceUpdate]): New price of every offer (the last one counts for repeated ids).
+            tutor_id (str): UUID of the tutor who owns the offers.
+
+        Returns:
+            OfferBatchResponse: Result of every offer, in the order of ``prices``.
+        """
+        price_by_offer = {update.id: update.price for update in prices}
+        offers_by_price: dict[float, list[int]] = {}
+        for offer_id, price in price_by_offer.items():
+            offers_by_price.setdefault(price, []).append(offer_id)
+
+        updates = await asyncio.gather(*(
+            self.__write_many(
+                supabase.table("offers").update({"price": price}).in_("id", offer_ids).eq("tutor_id", tutor_id),
+                tutor_id
+            )
+            for price, offer_ids in offers_by_price.items()
+        ))
+
+        return await self.__batch_response(list(price_by_offer), [row for rows in updates for row in rows])
+
+    async def create_offers(self, offers: list[CreateOffer], tutor_id: str) -> OfferBatchResponse:
+        """
+        Create several offers for a tutor with one statement.
+
+        Offers with a subject or level which does not exist are not created, the other ones are.
+
+        Args:
+            offers (list[CreateOffer]): The offers to create.
+            tutor_id (str): UUID of the tutor creating the offers.
+
+        Returns:
+            OfferBatchResponse: Result of every offer, in the order of ``offers``.
+        """
+        results: list[Optional[OfferBatchResult]] = []
+        new_offers = []
+        for offer in offers:
+            if await self.__references_exist(offer):
+                results.append(None)
+                new_offers.append({**offer.model_dump(), 'tutor_id': tutor_id})
+            else:
+                results.append(OfferBatchResult(status=400, detail="Subject or level does not exist."))
+
+        if new_offers:
+            # Inserted rows are returned in the order of the inserted values
+            rows = iter(await self.__write_many(
+                supabase.table("offers").insert(new_offers), tutor_id, link_subjects=True
+            ))
+            results = [result or _created(next(rows)) for result in results]
+
+        return OfferBatchResponse(results=results)
+
+    async def __references_exist(self, offer: CreateOffer) -> bool:
+        return all([
+            offer.subject_id is None or await reference_data.get_by_id('subjects', offer.subject_id),
+            offer.level_id is None or await reference_data.get_by_id('levels', offer.level_id),
+        ])
+
+    async def __batch_response(self, offer_ids: list[int], rows: list[dict]) -> OfferBatchResponse:
+        written = {row['id']: row for row in rows}
+        missing = [offer_id for offer_id in offer_ids if offer_id not in written]
+        # Why offers were not written is only looked up when some were not
+        owners = await self.__get_owners(missing) if missing else {}
+
+        results = []
+        for offer_id in offer_ids:
+            if offer_id in written:
+                results.append(OfferBatchResult(id=offer_id, status=200, offer=to_offer(written[offer_id])))
+            elif offer_id in owners:
+                results.append(OfferBatchResult(id=offer_id, status=403, detail="This tutor does not own this offer."))
+            else:
+                results.append(OfferBatchResult(id=offer_id, status=404, detail=f"Offer with id {offer_id} not found."))
+
+        return OfferBatchResponse(results=results)
+
+    async def __get_owners(self, offer_ids: list[int]) -> dict[int, str]:
+        response = await execute(supabase.table("offers").select("id, tutor_id").in_("id", offer_ids))
+        return {offer['id']: offer['tutor_id'] for offer in response.data}
+
+    async def __write(self, query, offer_id: Optional[int], tutor_id: str, link_subject: bool = False,
+                      deleted: bool = False) -> dict:
+        """
+        Run a write of an offer, limited to the offers of the tutor by its filters, in a single request.
+
+        Returns:
+            dict: The written offer with ``OFFER_WRITE_SELECT`` columns.
+        """
+        rows = await self.__write_many(query, tutor_id, link_subject, deleted)
+
+        if not rows:
+            # Nothing written, find out why (only on this path, so a successful write stays one request)
+            if offer_id not in await self.__get_owners([offer_id]):
+                raise HTTPException(404, f"Offer with id {offer_id} not found.")
+            raise HTTPException(403, "This tutor does not own this offer.")
+
+        return rows[0]
+
+    async def __write_many(self, query, tutor_id: str, link_subjects: bool = False,
+                           deleted: bool = False) -> list[dict]:
+        """
+        Run a write of offers in a single request.
+
+        The written rows are returned with their related objects and put in the search index. With
+        ``link_subjects`` the subjects of the written rows are then linked to the tutor.
+
+        Returns:
+            list[dict]: The written offers with ``OFFER_WRITE_SELECT`` columns.
+        """
+        try:
+            response = await execute(returning(query, OFFER_WRITE_SELECT))
+        except APIError as e:
+            if e.code == FOREIGN_KEY_VIOLATION and "tutor_id" in (e.message or ""):
+                raise HTTPException(403, "You are not a tutor!")
+            if e.code == FOREIGN_KEY_VIOLATION:
+                raise HTTPException(400, "Subject or level does not exist.")
+            raise HTTPException(500, f"Error while executing query: {e.message}")
+
+        if deleted:
+            for row in response.data:
+                offer_search.remove(row['id'])
         else:
-            offer['subject'] = None
+            offer_search.apply(response.data)
 
-    async def __update_tutor_subjects(self, offer: dict):
-        if subject_id := offer.get('subject_id'):
-            tutor_id = offer.get('tutor_id')
+        # Only subjects of offers actually written, a write filtered out by the tutor links nothing
+        if link_subjects and (subject_ids := {row['subject_id'] for row in response.data if row.get('subject_id')}):
+            await self.__link_tutor_subjects(tutor_id, subject_ids)
+        return response.data
 
-            try:
-                await tutor_subjects_crud_provider.create({
-                    'tutor_id': tutor_id,
-                    'subject_id': subject_id
-                })
-            except:
-                # Object already exists
-                pass
+    async def __link_tutor_subjects(self, tutor_id: str, subject_ids: Iterable[int]) -> None:
+        try:
+            await execute(
+                supabase
+                .table("tutor_subjects")
+                .upsert([{'tutor_id': tutor_id, 'subject_id': subject_id} for subject_id in subject_ids],
+                        on_conflict="tutor_id,subject_id", ignore_duplicates=True, returning=ReturnMethod.minimal)
+            )
+        except Exception as e:
+            # Not fatal for the offers, the link is only used to list the subjects of the tutor
+            logger.warning(f"Failed to link subjects {subject_ids} to tutor {tutor_id}: {str(e)}")
+
+    async def __get_available_offers(self, level_id: int, subject_id: int, start_date: datetime | str,
+                                     end_date: datetime | str, min_price: Optional[float], max_price: Optional[float],
+                                     order: Optional[str], limit: int, offset: int) -> Optional[list[ActiveOfferResponse]]:
+        """
+        Active offers of the tutors free within the dates, from the search and availability indexes.
+        None when the indexes can't answer (not loaded, dates too far ahead), the RPC is used instead.
+        """
+        if not offer_search.ready:
+            return None
+        free_tutors = await self.__get_free_tutors(start_date, end_date)
+        if free_tutors is None:
+            return None
+
+        result = offer_search.index.search(subject_id=subject_id, level_id=level_id, min_price=min_price,
+                                           max_price=max_price, limit=limit, offset=offset, order=order or "ASC",
+                                           tutor_ids=free_tutors)
+        return [ActiveOfferResponse(**offer, total_records=result.total) for offer in result.offers]
+
+    async def __get_free_tutors(self, start_date: datetime | str, end_date: datetime | str) -> Optional[set[str]]:
+        """Tutors free within the dates, None when the availability index can't tell."""
+        try:
+            start_date = standardize_datetime(parse_datetime(start_date))
+            end_date = standardize_datetime(parse_datetime(end_date))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid start_date or end_date")
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date must be before end_date")
+
+        return await availability_index.free_tutors(start_date, end_date)
 
     async def _check_tutor_exists(self, tutor_id: str):
         crud_provider_tutor_profile = CRUDProvider('tutor_profiles', 'tutor_id')
@@ -252,18 +551,17 @@ class OffersService:
                 raise HTTPException(403, f"You are not a tutor!")
             raise
 
-    async def _check_tutor_owns_offer(self, tutor_id: str, offer_id: str):
-        crud_offer = CRUDProvider('offers', 'tutor_id')
 
-        try:
-            offer = await crud_offer.get(offer_id)
-        except HTTPException as e:
-            if e.status_code == 404:
-                raise HTTPException(404, f"Offer with id {offer_id} not found.")
-            elif e.status_code == 502:
-                raise HTTPException(502, "No response from query when checking offer.")
-            else:
-                raise
+def _encode_offers_cursor(sort_by: OfferSortBy, order: Order, key: float, id: int) -> str:
+    return encode_cursor([sort_by.value, order.value, key], id)
+
+
+def _decode_offers_cursor(cursor: str) -> tuple:
+    value, id = decode_cursor(cursor)
+    if not (isinstance(value, list) and len(value) == 3 and isinstance(value[2], (int, float))):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return tuple(value), id
+
 
-        if offer.get('tutor_id') != tutor_id:
-            raise HTTPException(403, f"This tutor does not own this offer.")
+def _created(row: dict) -> OfferBatchResult:
+    return OfferBatchResult(id=row['id'], status=201, offer=to_offer(row))
@@ -1,7 +1,16 @@
+import os
+
+from core.cache import TTLCache
 from core.db_connection import supabase
 from fastapi import HTTPException
+from core.images import thumbnail_url
+
+from .dataclasses import OfferResponse, TutorOfferResponse, ActiveOfferResponse, Offer
 
-from .dataclasses import OfferResponse, TutorOfferResponse, ActiveOfferResponse
+# Number of active offers per filter signature and version of the search index, later pages reuse the count
+# of the first one. Offer writes change the version; the ttl bounds staleness of date filters.
+offer_count_cache = TTLCache(max_size=int(os.getenv("OFFER_COUNT_CACHE_SIZE", "1000")),
+                             ttl=float(os.getenv("OFFER_COUNT_CACHE_TTL", "60")))
 
 
 def get_offers(offer_id: int) -> list[OfferResponse]:
@@ -18,6 +27,16 @@ def get_offers(offer_id: int) -> list[OfferResponse]:
     return None
 
 
+def to_offer(data: dict) -> Offer:
+    """Build an ``Offer`` from an offer row with its ``subjects`` and ``levels`` embedded."""
+    data = dict(data)
+    data.pop("tutor_profiles", None)
+    subject = data.pop("subjects", None)
+    level = data.pop("levels", None)
+
+    return Offer(**data, subject=subject, level=level)
+
+
 def flatten_offer_data(data: dict) -> OfferResponse:
     tutor_profile = data.pop("tutor_profiles", {}) or {}
     profile = tutor_profile.pop("profiles", {}) or {}
@@ -29,7 +48,7 @@ def flatten_offer_data(data: dict) -> OfferResponse:
         tutor_id=tutor_profile.get("id"),
         description=data.get("description"),
         tutor_full_name=profile.get("full_name", "Unknown"),
-        tutor_avatar_url=profile.get("avatar_url"),
+        tutor_avatar_url=thumbnail_url(profile.get("avatar_url")),
         tutor_rating=tutor_profile.get("rating"),
         price=data.get("price"),
         subject_name=subject.get("name"),
@@ -75,7 +94,7 @@ def flatten_active_offers(data: list[dict]) -> list[ActiveOfferResponse]:
                 id=offer.get("id"),
                 tutor_id=offer.get("tutor_id"),
                 tutor_full_name=profile.get("full_name", "Unknown"),
-                tutor_avatar_url=profile.get("avatar_url"),
+                tutor_avatar_url=thumbnail_url(profile.get("avatar_url")),
                 tutor_rating=tutor_profile.get("rating"),
                 price=offer.get("price"),
                 description=offer.get("description"),
@@ -0,0 +1,115 @@
+import asyncio
+import importlib.util
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from core.db_connection import supabase
+from core.db_executor import execute, run_sync
+from core.images import AVATAR_SIZE, AVATAR_SIZES, content_hash, render_variants, variant_path
+from core.storage import public_url, remove_objects
+from core.uploads import UnconfirmedUploads
+from .utils import invalidate_profile
+
+logger = logging.getLogger(__name__)
+
+AVATAR_WORKERS = int(os.getenv("AVATAR_WORKERS", "2"))
+# Avatars waiting to be processed, new ones are skipped (and served unprocessed) when it is full
+AVATAR_QUEUE_SIZE = int(os.getenv("AVATAR_QUEUE_SIZE", "100"))
+# Variants are immutable (content hash in the path), clients may cache them for a year
+VARIANT_CACHE_CONTROL = "31536000"
+
+
+class AvatarProcessor:
+    """
+    Turns uploaded avatars into square WebP variants off the request path.
+
+    Uploads are queued with ``submit``, worker tasks render the variants in a process pool, store them under
+    the content hash of the original and point the profile at the large variant. The original is removed.
+    Listings get the thumbnail through ``core.images.thumbnail_url``.
+    """
+
+    def __init__(self, workers: int = AVATAR_WORKERS, queue_size: int = AVATAR_QUEUE_SIZE):
+        self.workers = workers
+        self._queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue(maxsize=queue_size)
+        self._tasks: list[asyncio.Task] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def start(self):
+        if self._tasks:
+            return
+        if importlib.util.find_spec("PIL") is None:
+            logger.warning("Pillow is not installed, avatars are served unprocessed")
+            return
+
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, user_id: str, path: str) -> None:
+        """Queue the avatar uploaded to ``path`` in the ``avatars`` bucket for processing."""
+        if not self._tasks:
+            return
+
+        try:
+            self._queue.put_nowait((user_id, path))
+        except asyncio.QueueFull:
+            logger.warning(f"Avatar queue is full, not processing {path}")
+
+    async def _work(self):
+        while True:
+            user_id, path = await self._queue.get()
+            try:
+                await self.process(user_id, path)
+            except Exception as e:
+                logger.error(f"Failed to process avatar {path}: {str(e)}")
+
+    async def process(self, user_id: str, path: str) -> None:
+        bucket = supabase.storage.from_("avatars")
+        original = await run_sync(bucket.download, path)
+        digest = content_hash(original)
+        avatar_path = variant_path(digest, AVATAR_SIZE)
+
+        # Same image already processed (by anyone), only missing sizes are rendered
+        existing = await asyncio.gather(*(run_sync(bucket.exists, variant_path(digest, size)) for size in AVATAR_SIZES))
+        missing_sizes = tuple(size for size, exists in zip(AVATAR_SIZES, existing) if not exists)
+        if missing_sizes:
+            loop = asyncio.get_running_loop()
+            variants = await loop.run_in_executor(self._executor, render_variants, original, missing_sizes)
+            await asyncio.gather(*(
+                run_sync(bucket.upload, file=data, path=variant_path(digest, size),
+                         file_options={"upsert": "true", "content-type": "image/webp",
+                                       "cache-control": VARIANT_CACHE_CONTROL})
+                for size, data in variants.items()
+            ))
+
+        # Only if the user did not change the avatar in the meantime
+        updated = await execute(supabase.table("profiles")
+                                .update({"avatar_url": public_url("avatars", avatar_path)})
+                                .eq("id", user_id)
+                                .eq("avatar_url", public_url("avatars", path)))
+        if updated.data:
+            invalidate_profile(user_id)
+            await remove_objects("avatars", [path])
+
+
+async def remove_variants(digest: str) -> None:
+    """Remove every variant of an image, unless a profile still uses it (the same image uploaded by someone else)."""
+    users = await execute(supabase.table("profiles").select("id")
+                          .like("avatar_url", f"*/{variant_path(digest, AVATAR_SIZE)}").limit(1))
+    if not users.data:
+        await remove_objects("avatars", [variant_path(digest, size) for size in AVATAR_SIZES])
+
+
+avatar_processor = AvatarProcessor()
+# Avatars uploaded through signed URLs and never confirmed
+unconfirmed_avatars = UnconfirmedUploads("avatars", "profiles", "avatar_url")
@@ -7,6 +7,7 @@ from users.auth import authenticate_user
 from .dataclasses import Profile, CreateProfileRequest, UpdateProfileRequest, SetRoleRequest, BaseProfile
 from .service import ProfilesService, _parse_from_create_request, _parse_from_update_request
 from users.dataclasses import MyUserResponse
+from core.storage import UploadUrl, UploadUrlRequest, ConfirmUploadRequest
 
 profiles_router = APIRouter()
 profiles_service = ProfilesService()
@@ -60,6 +61,37 @@ async def update_profile(avatar: List[UploadFile] = None,
         """
     return await profiles_service.update_profile(_user_response, profile_data, avatar)
 
+
+@profiles_router.post('/profiles/avatar/upload-url', response_model=UploadUrl)
+async def create_avatar_upload_url(request: UploadUrlRequest, _user_response: UserResponse = Depends(authenticate_user)):
+    """
+        Get a signed URL to upload a new avatar directly to storage, without sending the file through the API.
+        Confirm the upload with ``POST /profiles/avatar/confirm`` once it is finished.
+
+        Args:
+            request (UploadUrlRequest): Content type of the image (image/jpeg or image/png).
+            _user_response (UserResponse): The authenticated user making the request.
+
+        Returns:
+            UploadUrl: The signed upload URL, its token and the path of the new avatar.
+        """
+    return await profiles_service.create_avatar_upload_url(_user_response.user.id, request.content_type)
+
+
+@profiles_router.post('/profiles/avatar/confirm', response_model=BaseProfile)
+async def confirm_avatar_upload(request: ConfirmUploadRequest, _user_response: UserResponse = Depends(authenticate_user)):
+    """
+        Set an avatar uploaded through a signed upload URL as the avatar of the user. The previous avatar is removed.
+
+        Args:
+            request (ConfirmUploadRequest): Path of the uploaded avatar.
+            _user_response (UserResponse): The authenticated user making the request.
+
+        Returns:
+            BaseProfile: Updated profile entry containing is_tutor, full_name and avatar_url
+        """
+    return await profiles_service.confirm_avatar_upload(_user_response.user.id, request.path)
+
 @profiles_router.get('/profiles/{id}', response_model=Profile)
 async def get_profile(id: str = Path(...)):
     """
@@ -8,6 +8,11 @@ from pydantic import ValidationError
 from crud.crud_provider import CRUDProvider
 from .dataclasses import BaseProfile, Profile, CreateProfileRequest, UpdateProfileRequest, SetRoleRequest
 from core.db_connection import supabase
+from core.db_executor import run_sync
+from core.storage import UploadUrl, create_upload_url, new_object_path, public_url, verify_upload
+from .utils import invalidate_profile
+from .avatars import avatar_processor, remove_variants, unconfirmed_avatars
+from core.images import is_variant_path, variant_digest
 from users.service import UsersService
 from users.dataclasses import UserResponse
 from users.dataclasses import MyUserResponse
@@ -52,6 +57,9 @@ class ProfilesService:
         profile_to_create = Profile(id = user_response.user.id, full_name = create_profile_data.full_name, is_tutor = create_profile_data.is_tutor, avatar_url = avatar_url)
 
         new_profile = await crud_provider.create(profile_to_create.model_dump())
+        invalidate_profile(user_response.user.id)
+        if avatar and avatar[0].size != 0:
+            avatar_processor.submit(user_response.user.id, file_data.path)
 
         return Profile.model_validate(new_profile)
 
@@ -63,6 +71,7 @@ class ProfilesService:
         profile_to_create = Profile(id = user_response.user.id, is_tutor = request.is_tutor)
 
         new_profile = await crud_provider.create(profile_to_create.model_dump())
+        invalidate_profile(user_response.user.id)
 
         return Profile.model_validate(new_profile)
 
@@ -98,24 +107,28 @@ class ProfilesService:
         if not user_data.profile: raise HTTPException(409, "Profile doesn't exist yet!")
 
         avatar_url = user_data.profile.avatar_url or user_data.provider_avatar_url
+        replaced_avatar_url = None
 
         if avatar and avatar[0].size != 0:
             file_data = await self.upload_avatar(user_response.user.id, avatar)
             avatar_url = f"{SUPABASE_URL}/storage/v1/object/public/{file_data.full_path}"
-
-            if user_data.profile.avatar_url and SUPABASE_URL in user_data.profile.avatar_url:
-                await self.remove_avatar(user_data.profile.avatar_url)
+            replaced_avatar_url = user_data.profile.avatar_url
 
         elif update_profile_data.remove_avatar:
             avatar_url = user_data.provider_avatar_url
-
-            if user_data.profile.avatar_url and SUPABASE_URL in user_data.profile.avatar_url:
-                await self.remove_avatar(user_data.profile.avatar_url)
+            replaced_avatar_url = user_data.profile.avatar_url
 
         profile_to_update = BaseProfile(id = user_data.id, full_name=update_profile_data.full_name,
                                     is_tutor=user_data.profile.is_tutor, avatar_url=avatar_url)
 
         updated_profile = await crud_provider.update(profile_to_update.model_dump(), user_data.id)
+        invalidate_profile(user_data.id)
+
+        # Once the profile doesn't use it anymore, so shared variants are seen as unused
+        if replaced_avatar_url and SUPABASE_URL in replaced_avatar_url:
+            await self.remove_avatar(replaced_avatar_url)
+        if avatar and avatar[0].size != 0:
+            avatar_processor.submit(user_data.id, file_data.path)
 
         return BaseProfile.model_validate(updated_profile)
 
@@ -130,6 +143,7 @@ class ProfilesService:
             Profile: The deleted user profile.
         """
         deleted_profile = await crud_provider.delete(id)
+        invalidate_profile(id)
 
         return Profile.model_validate(deleted_profile)
 
@@ -169,11 +183,10 @@ class ProfilesService:
         file_data = await avatar.read()
         filename =  str(uuid.uuid4())
         path = f"{user_id}/{filename}"
-        res = (supabase.storage
-               .from_("avatars")
-               .upload(file=file_data, path=path,
-                       file_options={"upsert": "false",
-                                     "content-type": avatar.content_type}))
+        bucket = supabase.storage.from_("avatars")
+        res = await run_sync(bucket.upload, file=file_data, path=path,
+                             file_options={"upsert": "false",
+                                           "content-type": avatar.content_type})
 
         if not res.path:
             raise HTTPException(
@@ -183,10 +196,63 @@ class ProfilesService:
 
         return res
 
+    async def create_avatar_upload_url(self, user_id: str, content_type: str) -> UploadUrl:
+        """
+        Create a signed URL the client uploads its new avatar to, directly to storage.
+
+        Args:
+            user_id (str): UUID of the user.
+            content_type (str): Content type of the image to upload.
+
+        Returns:
+            UploadUrl: The signed URL, the path is then confirmed with ``confirm_avatar_upload``.
+        """
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type: {content_type}")
+
+        upload_url = await create_upload_url("avatars", new_object_path(user_id))
+        # Removed again unless confirmed before the URL expires
+        unconfirmed_avatars.add([upload_url.path])
+        return upload_url
+
+    async def confirm_avatar_upload(self, user_id: str, path: str) -> BaseProfile:
+        """
+        Set an avatar uploaded through ``create_avatar_upload_url`` as the avatar of the user.
+
+        Args:
+            user_id (str): UUID of the user.
+            path (str): Path of the uploaded avatar in the ``avatars`` bucket.
+
+        Returns:
+            BaseProfile: The updated profile.
+        """
+        await verify_upload("avatars", path, user_id, ALLOWED_CONTENT_TYPES, MAX_FILE_SIZE)
+
+        profile = await crud_provider.get(user_id)
+        avatar_url = public_url("avatars", path)
+        updated_profile = await crud_provider.update({"avatar_url": avatar_url}, user_id)
+        invalidate_profile(user_id)
+        unconfirmed_avatars.confirm([path])
+
+        old_avatar_url = profile.get("avatar_url")
+        # Confirmed again, the old avatar is the new one
+        if old_avatar_url == avatar_url:
+            return BaseProfile.model_validate(updated_profile)
+
+        if old_avatar_url and SUPABASE_URL in old_avatar_url:
+            await self.remove_avatar(old_avatar_url)
+        avatar_processor.submit(user_id, path)
+
+        return BaseProfile.model_validate(updated_profile)
+
     async def remove_avatar(self, path: str):
         filepath = path.split(
             f"{SUPABASE_URL}/storage/v1/object/public/avatars/")[1]
-        _ = supabase.storage.from_("avatars").remove([filepath])
+        # Processed variants may be shared with other users (same image), they are removed once nobody uses them
+        if is_variant_path(filepath):
+            await remove_variants(variant_digest(filepath))
+            return
+        _ = await run_sync(supabase.storage.from_("avatars").remove, [filepath])
 
 async def _parse_from_create_request(is_tutor: Annotated[bool, Form()], full_name: Annotated[str, Form()]) -> CreateProfileRequest:
     try:
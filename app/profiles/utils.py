@@ -1,24 +1,57 @@
+import os
+
+from core.cache import TTLCache
 from core.db_connection import supabase
+from core.db_executor import execute, run_sync
 from fastapi import HTTPException
 from supabase import AuthApiError
 
 from .dataclasses import Profile
+from tutors.utils import invalidate_tutor_profile
+
+# Profiles of authenticated users, keyed by user id. Cleared on every profile write.
+profile_cache = TTLCache(max_size=int(os.getenv("PROFILE_CACHE_SIZE", "10000")),
+                         ttl=float(os.getenv("PROFILE_CACHE_TTL", "30")))
 
 
 async def get_profile_data(id: str) -> Profile:
     try:
-        user = supabase.auth.admin.get_user_by_id(id).user
+        user = (await run_sync(supabase.auth.admin.get_user_by_id, id)).user
     except AuthApiError:
         raise HTTPException(404, 'User not found')
 
-    profile = (
+    profile = await execute(
+        supabase.table('profiles')
+        .select('*')
+        .eq('id', id)
+    )
+
+    if profile.data and len(profile.data) > 0:
+        return profile.data[0]
+
+    return None
+
+
+async def get_cached_profile_data(id: str) -> Profile:
+    """``get_profile_data`` for an already authenticated user, served from ``profile_cache`` when possible."""
+    profile = profile_cache.get(id)
+    if profile is not None:
+        return profile
+
+    profile = await execute(
         supabase.table('profiles')
         .select('*')
         .eq('id', id)
-        .execute()
     )
 
     if profile.data and len(profile.data) > 0:
+        profile_cache.set(id, profile.data[0])
         return profile.data[0]
 
     return None
+
+
+def invalidate_profile(id: str) -> None:
+    profile_cache.invalidate(id)
+    # Name and avatar are part of the tutor profile response
+    invalidate_tutor_profile(id)
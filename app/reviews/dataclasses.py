@@ -1,6 +1,6 @@
 from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, Union
 
 
 class TutorReviewResponse(BaseModel):
@@ -13,6 +13,21 @@ class TutorReviewResponse(BaseModel):
     student_avatar_url: Optional[str] = None
 
 
+class CompactTutorReviewResponse(BaseModel):
+    id: int
+    rating: Optional[int]
+    comment: str
+    created_at: datetime
+    student_id: str
+
+
+class TutorReviewsPage(BaseModel):
+    reviews: List[Union[TutorReviewResponse, CompactTutorReviewResponse]]
+    has_more: bool = False
+    # Pass as ``cursor`` to get the next page
+    next_cursor: Optional[str] = None
+
+
 class UpsertReview(BaseModel):
     student_id: str
     tutor_id: str
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import math
+import os
+from typing import Iterable, Optional
+
+from core.cache import TTLCache
+from core.db_connection import supabase
+from core.db_executor import execute
+from tutors.utils import invalidate_tutor_profile
+
+logger = logging.getLogger(__name__)
+
+RATING_STARS = 5
+# Aggregates are recomputed from all reviews this often, fixing any drift (e.g. concurrent recounts of other workers)
+RATING_RECONCILE_INTERVAL = float(os.getenv("RATING_RECONCILE_INTERVAL", "3600"))
+RATING_RECONCILE_PAGE_SIZE = 1000
+# Tutors reconciled together (their reviews are read with one query)
+RATING_RECONCILE_TUTORS = 100
+# Aggregates kept in memory, the least recently used ones are loaded again when needed
+RATING_AGGREGATES_CACHE_SIZE = int(os.getenv("RATING_AGGREGATES_CACHE_SIZE", "10000"))
+# Writes of different tutors share one of this many locks
+RATING_LOCK_STRIPES = 64
+
+
+class RatingAggregate:
+    """Sum, count and per-star histogram of the ratings of one tutor."""
+
+    __slots__ = ("sum", "count", "histogram")
+
+    def __init__(self, ratings: Iterable[Optional[float]] = ()):
+        self.sum = 0.0
+        self.count = 0
+        self.histogram = [0] * RATING_STARS
+        for rating in ratings:
+            self.add(rating)
+
+    def add(self, rating: Optional[float], weight: int = 1) -> None:
+        if rating is None:
+            # Reviews without a rating don't count
+            return
+
+        star = min(max(round(rating), 1), RATING_STARS)
+        self.sum += rating * weight
+        self.count += weight
+        self.histogram[star - 1] += weight
+
+    def remove(self, rating: Optional[float]) -> None:
+        self.add(rating, -1)
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, RatingAggregate) and self.count == other.count
+                and self.histogram == other.histogram and math.isclose(self.sum, other.sum))
+
+    @property
+    def average(self) -> float:
+        return round(self.sum / self.count, 2) if self.count > 0 else 0
+
+
+class RatingAggregates:
+    """
+    Rating aggregates of the tutors, served from memory and recounted on every review write.
+
+    An aggregate is loaded from the reviews of a tutor the first time it is needed and kept in a bounded
+    ``TTLCache``. A review write recounts the ratings of the tutor from the database instead of changing the
+    cached aggregate, which may be stale when other workers wrote reviews meanwhile, and writes the result
+    through to ``tutor_profiles.rating``, which the offer queries sort and filter by.
+    """
+
+    def __init__(self):
+        self._aggregates = TTLCache(max_size=RATING_AGGREGATES_CACHE_SIZE, ttl=RATING_RECONCILE_INTERVAL)
+        self._locks = [asyncio.Lock() for _ in range(RATING_LOCK_STRIPES)]
+        self._reconcile_task: Optional[asyncio.Task] = None
+
+    async def get(self, tutor_id: str) -> RatingAggregate:
+        aggregate = self._aggregates.get(tutor_id)
+        if aggregate is not None:
+            return aggregate
+
+        async with self._lock(tutor_id):
+            aggregate = self._aggregates.get(tutor_id)
+            if aggregate is None:
+                aggregate = await self._load(tutor_id)
+                self._aggregates.set(tutor_id, aggregate)
+            return aggregate
+
+    async def review_written(self, tutor_id: str) -> None:
+        """Recount the ratings of a tutor after one of its reviews was created, updated or deleted."""
+        try:
+            async with self._lock(tutor_id):
+                # Loaded after the write, so it includes the change and the writes of other workers
+                aggregate = await self._load(tutor_id)
+                self._aggregates.set(tutor_id, aggregate)
+                await self._save(tutor_id, aggregate)
+        except Exception as e:
+            # Not fatal for the review write (already committed), the next reconcile fixes the rating
+            self._aggregates.invalidate(tutor_id)
+            logger.error(f"Failed to update the rating of tutor {tutor_id}: {str(e)}")
+
+    async def reconcile(self) -> None:
+        """
+        Recompute the aggregates from the reviews, a page of tutors at a time, and fix the stored ratings
+        and cached aggregates that differ.
+        """
+        reconciled = 0
+        async for tutors in _read_pages(lambda: supabase.table("tutor_profiles").select("id, rating"),
+                                        RATING_RECONCILE_TUTORS):
+            reconciled += await self._reconcile_tutors(tutors)
+
+        if reconciled:
+            logger.info(f"Reconciled ratings of {reconciled} tutors")
+
+    async def _reconcile_tutors(self, tutors: list[dict]) -> int:
+        tutor_ids = [tutor["id"] for tutor in tutors]
+        aggregates: dict[str, RatingAggregate] = {}
+        async for reviews in _read_pages(lambda: supabase.table("reviews")
+                                         .select("id, tutor_id, rating")
+                                         .in_("tutor_id", tutor_ids), RATING_RECONCILE_PAGE_SIZE):
+            for review in reviews:
+                aggregates.setdefault(review["tutor_id"], RatingAggregate()).add(review["rating"])
+
+        reconciled = 0
+        for tutor in tutors:
+            aggregate = aggregates.get(tutor["id"], RatingAggregate())
+            cached = self._aggregates.get(tutor["id"])
+            if tutor["rating"] == aggregate.average and (cached is None or cached == aggregate):
+                continue
+
+            # Loaded again under the lock, the reviews read above may be older than a write made meanwhile
+            async with self._lock(tutor["id"]):
+                aggregate = await self._load(tutor["id"])
+                self._aggregates.set(tutor["id"], aggregate)
+                await self._save(tutor["id"], aggregate)
+            reconciled += 1
+
+        return reconciled
+
+    async def start(self) -> None:
+        self._reconcile_task = asyncio.create_task(self._reconcile_periodically())
+
+    async def stop(self) -> None:
+        if self._reconcile_task:
+            self._reconcile_task.cancel()
+            self._reconcile_task = None
+
+    async def _load(self, tutor_id: str) -> RatingAggregate:
+        reviews = await execute(supabase.table("reviews").select("rating").eq("tutor_id", tutor_id))
+        return RatingAggregate(review["rating"] for review in reviews.data)
+
+    async def _save(self, tutor_id: str, aggregate: RatingAggregate) -> None:
+        await execute(supabase.table("tutor_profiles").update({"rating": aggregate.average}).eq("id", tutor_id))
+        invalidate_tutor_profile(tutor_id)
+
+    def _lock(self, tutor_id: str) -> asyncio.Lock:
+        return self._locks[hash(tutor_id) % RATING_LOCK_STRIPES]
+
+    async def _reconcile_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(RATING_RECONCILE_INTERVAL)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Failed to reconcile ratings: {str(e)}")
+
+
+async def _read_pages(query, page_size: int):
+    """Every row of a query in pages (a single select is capped by the API), ``query`` builds a new select."""
+    offset = 0
+    while True:
+        page = await execute(query().order("id").range(offset, offset + page_size - 1))
+        yield page.data
+
+        if len(page.data) < page_size:
+            return
+        offset += page_size
+
+
+rating_aggregates = RatingAggregates()
+
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, Path, Query
 from users.auth import authenticate_user
 
-from .dataclasses import TutorReviewResponse, CreateReviewRequest, Review
-from .service import ReviewsService, SortBy, Order
+from typing import Optional
+
+from .dataclasses import TutorReviewResponse, CreateReviewRequest, Review, TutorReviewsPage
+from .service import ReviewsService, SortBy, Order, REVIEWS_PAGE_SIZE
 from users.dataclasses import UserResponse
 
 reviews_router = APIRouter()
@@ -26,6 +28,30 @@ async def get_tutor_reviews(tutor_id: str = Path(...),
     """
     return await reviews_service.get_tutor_reviews(tutor_id, sort_by, order)
 
+
+@reviews_router.get("/tutor-reviews/{tutor_id}/page", response_model=TutorReviewsPage)
+async def get_tutor_reviews_page(tutor_id: str = Path(...),
+                                 sort_by: SortBy = Query(...),
+                                 order: Order = Query(...),
+                                 limit: int = Query(REVIEWS_PAGE_SIZE, ge=1, le=100),
+                                 cursor: Optional[str] = Query(None),
+                                 compact: bool = Query(False)) -> TutorReviewsPage:
+    """
+    Retrieve one page of the reviews of a specific tutor.
+
+    Args:
+        tutor_id (str): Tutor UUID.
+        sort_by (SortBy): Field to sort offers by rating, date.
+        order (Order): Sorting order increasing or decreasing.
+        limit (int): Maximum number of reviews in the page.
+        cursor (Optional[str]): ``next_cursor`` of the previous page, omitted for the first page.
+        compact (bool): Leave out the name and avatar of the authors.
+
+    Returns:
+        TutorReviewsPage: The reviews of the page and the cursor of the next one.
+    """
+    return await reviews_service.get_tutor_reviews_page(tutor_id, sort_by, order, limit, cursor, compact)
+
 @reviews_router.post("/reviews", response_model=Review)
 async def review_tutor(request: CreateReviewRequest,
                        _user_response: UserResponse = Depends(authenticate_user)
@@ -1,13 +1,21 @@
 from core.db_connection import supabase
+from core.db_executor import execute
 from crud.crud_provider import CRUDProvider
+from core.pagination import decode_cursor, encode_cursor, paginate
 from enum import Enum
 from fastapi import HTTPException
+from typing import Optional
 
-from .dataclasses import TutorReviewResponse, Review, UpsertReview, CreateReviewRequest
-from .utils import flatten_tutor_reviews_data
+from .dataclasses import TutorReviewResponse, Review, UpsertReview, CreateReviewRequest, TutorReviewsPage, \
+    CompactTutorReviewResponse
+from .utils import flatten_tutor_reviews_data, tutor_reviews_cache, invalidate_tutor_reviews
+from .ratings import rating_aggregates
+from tutors.utils import invalidate_tutor_profile
 
 crud_provider = CRUDProvider("reviews")
 
+REVIEWS_PAGE_SIZE = 20
+
 
 class SortBy(str, Enum):
     rating = "rating"
@@ -32,7 +40,7 @@ class ReviewsService:
         column = order_map[sort_by]
         sort_desc = order == Order.decreasing
 
-        response = (
+        response = await execute(
             supabase
             .table("reviews")
             .select(
@@ -41,7 +49,6 @@ class ReviewsService:
             )
             .eq("tutor_id", tutor_id)
             .order(column, desc=sort_desc)
-            .execute()
         )
 
         # if response.data is None or len(response.data) == 0:
@@ -49,14 +56,65 @@ class ReviewsService:
 
         return flatten_tutor_reviews_data(response.data)
 
+    async def get_tutor_reviews_page(self, tutor_id: str, sort_by: str, order: str, limit: int = REVIEWS_PAGE_SIZE,
+                                     cursor: Optional[str] = None, compact: bool = False) -> TutorReviewsPage:
+        """
+        Get one page of the reviews of a tutor, read with a keyset on the sort column and the id.
+        The first page is cached, so the reviews tab loads in constant time however many reviews there are.
+        """
+        order_map = {
+            SortBy.rating: "rating",
+            SortBy.date: "created_at"
+        }
+
+        if sort_by not in order_map:
+            raise HTTPException(status_code=400, detail="Invalid sort_by value")
+
+        cache_key = (tutor_id, sort_by, order, limit, compact)
+        keyset = None
+        if cursor:
+            # The cursor records the order it was made for, its value means nothing in another one
+            (cursor_sort_by, cursor_order, value), id = _decode_reviews_cursor(cursor)
+            if (cursor_sort_by, cursor_order) != (SortBy(sort_by).value, Order(order).value):
+                raise HTTPException(status_code=400, detail="Cursor was made for another sort_by or order")
+            keyset = (value, id)
+        else:
+            page = tutor_reviews_cache.get(cache_key)
+            if page is not None:
+                return page
+
+        column = order_map[sort_by]
+        # The profile of every author is only joined for the full projection
+        columns = "id, rating, comment, created_at, student_id"
+        if not compact:
+            columns += ", profiles(full_name, avatar_url)"
+
+        response = await execute(paginate(
+            supabase.table("reviews").select(columns).eq("tutor_id", tutor_id),
+            column, limit, keyset, desc=order == Order.decreasing, nullable=column == "rating"
+        ))
+
+        rows = response.data[:limit]
+        has_more = len(response.data) > limit
+        page = TutorReviewsPage(
+            reviews=[CompactTutorReviewResponse.model_validate(row) for row in rows] if compact
+            else flatten_tutor_reviews_data(rows),
+            has_more=has_more,
+            next_cursor=_encode_reviews_cursor(sort_by, order, rows[-1][column], rows[-1]["id"]) if has_more else None,
+        )
+
+        if not cursor:
+            tutor_reviews_cache.set(cache_key, page)
+        return page
+
     async def create_tutor_review(self, request: CreateReviewRequest, user_id: str) -> Review:
         tutor_id = request.tutor_id
 
-        tutor_exists = supabase.table("tutor_profiles").select("id").eq("id", tutor_id).execute()
+        tutor_exists = await execute(supabase.table("tutor_profiles").select("id").eq("id", tutor_id))
         if not tutor_exists.data:
             raise HTTPException(status_code=404, detail="Couldn't find tutor with that id")
 
-        already_reviewed = supabase.table("reviews").select("*").eq("tutor_id", tutor_id).eq("student_id", user_id).execute()
+        already_reviewed = await execute(supabase.table("reviews").select("*").eq("tutor_id", tutor_id).eq("student_id", user_id))
         print(already_reviewed.data)
         if len(already_reviewed.data) > 0:
             raise HTTPException(status_code=409, detail="You already reviewed this tutor")
@@ -70,7 +128,7 @@ class ReviewsService:
         return result
 
     async def delete_tutor_review(self, review_id: int, user_id: str) -> Review:
-        review_exists = supabase.table("reviews").select("*").eq("id", review_id).eq("student_id", user_id).execute()
+        review_exists = await execute(supabase.table("reviews").select("*").eq("id", review_id).eq("student_id", user_id))
         if len(review_exists.data) == 0:
             raise HTTPException(status_code=404, detail="Your review with that id does not exist")
 
@@ -79,6 +137,9 @@ class ReviewsService:
     # CRUD
     async def create_review(self, review: UpsertReview, id: int = None) -> Review:
         new_review = await crud_provider.create(review.model_dump(exclude="created_at"), id)
+        await rating_aggregates.review_written(new_review["tutor_id"])
+        invalidate_tutor_reviews(new_review["tutor_id"])
+        invalidate_tutor_profile(new_review["tutor_id"])
 
         return Review.model_validate(new_review)
 
@@ -88,11 +149,33 @@ class ReviewsService:
         return Review.model_validate(review)
 
     async def update_review(self, review: UpsertReview, id: int = None) -> Review:
+        old_review = await crud_provider.get(id) if id else None
         updated_review = await crud_provider.update(review.model_dump(exclude="created_at"), id)
+        await rating_aggregates.review_written(updated_review["tutor_id"])
+        if old_review and old_review["tutor_id"] != updated_review["tutor_id"]:
+            await rating_aggregates.review_written(old_review["tutor_id"])
+            invalidate_tutor_reviews(old_review["tutor_id"])
+            invalidate_tutor_profile(old_review["tutor_id"])
+        invalidate_tutor_reviews(updated_review["tutor_id"])
+        invalidate_tutor_profile(updated_review["tutor_id"])
 
         return Review.model_validate(updated_review)
 
     async def delete_review(self, id: int) -> Review:
         deleted_review = await crud_provider.delete(id)
+        await rating_aggregates.review_written(deleted_review["tutor_id"])
+        invalidate_tutor_reviews(deleted_review["tutor_id"])
+        invalidate_tutor_profile(deleted_review["tutor_id"])
 
         return Review.model_validate(deleted_review)
+
+
+def _encode_reviews_cursor(sort_by: SortBy, order: Order, value, id: int) -> str:
+    return encode_cursor([SortBy(sort_by).value, Order(order).value, value], id)
+
+
+def _decode_reviews_cursor(cursor: str) -> tuple:
+    value, id = decode_cursor(cursor)
+    if not (isinstance(value, list) and len(value) == 3):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return tuple(value), id
@@ -1,8 +1,16 @@
+import os
+
+from core.cache import TTLCache
 from core.db_connection import supabase
 from fastapi import HTTPException
+from core.images import thumbnail_url
 
 from .dataclasses import TutorReviewResponse
 
+# First page of the reviews of a tutor (per sort order, page size and projection). Cleared on review writes.
+tutor_reviews_cache = TTLCache(max_size=int(os.getenv("TUTOR_REVIEWS_CACHE_SIZE", "10000")),
+                               ttl=float(os.getenv("TUTOR_REVIEWS_CACHE_TTL", "60")))
+
 
 def flatten_tutor_reviews_data(data: list[dict]) -> list[TutorReviewResponse]:
     result = []
@@ -16,8 +24,12 @@ def flatten_tutor_reviews_data(data: list[dict]) -> list[TutorReviewResponse]:
                 created_at=offer.get("created_at"),
                 student_id=offer.get("student_id"),
                 student_full_name=profile.get("full_name"),
-                student_avatar_url=profile.get("avatar_url")
+                student_avatar_url=thumbnail_url(profile.get("avatar_url"))
             )
         )
 
     return result
+
+
+def invalidate_tutor_reviews(tutor_id: str) -> None:
+    tutor_reviews_cache.invalidate_where(lambda key: key[0] == tutor_id)
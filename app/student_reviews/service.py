@@ -1,4 +1,5 @@
 from core.db_connection import supabase
+from core.db_executor import execute
 from fastapi import HTTPException
 
 from .dataclasses import StudentReview
@@ -10,11 +11,10 @@ class StudentReviewsService:
         await self._check_student_exists(student_id)
 
         # Using the correct table name "reviews" from your schema
-        reviews = (
+        reviews = await execute(
             supabase.table("reviews")
             .select("*")
             .eq("student_id", student_id)
-            .execute()
         )
 
         return reviews.data or []
@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from core.reference_data import reference_data, not_modified
+from fastapi import APIRouter, Request, Response
 from subjects.dataclasses import Subject, CreateSubjectRequest
 from subjects.service import SubjectsService
 
@@ -7,14 +8,21 @@ subjects_service = SubjectsService()
 
 
 @subjects_router.get("/subjects", response_model=list[Subject])
-async def get_subjects():
+async def get_subjects(request: Request, response: Response):
     """
     Retrieve a list of all available subjects.
 
+    Supports conditional requests: responds with 304 when ``If-None-Match`` matches the current ``ETag``.
+
     Returns:
         list[Subject]: A list of all subjects available in the system.
     """
-    return await subjects_service.get_subjects()
+    subjects = await subjects_service.get_subjects()
+
+    if not_modified_response := not_modified(request, response, reference_data.etag("subjects")):
+        return not_modified_response
+
+    return subjects
 
 
 @subjects_router.post("/subjects", response_model=CreateSubjectRequest)
@@ -1,4 +1,6 @@
 from core.db_connection import supabase
+from core.db_executor import execute
+from core.reference_data import reference_data
 from crud.crud_provider import CRUDProvider
 from fastapi import HTTPException
 from subjects.dataclasses import Subject, CreateSubjectRequest
@@ -10,30 +12,35 @@ crud_provider = CRUDProvider("subjects")
 
 class SubjectsService:
     async def get_subjects(self) -> list[Subject]:
-        subjects = supabase.table("subjects").select("*").execute()
-        return subjects.data
+        return await reference_data.get("subjects")
 
     async def create_subject(self, create_subject_data: CreateSubjectRequest) -> CreateSubjectRequest:
-        result = supabase.table("subjects").insert(create_subject_data.model_dump()).execute()
+        result = await execute(supabase.table("subjects").insert(create_subject_data.model_dump()))
+        reference_data.invalidate("subjects")
         return result.data[0]
 
     # CRUD
     async def create_subject2(self, subject: UpsertSubject, id: int = None) -> Subject:
         new_subject = await crud_provider.create(subject.model_dump(), id)
+        reference_data.invalidate("subjects")
 
         return Subject.model_validate(new_subject)
 
     async def get_subject(self, id: int) -> Subject:
-        subject = await crud_provider.get(id)
+        subject = await reference_data.get_by_id("subjects", id)
+        if subject is None:
+            raise HTTPException(404, "Subject not found")
 
         return Subject.model_validate(subject)
 
     async def update_subject(self, subject: UpsertSubject | Subject, id: int = None) -> Subject:
         updated_subject = await crud_provider.update(subject.model_dump(), id)
+        reference_data.invalidate("subjects")
 
         return Subject.model_validate(updated_subject)
 
     async def delete_subject(self, id: int) -> Subject:
         deleted_subject = await crud_provider.delete(id)
+        reference_data.invalidate("subjects")
 
         return Subject.model_validate(deleted_subject)
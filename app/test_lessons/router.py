@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from core.reference_data import reference_data, not_modified
+from fastapi import APIRouter, Request, Response
 from test_lessons.dataclasses import TestLesson, CreateTestLesson
 from test_lessons.service import TestLessonsService
 
@@ -7,8 +8,13 @@ test_lessons_service = TestLessonsService()
 
 
 @test_lessons_router.get("/test-lessons", response_model=list[TestLesson])
-async def get_test_lessons():
-    return await test_lessons_service.get_test_lessons()
+async def get_test_lessons(request: Request, response: Response):
+    test_lessons = await test_lessons_service.get_test_lessons()
+
+    if not_modified_response := not_modified(request, response, reference_data.etag("test_lessons")):
+        return not_modified_response
+
+    return test_lessons
 
 
 @test_lessons_router.post("/test-lesson", response_model=str)
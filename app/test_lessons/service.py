@@ -1,22 +1,19 @@
 from core.db_connection import supabase
+from core.db_executor import execute
+from core.reference_data import reference_data
 from test_lessons.dataclasses import TestLesson, CreateTestLesson
 
 
 class TestLessonsService:
     async def get_test_lessons(self) -> list[TestLesson]:
-        test_lessons = (
-            supabase.table("test_lessons")
-            .select("*")
-            .execute()
-        )
-        return test_lessons.data
+        return await reference_data.get("test_lessons")
 
     async def create_test_lesson(self, create_test_lesson_data: CreateTestLesson) -> str:
-        new_test_lesson = (
+        new_test_lesson = await execute(
             supabase.table("test_lessons")
             .insert(create_test_lesson_data.model_dump())
-            .execute()
         )
+        reference_data.invalidate("test_lessons")
 
         id = new_test_lesson.data[0].get("id")
 
@@ -1,6 +1,7 @@
 from crud.crud_provider import CRUDProvider
 
 from .dataclasses import TutorProfile, BaseTutorProfile
+from tutors.utils import invalidate_tutor_profile
 
 crud_provider = CRUDProvider('tutor_profiles')
 
@@ -47,6 +48,7 @@ class TutorProfilesService:
             TutorProfile: The updated tutor profile.
         """
         updated_tutor_profile = await crud_provider.update(profile.model_dump(), id)
+        invalidate_tutor_profile(id)
 
         return TutorProfile.model_validate(updated_tutor_profile)
 
@@ -61,5 +63,6 @@ class TutorProfilesService:
             TutorProfile: The deleted tutor profile.
         """
         deleted_tutor_profile = await crud_provider.delete(id)
+        invalidate_tutor_profile(id)
 
         return TutorProfile.model_validate(deleted_tutor_profile)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 
 
 class FeaturedReview(BaseModel):
@@ -40,3 +40,5 @@ class TutorResponse(UpdateTutorProfile):
     full_name: Optional[str] = None
     avatar_url: Optional[str] = None
     reviews_count: int
+    # Number of reviews with 1 to 5 stars
+    rating_histogram: Optional[List[int]] = None
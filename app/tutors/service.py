@@ -1,19 +1,16 @@
+
 from core.db_connection import supabase
+from core.db_executor import execute
 from fastapi import HTTPException
 
 from .dataclasses import TutorProfile, UpdateTutorProfile, TutorResponse
-from .utils import get_tutor_profile_data
+from reviews.ratings import rating_aggregates
+from .utils import get_tutor_profile_data, get_cached_tutor_profile_data, invalidate_tutor_profile
 
 
 class TutorsService:
     async def update_tutor_profile(self, tutor_id: str, request: UpdateTutorProfile) -> TutorResponse:
         """Update tutor profile information"""
-        # Check if tutor profile exists
-        tutor_profile = await get_tutor_profile_data(tutor_id)
-
-        if not tutor_profile:
-            raise HTTPException(status_code=404, detail="Tutor profile not found")
-
         # Build update data dictionary with only provided fields
         update_data = {}
         if request.bio is not None:
@@ -27,27 +24,34 @@ class TutorsService:
 
         # Only update if there's data to update
         if update_data:
-            result = (
+            result = await execute(
                 supabase.table("tutor_profiles")
                 .update(update_data)
                 .eq("id", tutor_id)
-                .execute()
             )
+            invalidate_tutor_profile(tutor_id)
+
+            # Nothing updated - the tutor profile doesn't exist
+            if not result.data:
+                raise HTTPException(status_code=404, detail="Tutor profile not found")
 
         # Return the updated profile
         updated_profile = await get_tutor_profile_data(tutor_id)
+        if not updated_profile:
+            raise HTTPException(status_code=404, detail="Tutor profile not found")
+
         return updated_profile
 
     async def create_tutor_profile(self, request: UpdateTutorProfile, user_id: str) -> str:
         if user_id is None:
             raise HTTPException(401, 'Unauthorized action')
 
-        tutor_profile = await get_tutor_profile_data(user_id)
+        tutor_profile = await execute(supabase.table('tutor_profiles').select('id').eq('id', user_id))
 
-        if tutor_profile:
+        if tutor_profile.data:
             raise HTTPException(409, 'Tutor profile already exists')
 
-        new_profile = (
+        new_profile = await execute(
             supabase.table('tutor_profiles')
             .insert({
                 'id': user_id,
@@ -58,15 +62,18 @@ class TutorsService:
                 'phone_number': request.phone_number,
                 'featured_review_id': None  # Domyślnie brak wyróżnionej opinii
             })
-            .execute()
         )
 
+        invalidate_tutor_profile(user_id)
+
         return "Created tutor profile"
 
     async def get_tutor_profile(self, tutor_id: str) -> TutorResponse:
-        tutor_profile = await get_tutor_profile_data(tutor_id)
-
+        tutor_profile = await get_cached_tutor_profile_data(tutor_id)
         if not tutor_profile:
             raise HTTPException(404, 'Tutor profile not found')
 
-        return tutor_profile
+        # Only for existing tutors, so unknown ids don't fill the aggregates cache
+        ratings = await rating_aggregates.get(tutor_id)
+
+        return {**tutor_profile, "rating": ratings.average, "rating_histogram": list(ratings.histogram)}
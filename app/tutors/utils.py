@@ -1,51 +1,61 @@
+import os
+
+from core.cache import TTLCache
 from core.db_connection import supabase
+from core.db_executor import execute
 from fastapi import HTTPException
 
 from .dataclasses import TutorResponse
 
+# Profile, featured review with its author and the number of reviews in one round trip.
+# ``reviews`` is related to ``tutor_profiles`` twice, the hints pick the featured review and the reviews of the tutor.
+TUTOR_PROFILE_SELECT = (
+    "id, bio, bio_long, rating, contact_email, phone_number, profiles(full_name, avatar_url), "
+    "reviews!tutor_profiles_featured_review_id_fkey(id, student_id, tutor_id, rating, comment, created_at, "
+    "profiles(full_name, avatar_url)), "
+    "reviews_count:reviews!tutor_id(count)"
+)
+
+# Assembled tutor profiles, keyed by tutor id. Cleared on tutor profile, profile and review writes.
+tutor_profile_cache = TTLCache(max_size=int(os.getenv("TUTOR_PROFILE_CACHE_SIZE", "10000")),
+                               ttl=float(os.getenv("TUTOR_PROFILE_CACHE_TTL", "60")))
+
 
 async def get_tutor_profile_data(tutor_id: str) -> TutorResponse:
-    """Get tutor profile data from the database"""
-    tutor = (
+    """Get tutor profile data from the database, assembled by a single query"""
+    tutor = await execute(
         supabase.table('tutor_profiles')
-        .select(
-            "id, bio, bio_long, rating, contact_email, phone_number, profiles(full_name, avatar_url), reviews!tutor_profiles_featured_review_id_fkey(id, student_id, tutor_id, rating, comment, created_at)")
+        .select(TUTOR_PROFILE_SELECT)
         .eq("id", tutor_id)
-        .execute()
-    )
-
-    feature_review_student_response = {}
-
-    if tutor.data and tutor.data[0].get("reviews"):
-        student_id = tutor.data[0].get("reviews").get("student_id")
-
-        if student_id:
-            res = (
-                supabase.table('profiles')
-                .select("full_name, avatar_url")
-                .eq("id", student_id)
-                .execute()
-            )
-            if res.data and len(res.data) > 0:
-                feature_review_student_response = res.data[0]
-
-    reviews_count_response = (
-        supabase.table('reviews')
-        .select('id', count='exact')
-        .eq('tutor_id', tutor_id)
-        .execute()
     )
 
     if tutor.data and len(tutor.data) > 0:
-        tutor.data[0]['reviews_count'] = reviews_count_response.count or 0
-        tutor.data[0]['featured_review_student_fullname'] = feature_review_student_response.get("full_name") or None
-        tutor.data[0]['featured_review_student_avatar_url'] = feature_review_student_response.get("avatar_url") or None
         return flatten_tutor_data(tutor.data[0])
 
     return None
 
 
+async def get_cached_tutor_profile_data(tutor_id: str) -> TutorResponse:
+    """``get_tutor_profile_data`` served from ``tutor_profile_cache`` when possible"""
+    tutor_profile = tutor_profile_cache.get(tutor_id)
+    if tutor_profile is not None:
+        return tutor_profile
+
+    tutor_profile = await get_tutor_profile_data(tutor_id)
+    if tutor_profile:
+        tutor_profile_cache.set(tutor_id, tutor_profile)
+
+    return tutor_profile
+
+
+def invalidate_tutor_profile(tutor_id: str) -> None:
+    tutor_profile_cache.invalidate(tutor_id)
+
+
 def flatten_tutor_data(tutor_data: {}) -> TutorResponse:
+    featured_review_student = (tutor_data.get("reviews") or {}).get("profiles") or {}
+    reviews_count = tutor_data.get("reviews_count") or [{}]
+
     return {
         "id": tutor_data["id"],
         "bio": tutor_data["bio"],
@@ -53,11 +63,11 @@ def flatten_tutor_data(tutor_data: {}) -> TutorResponse:
         "rating": tutor_data["rating"],
         "contact_email": tutor_data["contact_email"],
         "phone_number": tutor_data["phone_number"],
-        "reviews_count": tutor_data["reviews_count"],
+        "reviews_count": reviews_count[0].get("count") or 0,
         "featured_review_id": tutor_data["reviews"].get("id") if tutor_data.get("reviews") else None,
         "featured_review_student_id": tutor_data["reviews"].get("student_id") if tutor_data.get("reviews") else None,
-        "featured_review_student_fullname": tutor_data["featured_review_student_fullname"],
-        "featured_review_student_avatar_url": tutor_data["featured_review_student_avatar_url"],
+        "featured_review_student_fullname": featured_review_student.get("full_name") or None,
+        "featured_review_student_avatar_url": featured_review_student.get("avatar_url") or None,
         "featured_review_rating": tutor_data["reviews"].get("rating") if tutor_data.get("reviews") else None,
         "featured_review_comment": tutor_data["reviews"].get("comment") if tutor_data.get("reviews") else None,
         "full_name": tutor_data["profiles"].get("full_name") if tutor_data.get("profiles") else None,
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from core.db_connection import supabase
+from core.db_executor import execute
+from .bitmap import SLOT, SLOT_MINUTES, FreeSlotBitmaps
+from .cache import free_slot_cache
+from .service import TutorsAvailabilityService
+
+logger = logging.getLogger(__name__)
+
+# Free time is indexed this many days ahead, searches further in the future are not served from the index
+AVAILABILITY_INDEX_DAYS = int(os.getenv("AVAILABILITY_INDEX_DAYS", "28"))
+# The index is rebuilt this often, moving its window forward. Changes made by other workers are picked up
+# through FreeSlotInvalidations, or only by this rebuild with the memory pub/sub backend and several workers.
+AVAILABILITY_INDEX_REBUILD_INTERVAL = float(os.getenv("AVAILABILITY_INDEX_REBUILD_INTERVAL", "3600"))
+# Tutors computed together (one query per table for each batch)
+AVAILABILITY_INDEX_BATCH_SIZE = 200
+
+
+class AvailabilityIndex:
+    """
+    Free 15 minute slots of every tutor for the next ``AVAILABILITY_INDEX_DAYS`` days, as ``FreeSlotBitmaps``.
+
+    Bitmaps are computed by ``TutorsAvailabilityService`` (same recurrences, unavailabilities and bookings
+    as the availability endpoints). Tutors invalidated in ``free_slot_cache`` since their bitmap was computed
+    are recomputed before the next search.
+    """
+
+    def __init__(self, days: int = AVAILABILITY_INDEX_DAYS):
+        self.days = days
+        self.bitmaps: Optional[FreeSlotBitmaps] = None
+        self._service = TutorsAvailabilityService()
+        # free_slot_cache.last_version when the bitmaps were computed
+        self._version = 0
+        self._lock = asyncio.Lock()
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+    @property
+    def version(self) -> tuple:
+        """Changes whenever the bitmaps are rebuilt or a tutor in them is recomputed."""
+        return self.bitmaps.origin if self.bitmaps else None, self._version
+
+    async def free_tutors(self, start: datetime, end: datetime) -> Optional[set[str]]:
+        """
+        Tutors with a free block of at least ``MIN_BLOCK_DURATION_MINUTES`` within ``[start, end)``
+        (the whole window free if it is shorter).
+
+        Returns:
+            Optional[set[str]]: Ids of the free tutors, None when the window is not indexed.
+        """
+        # Time already passed can't be booked
+        start = max(start, datetime.now(timezone.utc))
+        if start >= end:
+            return set()
+        if self.bitmaps is None or not self.bitmaps.covers(start, end):
+            return None
+
+        await self._refresh_changed()
+        min_duration = timedelta(minutes=TutorsAvailabilityService.MIN_BLOCK_DURATION_MINUTES)
+        return self.bitmaps.free_tutors(start, end, min_duration)
+
+    async def rebuild(self) -> None:
+        now = datetime.now(timezone.utc)
+        origin = now.replace(minute=now.minute - now.minute % SLOT_MINUTES, second=0, microsecond=0)
+        bitmaps = FreeSlotBitmaps(origin, int(timedelta(days=self.days) / SLOT))
+
+        # Taken before reading, so tutors changed in the meantime are computed again on the next search
+        version = free_slot_cache.last_version
+        await self._compute(bitmaps, await _read_tutor_ids())
+
+        async with self._lock:
+            self.bitmaps, self._version = bitmaps, version
+        # Counted since the worker started, tells how many availability reads the cache saves
+        stats = free_slot_cache.stats()
+        logger.info(f"Indexed the free time of {len(bitmaps)} tutors, free slot cache: {stats['hits']} hits, "
+                    f"{stats['misses']} misses, {stats['size']} entries")
+
+    async def start(self) -> None:
+        try:
+            await self.rebuild()
+        except Exception as e:
+            # Not fatal, availability searches go to the database until the next rebuild
+            logger.error(f"Failed to build the availability index: {str(e)}")
+
+        self._rebuild_task = asyncio.create_task(self._rebuild_periodically())
+
+    async def stop(self) -> None:
+        if self._rebuild_task:
+            self._rebuild_task.cancel()
+            self._rebuild_task = None
+
+    async def _refresh_changed(self) -> None:
+        if free_slot_cache.changed_since(self._version) == []:
+            return
+
+        async with self._lock:
+            version = free_slot_cache.last_version
+            changed = free_slot_cache.changed_since(self._version)
+            if changed is None:
+                # Not searched for longer than the versions are kept, which tutors changed is not known
+                changed = await _read_tutor_ids()
+
+            await self._compute(self.bitmaps, changed)
+            self._version = version
+
+    async def _compute(self, bitmaps: FreeSlotBitmaps, tutor_ids: List[str]) -> None:
+        for batch_start in range(0, len(tutor_ids), AVAILABILITY_INDEX_BATCH_SIZE):
+            batch = tutor_ids[batch_start:batch_start + AVAILABILITY_INDEX_BATCH_SIZE]
+            free_blocks = await self._service.get_free_blocks(batch, bitmaps.origin, bitmaps.end)
+
+            for tutor_id in batch:
+                if tutor_id in free_blocks:
+                    bitmaps.set(tutor_id, free_blocks[tutor_id])
+                else:
+                    bitmaps.remove(tutor_id)
+
+    async def _rebuild_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(AVAILABILITY_INDEX_REBUILD_INTERVAL)
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.error(f"Failed to rebuild the availability index: {str(e)}")
+
+
+async def _read_tutor_ids(page_size: int = 1000) -> List[str]:
+    tutor_ids = []
+    while True:
+        page = await execute(supabase.table("tutor_profiles")
+                             .select("id")
+                             .order("id")
+                             .range(len(tutor_ids), len(tutor_ids) + page_size - 1))
+        tutor_ids += [tutor["id"] for tutor in page.data]
+        if len(page.data) < page_size:
+            return tutor_ids
+
+
+availability_index = AvailabilityIndex()
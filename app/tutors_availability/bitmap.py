@@ -0,0 +1,100 @@
+import math
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Set, Tuple
+
+SLOT_MINUTES = 15
+SLOT = timedelta(minutes=SLOT_MINUTES)
+
+
+class FreeSlotBitmaps:
+    """
+    Free time of every tutor as a bitmap of 15 minute slots over ``[origin, origin + slots * 15 min)``.
+
+    Bit ``i`` of a tutor is set when the tutor is free for the whole slot starting at ``origin + i * 15 min``.
+    A bitmap is a Python int, so checking a window is a couple of big-int operations per tutor.
+    """
+
+    def __init__(self, origin: datetime, slots: int):
+        self.origin = origin
+        self.slots = slots
+        self._bitmaps: dict[str, int] = {}
+
+    @property
+    def end(self) -> datetime:
+        return self.origin + self.slots * SLOT
+
+    def __len__(self) -> int:
+        return len(self._bitmaps)
+
+    def __contains__(self, tutor_id: str) -> bool:
+        return tutor_id in self._bitmaps
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return self.origin <= start and end <= self.end
+
+    def set(self, tutor_id: str, free_blocks: Iterable[Tuple[datetime, datetime]]) -> None:
+        """Replace the bitmap of a tutor, partially free slots are not free."""
+        bitmap = 0
+        for start, end in free_blocks:
+            first = max(self._slot(start, math.ceil), 0)
+            last = min(self._slot(end, math.floor), self.slots)
+            if first < last:
+                bitmap |= ((1 << (last - first)) - 1) << first
+        self._bitmaps[tutor_id] = bitmap
+
+    def remove(self, tutor_id: str) -> None:
+        self._bitmaps.pop(tutor_id, None)
+
+    def free_tutors(self, start: datetime, end: datetime, min_duration: timedelta,
+                    tutor_ids: Optional[Iterable[str]] = None) -> Set[str]:
+        """
+        Tutors free for at least ``min_duration`` without a break within ``[start, end)``.
+
+        When the window is shorter than ``min_duration`` the whole window has to be free. Free time is checked
+        in whole slots, a tutor is never matched for a free time shorter than asked for.
+
+        Args:
+            start (datetime): Start of the window, clipped to the bitmaps.
+            end (datetime): End of the window, clipped to the bitmaps.
+            min_duration (timedelta): Shortest usable free time.
+            tutor_ids (Optional[Iterable[str]]): Only check these tutors (default all of them).
+
+        Returns:
+            Set[str]: Ids of the free tutors.
+        """
+        if end - start >= min_duration:
+            # Slots inside the window
+            first, last = self._slot(start, math.ceil), self._slot(end, math.floor)
+            run = max(math.ceil(min_duration / SLOT), 1)
+        else:
+            # Every slot touched by the window
+            first, last = self._slot(start, math.floor), self._slot(end, math.ceil)
+            run = last - first
+
+        first, last = max(first, 0), min(last, self.slots)
+        if run > last - first or first >= last:
+            return set()
+
+        mask = ((1 << (last - first)) - 1) << first
+        bitmaps = self._bitmaps if tutor_ids is None else {
+            tutor_id: self._bitmaps[tutor_id] for tutor_id in tutor_ids if tutor_id in self._bitmaps
+        }
+        return {tutor_id for tutor_id, bitmap in bitmaps.items() if has_run(bitmap & mask, run)}
+
+    def _slot(self, moment: datetime, rounding) -> int:
+        return rounding((moment - self.origin) / SLOT)
+
+
+def has_run(bits: int, length: int) -> bool:
+    """
+    Whether ``bits`` has ``length`` consecutive set bits.
+
+    After each step bit ``i`` stays set only if the ``covered`` bits from ``i`` up are all set,
+    doubling ``covered`` each time, so it takes ``log2(length)`` shifts.
+    """
+    covered = 1
+    while covered < length and bits:
+        step = min(covered, length - covered)
+        bits &= bits >> step
+        covered += step
+    return bits != 0
@@ -0,0 +1,104 @@
+import itertools
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from core.cache import TTLCache
+
+# Writes going through the services invalidate the affected tutor, the ttl only bounds staleness
+# for changes made outside of the API (e.g. directly in the database)
+FREE_SLOT_CACHE_SIZE = int(os.getenv("FREE_SLOT_CACHE_SIZE", "20000"))
+FREE_SLOT_CACHE_TTL = float(os.getenv("FREE_SLOT_CACHE_TTL", "600"))
+
+
+class FreeSlotCache:
+    """
+    Free blocks of every tutor precomputed per calendar month (UTC).
+
+    Blocks of a month are stored unfiltered (no minimum duration), so months can be joined and clipped
+    to any requested range.
+
+    Every invalidation gets a new version from a counter. Versions are forgotten once they are older than
+    the ttl; tutors without a version get the highest version forgotten, so the version of a tutor never
+    goes back.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.ttl = ttl
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+        self._counter = itertools.count(1)
+        # Version and time of the last invalidation of the tutors, oldest first
+        self._versions: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._forgotten = 0
+        self._last = 0
+
+    def get(self, tutor_id: str, month: datetime) -> Optional[List[Tuple[datetime, datetime]]]:
+        return self._cache.get((tutor_id, month))
+
+    def version(self, tutor_id: str) -> int:
+        entry = self._versions.get(tutor_id)
+        return entry[0] if entry else self._forgotten
+
+    @property
+    def last_version(self) -> int:
+        """Version of the last invalidation, pass it to ``changed_since`` later."""
+        return self._last
+
+    def set(self, tutor_id: str, month: datetime, blocks: List[Tuple[datetime, datetime]], version: int) -> None:
+        """Store blocks computed from data read at ``version``, unless the tutor was invalidated in the meantime."""
+        if version == self.version(tutor_id):
+            self._cache.set((tutor_id, month), blocks)
+
+    def changed_since(self, version: int) -> Optional[List[str]]:
+        """
+        Tutors invalidated after ``last_version`` was ``version``, None when that is not known anymore
+        (the versions were forgotten).
+        """
+        if version < self._forgotten:
+            return None
+
+        changed = []
+        for tutor_id, (tutor_version, _) in reversed(self._versions.items()):
+            if tutor_version <= version:
+                break
+            changed.append(tutor_id)
+        return changed
+
+    def invalidate(self, tutor_id: str) -> None:
+        self._last = next(self._counter)
+        self._versions[tutor_id] = (self._last, time.monotonic())
+        self._versions.move_to_end(tutor_id)
+        self._cache.invalidate_where(lambda key: key[0] == tutor_id)
+        self._forget_old_versions()
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    def _forget_old_versions(self) -> None:
+        # Blocks read before an invalidation this old have expired from the cache anyway
+        expired = time.monotonic() - self.ttl
+        while self._versions:
+            tutor_id, (version, invalidated_at) = next(iter(self._versions.items()))
+            if invalidated_at > expired:
+                break
+            del self._versions[tutor_id]
+            self._forgotten = version
+
+
+free_slot_cache = FreeSlotCache(max_size=FREE_SLOT_CACHE_SIZE, ttl=FREE_SLOT_CACHE_TTL)
+
+
+# Called with the tutor id after every invalidation made by this worker (e.g. to tell the other workers)
+invalidation_listeners: List[Callable[[str], None]] = []
+
+
+def invalidate_tutor_free_slots(tutor_id: str) -> None:
+    tutor_id = str(tutor_id)
+    free_slot_cache.invalidate(tutor_id)
+    for listener in invalidation_listeners:
+        listener(tutor_id)
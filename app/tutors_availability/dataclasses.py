@@ -1,7 +1,9 @@
 from datetime import datetime, timezone
-from pydantic import BaseModel, field_serializer
+from pydantic import BaseModel, Field, field_serializer
 from typing import Optional
 
+MAX_BATCH_TUTORS = 50
+
 
 class AvailableTimeBlock(BaseModel):
     start_date: datetime
@@ -21,3 +23,16 @@ class TutorAvailabilityResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BatchTutorAvailabilityRequest(BaseModel):
+    tutor_ids: list[str] = Field(..., min_length=1, max_length=MAX_BATCH_TUTORS)
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+
+class BatchTutorAvailabilityResponse(BaseModel):
+    tutors: dict[str, TutorAvailabilityResponse]
+
+    class Config:
+        from_attributes = True
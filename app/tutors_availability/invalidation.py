@@ -0,0 +1,66 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Optional
+
+from chat_logic.pubsub import PubSubBackend, create_backend
+from .cache import free_slot_cache, invalidation_listeners
+
+logger = logging.getLogger(__name__)
+
+FREE_SLOT_INVALIDATION_CHANNEL = "free_slot_invalidations"
+
+
+class FreeSlotInvalidations:
+    """
+    Tells the other workers about free slot invalidations, on a pub/sub channel of their own.
+
+    Bookings and availabilities written through one worker change the cached free slots (and the
+    availability index) of every worker right away, not only after their ttl or the next index rebuild.
+    """
+
+    def __init__(self, backend: Optional[PubSubBackend] = None):
+        self.backend = backend or create_backend(FREE_SLOT_INVALIDATION_CHANNEL)
+        # Invalidations published by this worker are already applied
+        self._origin = uuid.uuid4().hex
+        self._publishing: set[asyncio.Task] = set()
+        self._started = False
+
+    async def start(self) -> None:
+        if self._started:
+            return
+
+        await self.backend.start(self._received)
+        invalidation_listeners.append(self._publish)
+        self._started = True
+
+    async def stop(self) -> None:
+        if not self._started:
+            return
+
+        invalidation_listeners.remove(self._publish)
+        if self._publishing:
+            await asyncio.gather(*self._publishing, return_exceptions=True)
+        await self.backend.stop()
+        self._started = False
+
+    def _publish(self, tutor_id: str) -> None:
+        task = asyncio.create_task(self._send(tutor_id))
+        self._publishing.add(task)
+        task.add_done_callback(self._publishing.discard)
+
+    async def _send(self, tutor_id: str) -> None:
+        try:
+            await self.backend.publish(json.dumps({"origin": self._origin, "tutor_id": tutor_id}))
+        except Exception as e:
+            # Other workers see the change after the ttl of their cache or the next index rebuild
+            logger.error(f"Failed to publish the invalidation of tutor {tutor_id}: {str(e)}")
+
+    async def _received(self, message: str) -> None:
+        invalidation = json.loads(message)
+        if invalidation["origin"] != self._origin:
+            free_slot_cache.invalidate(invalidation["tutor_id"])
+
+
+free_slot_invalidations = FreeSlotInvalidations()
@@ -2,7 +2,7 @@ from datetime import datetime, timezone
 from fastapi import APIRouter, Path
 from typing import Optional
 
-from .dataclasses import TutorAvailabilityResponse
+from .dataclasses import TutorAvailabilityResponse, BatchTutorAvailabilityRequest, BatchTutorAvailabilityResponse
 from .service import TutorsAvailabilityService
 from .utils import get_end_of_month
 
@@ -30,3 +30,20 @@ async def get_tutor_available_hours(
     start_date = start_date or datetime.now(timezone.utc)
     end_date = end_date or get_end_of_month(start_date)
     return await tutors_availability_service.get_tutor_available_hours(tutor_id, start_date, end_date)
+
+
+@tutors_availability_router.post("/tutors/available-hours", response_model=BatchTutorAvailabilityResponse)
+async def get_tutors_available_hours(request: BatchTutorAvailabilityRequest):
+    """
+    Retrieve the available hours of several tutors (e.g. a page of search results) within a given date range.
+
+    Args:
+        request (BatchTutorAvailabilityRequest): UUIDs of the tutors and an optional date range, defaulting the same
+            way as for a single tutor.
+
+    Returns:
+        BatchTutorAvailabilityResponse: Available hours of every requested tutor, keyed by tutor UUID.
+    """
+    start_date = request.start_date or datetime.now(timezone.utc)
+    end_date = request.end_date or get_end_of_month(start_date)
+    return await tutors_availability_service.get_tutors_available_hours(request.tutor_ids, start_date, end_date)
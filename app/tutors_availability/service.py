@@ -1,121 +1,246 @@
+import asyncio
 import logging
+from anyio import to_thread
+from collections import defaultdict
+from itertools import chain
 from core.db_connection import supabase
-from datetime import datetime, timedelta, timezone
-from typing import List, Tuple
+from core.db_executor import execute, query_budget
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from typing import Dict, List, Tuple
 
-from .dataclasses import AvailableTimeBlock, TutorAvailabilityResponse
-from .utils import subtract_time_blocks, standardize_datetime, generate_occurrences, merge_overlapping_blocks, \
-    parse_datetime, generate_availability_blocks
+from .dataclasses import AvailableTimeBlock, TutorAvailabilityResponse, BatchTutorAvailabilityResponse
+from .cache import free_slot_cache
+from .utils import standardize_datetime, merge_overlapping_blocks, parse_datetime, iter_availability_blocks, \
+    iter_free_blocks, clip_blocks, get_month_starts, get_next_month
 
 logger = logging.getLogger(__name__)
 
 
 class TutorsAvailabilityService:
     MIN_BLOCK_DURATION_MINUTES = 45
+    # Existence check, two availability queries, unavailabilities and bookings - for any number of tutors
+    QUERY_BUDGET = 5
 
     async def get_tutor_available_hours(self, tutor_id: str, start_date: datetime,
                                         end_date: datetime) -> TutorAvailabilityResponse:
         try:
-            if start_date > end_date:
-                raise ValueError("start_date must be before end_date")
-
-            tutor_exists = supabase.table("tutor_profiles").select("id").eq("id", tutor_id).execute()
-            if not tutor_exists.data:
-                raise ValueError(f"Tutor with id {tutor_id} does not exist")
-
+            # Before comparing them, a date without a timezone can't be compared with one with a timezone
             start_date = standardize_datetime(start_date)
             end_date = standardize_datetime(end_date)
 
-            availabilities = await self._get_tutor_availabilities(tutor_id)
-            unavailabilities = await self._get_tutor_unavailabilities(tutor_id, start_date, end_date)
-            bookings = await self._get_tutor_confirmed_bookings(tutor_id, start_date, end_date)
-
-            availability_blocks = await generate_availability_blocks(availabilities, start_date, end_date)
-
-            unavailability_blocks = []
-            for u in unavailabilities:
-                start = parse_datetime(u["start_time"])
-                end = parse_datetime(u["end_time"])
-                unavailability_blocks.append((start, end))
-
-            booking_blocks = [(b["start_date"], b["end_date"]) for b in bookings]
-
-            available_blocks = subtract_time_blocks(availability_blocks, unavailability_blocks)
-            final_blocks = subtract_time_blocks(available_blocks, booking_blocks)
-            merged_blocks = merge_overlapping_blocks(final_blocks)
+            if start_date > end_date:
+                raise ValueError("start_date must be before end_date")
 
-            min_duration = timedelta(minutes=self.MIN_BLOCK_DURATION_MINUTES)
-            filtered_blocks = [
-                (start, end) for start, end in merged_blocks
-                if (end - start) >= min_duration
-            ]
+            with query_budget(f"available hours of tutor {tutor_id}", self.QUERY_BUDGET):
+                free_blocks = (await self._get_free_blocks([tutor_id], start_date, end_date)).get(tutor_id)
 
-            deduplicated_blocks = []
-            seen = set()
-            for start, end in filtered_blocks:
-                key = (start.date(), start.time(), end.time())
-                if key not in seen:
-                    seen.add(key)
-                    deduplicated_blocks.append(AvailableTimeBlock(start_date=start, end_date=end))
+            if free_blocks is None:
+                raise ValueError(f"Tutor with id {tutor_id} does not exist")
 
-            deduplicated_blocks.sort(key=lambda x: x.start_date)
+            available_blocks = [AvailableTimeBlock(start_date=start, end_date=end) for start, end in free_blocks]
 
-            return TutorAvailabilityResponse(available_blocks=deduplicated_blocks)
+            return TutorAvailabilityResponse(available_blocks=available_blocks)
         except ValueError as e:
             logger.error(f"Invalid date range for tutor {tutor_id}: {str(e)}")
             return TutorAvailabilityResponse(available_blocks=[], message=str(e))
         except Exception as e:
+            # Not empty blocks, the tutor would look fully booked
             logger.error(f"Unexpected error while fetching available hours for tutor {tutor_id}: {str(e)}")
-            return TutorAvailabilityResponse(available_blocks=[])
-
-    async def _get_tutor_availabilities(self, tutor_id: str):
-        try:
-            recurring = supabase.table("availabilities").select("*").eq("tutor_id", tutor_id).not_.is_(
-                "recurrence_rule", "null").not_.eq("recurrence_rule", "").execute()
-            current_time = datetime.now(timezone.utc).isoformat()
-            nonrecurring = supabase.table("availabilities").select("*").eq("tutor_id", tutor_id).or_(
-                f"recurrence_rule.is.null,recurrence_rule.eq.").gte("end_time", current_time).execute()
-            availabilities = recurring.data + nonrecurring.data
-            return [
-                a for a in availabilities
-                if a.get("start_time") and a.get("end_time")
-            ]
-        except Exception as e:
-            logger.error(f"Failed to fetch availabilities for tutor {tutor_id}: {str(e)}")
-            return []
+            raise HTTPException(503, "Available hours could not be fetched")
+
+    async def get_tutors_available_hours(self, tutor_ids: List[str], start_date: datetime,
+                                         end_date: datetime) -> BatchTutorAvailabilityResponse:
+        """
+        Retrieve the available hours of many tutors at once.
+
+        Every table is queried once for all tutors (``in.(...)`` filters), then the free blocks of each tutor are
+        computed from the grouped rows.
+        """
+        tutor_ids = list(dict.fromkeys(tutor_ids))
+        # Before comparing them, a date without a timezone can't be compared with one with a timezone
+        start_date = standardize_datetime(start_date)
+        end_date = standardize_datetime(end_date)
+
+        if start_date > end_date:
+            message = "start_date must be before end_date"
+            return BatchTutorAvailabilityResponse(tutors={
+                tutor_id: TutorAvailabilityResponse(available_blocks=[], message=message) for tutor_id in tutor_ids
+            })
 
-    async def _get_tutor_unavailabilities(self, tutor_id: str, start_date: datetime, end_date: datetime):
         try:
-            unavailabilities = supabase.table("unavailabilities").select("*").eq("tutor_id", tutor_id).gte("start_time",
-                                                                                                           start_date.isoformat()).lte(
-                "end_time", end_date.isoformat()).execute()
-            return [
-                u for u in unavailabilities.data
-                if u.get("start_time") and u.get("end_time")
-            ]
+            with query_budget(f"available hours of {len(tutor_ids)} tutors", self.QUERY_BUDGET):
+                free_blocks = await self._get_free_blocks(tutor_ids, start_date, end_date)
         except Exception as e:
-            logger.error(f"Failed to fetch unavailabilities for tutor {tutor_id}: {str(e)}")
-            return []
-
-    async def _get_tutor_confirmed_bookings(self, tutor_id: str, start_date: datetime, end_date: datetime):
-        try:
-            bookings = supabase.table("bookings").select("*, offers!inner(tutor_id)").eq("status", "accepted").eq(
-                "offers.tutor_id", tutor_id).gte("start_date", start_date.isoformat()).lte("end_date",
-                                                                                           end_date.isoformat()).execute()
-            filtered_bookings = []
-            for booking in bookings.data:
-                if not (booking.get("start_date") and booking.get("end_date")):
+            # One query serves every tutor of the batch, none of them can be answered
+            logger.error(f"Unexpected error while fetching available hours for tutors {tutor_ids}: {str(e)}")
+            raise HTTPException(503, "Available hours could not be fetched")
+
+        responses = {}
+        for tutor_id in tutor_ids:
+            if tutor_id in free_blocks:
+                responses[tutor_id] = TutorAvailabilityResponse(available_blocks=[
+                    AvailableTimeBlock(start_date=start, end_date=end) for start, end in free_blocks[tutor_id]
+                ])
+            else:
+                responses[tutor_id] = TutorAvailabilityResponse(
+                    available_blocks=[], message=f"Tutor with id {tutor_id} does not exist")
+
+        return BatchTutorAvailabilityResponse(tutors=responses)
+
+    async def get_free_blocks(self, tutor_ids: List[str], start_date: datetime,
+                              end_date: datetime) -> Dict[str, List[Tuple[datetime, datetime]]]:
+        """
+        Free blocks (at least ``MIN_BLOCK_DURATION_MINUTES`` long) of every existing tutor within the range,
+        keyed by tutor id. Tutors that don't exist are left out.
+        """
+        return await self._get_free_blocks(list(dict.fromkeys(tutor_ids)), standardize_datetime(start_date),
+                                           standardize_datetime(end_date))
+
+    async def _get_free_blocks(self, tutor_ids: List[str], start_date: datetime,
+                               end_date: datetime) -> Dict[str, List[Tuple[datetime, datetime]]]:
+        """
+        Free blocks of every existing tutor within the range, keyed by tutor id.
+
+        Blocks are served per calendar month from ``free_slot_cache``. Months missing from the cache are computed
+        for all tutors at once, with one query per table over the smallest range covering them.
+        """
+        months = get_month_starts(start_date, end_date)
+        month_blocks = {
+            tutor_id: [free_slot_cache.get(tutor_id, month) for month in months] for tutor_id in tutor_ids
+        }
+
+        missing_ids = [tutor_id for tutor_id, blocks in month_blocks.items() if None in blocks]
+        if missing_ids:
+            computed = await self._compute_missing_months(missing_ids, months, month_blocks)
+
+            for tutor_id in missing_ids:
+                if tutor_id not in computed:
+                    del month_blocks[tutor_id]
                     continue
-                start = parse_datetime(booking.get("start_date"))
-                end = parse_datetime(booking.get("end_date"))
-                filtered_bookings.append({
-                    "id": booking.get("id"),
-                    "start_date": start,
-                    "end_date": end,
-                    "offer_id": booking.get("offer_id"),
-                    "status": booking.get("status")
-                })
-            return filtered_bookings
-        except Exception as e:
-            logger.error(f"Failed to fetch bookings for tutor {tutor_id}: {str(e)}")
-            return []
+
+                month_blocks[tutor_id] = [
+                    computed[tutor_id].get(month, blocks) for month, blocks in zip(months, month_blocks[tutor_id])
+                ]
+
+        min_duration = timedelta(minutes=self.MIN_BLOCK_DURATION_MINUTES)
+        return {
+            tutor_id: clip_blocks(chain.from_iterable(blocks), start_date, end_date, min_duration)
+            for tutor_id, blocks in month_blocks.items()
+        }
+
+    async def _compute_missing_months(self, tutor_ids: List[str], months: List[datetime],
+                                      month_blocks: Dict[str, list]) -> Dict[str, Dict[datetime, list]]:
+        """Compute and cache the months missing for each tutor. Tutors that don't exist are left out."""
+        missing_months = {
+            tutor_id: [month for month, blocks in zip(months, month_blocks[tutor_id]) if blocks is None]
+            for tutor_id in tutor_ids
+        }
+        fetch_start = min(tutor_months[0] for tutor_months in missing_months.values())
+        fetch_end = get_next_month(max(tutor_months[-1] for tutor_months in missing_months.values()))
+
+        # Taken before reading, so blocks computed from rows changed in the meantime are not cached
+        versions = {tutor_id: free_slot_cache.version(tutor_id) for tutor_id in tutor_ids}
+
+        # The queries don't depend on each other, so they are sent together and only the slowest one is waited for
+        tutors, availabilities, unavailabilities, bookings = await asyncio.gather(
+            execute(supabase.table("tutor_profiles").select("id").in_("id", tutor_ids)),
+            self._get_availabilities(tutor_ids, fetch_start, fetch_end),
+            self._get_unavailabilities(tutor_ids, fetch_start, fetch_end),
+            self._get_confirmed_bookings(tutor_ids, fetch_start, fetch_end)
+        )
+
+        existing_ids = {tutor["id"] for tutor in tutors.data}
+        missing_months = {
+            tutor_id: tutor_months for tutor_id, tutor_months in missing_months.items() if tutor_id in existing_ids
+        }
+        availabilities = _group_by_tutor(availabilities)
+        unavailabilities = _group_by_tutor(unavailabilities)
+        bookings = _group_by_tutor(bookings)
+
+        def compute():
+            return {
+                tutor_id: {
+                    month: self._compute_available_blocks(
+                        availabilities.get(tutor_id, []),
+                        unavailabilities.get(tutor_id, []),
+                        bookings.get(tutor_id, []),
+                        month,
+                        get_next_month(month)
+                    )
+                    for month in tutor_months
+                }
+                for tutor_id, tutor_months in missing_months.items()
+            }
+
+        # Sweeping is CPU bound, run the whole batch in a worker thread so the event loop stays free
+        computed = await to_thread.run_sync(compute)
+
+        for tutor_id, computed_months in computed.items():
+            for month, blocks in computed_months.items():
+                free_slot_cache.set(tutor_id, month, blocks, versions[tutor_id])
+
+        return computed
+
+    def _compute_available_blocks(self, availabilities, unavailabilities, bookings, start_date: datetime,
+                                  end_date: datetime) -> List[Tuple[datetime, datetime]]:
+        availability_blocks = iter_availability_blocks(availabilities, start_date, end_date)
+
+        unavailability_blocks = []
+        for u in unavailabilities:
+            start = parse_datetime(u["start_time"])
+            end = parse_datetime(u["end_time"])
+            unavailability_blocks.append((start, end))
+
+        booking_blocks = [(b["start_date"], b["end_date"]) for b in bookings]
+
+        return list(iter_free_blocks(availability_blocks, sorted(unavailability_blocks + booking_blocks)))
+
+    async def _get_availabilities(self, tutor_ids: List[str], start_date: datetime, end_date: datetime):
+        # One-off availabilities are limited to the range, not to the current time: the computed months are cached
+        recurring, nonrecurring = await asyncio.gather(
+            execute(supabase.table("availabilities").select("*").in_("tutor_id", tutor_ids).not_.is_(
+                "recurrence_rule", "null").not_.eq("recurrence_rule", "")),
+            execute(supabase.table("availabilities").select("*").in_("tutor_id", tutor_ids).or_(
+                f"recurrence_rule.is.null,recurrence_rule.eq.").lt("start_time", end_date.isoformat()).gt(
+                "end_time", start_date.isoformat()))
+        )
+        availabilities = recurring.data + nonrecurring.data
+        return [
+            a for a in availabilities
+            if a.get("start_time") and a.get("end_time")
+        ]
+
+    async def _get_unavailabilities(self, tutor_ids: List[str], start_date: datetime, end_date: datetime):
+        unavailabilities = await execute(supabase.table("unavailabilities").select("*").in_("tutor_id", tutor_ids).lt(
+            "start_time", end_date.isoformat()).gt("end_time", start_date.isoformat()))
+        return [
+            u for u in unavailabilities.data
+            if u.get("start_time") and u.get("end_time")
+        ]
+
+    async def _get_confirmed_bookings(self, tutor_ids: List[str], start_date: datetime, end_date: datetime):
+        bookings = await execute(supabase.table("bookings").select("*, offers!inner(tutor_id)").eq("status", "accepted").in_(
+            "offers.tutor_id", tutor_ids).lt("start_date", end_date.isoformat()).gt("end_date", start_date.isoformat()))
+        filtered_bookings = []
+        for booking in bookings.data:
+            if not (booking.get("start_date") and booking.get("end_date")):
+                continue
+            start = parse_datetime(booking.get("start_date"))
+            end = parse_datetime(booking.get("end_date"))
+            filtered_bookings.append({
+                "id": booking.get("id"),
+                "tutor_id": (booking.get("offers") or {}).get("tutor_id"),
+                "start_date": start,
+                "end_date": end,
+                "offer_id": booking.get("offer_id"),
+                "status": booking.get("status")
+            })
+        return filtered_bookings
+
+
+def _group_by_tutor(rows: List[dict]) -> Dict[str, List[dict]]:
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row.get("tutor_id")].append(row)
+    return grouped
@@ -1,6 +1,12 @@
 import calendar
+import heapq
+import logging
 from datetime import datetime, timedelta, timezone, date
-from typing import List, Tuple
+from functools import lru_cache
+from operator import itemgetter
+from typing import Iterable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
 
 
 def standardize_datetime(dt: datetime) -> datetime:
@@ -29,87 +35,124 @@ def get_weekday_num(day_code: str) -> int:
     return days.get(day_code, 0)
 
 
-def generate_occurrences(start_date: datetime, end_date: datetime, recurrence_rule: str, query_start: datetime,
-                         query_end: datetime) -> List[Tuple[datetime, datetime]]:
-    start_date = standardize_datetime(start_date)
-    end_date = standardize_datetime(end_date)
-    query_start = standardize_datetime(query_start)
-    query_end = standardize_datetime(query_end)
-    result = []
+class CompiledRecurrence:
+    """
+    Recurrence of a single availability with its rule parsed once.
+
+    Occurrences are generated lazily and in chronological order, so callers can stop at the first block they need
+    and streams of several availabilities can be merged without materializing them.
+    """
+
+    def __init__(self, start_date: datetime, end_date: datetime, recurrence_rule: str):
+        self.start_date = standardize_datetime(start_date)
+        self.end_date = standardize_datetime(end_date)
+        self.duration = self.end_date - self.start_date
+        self.is_recurring = bool(recurrence_rule)
 
-    if not recurrence_rule:
-        if start_date <= query_end and end_date >= query_start:
-            result.append((start_date, end_date))
-        return result
+        rule_dict = parse_recurrence_rule(recurrence_rule)
+        self.freq = rule_dict.get('FREQ')
+        self.interval = rule_dict.get('INTERVAL', 1)
+        self.until = None
+        if 'UNTIL' in rule_dict and len(rule_dict['UNTIL']) >= 8:
+            year, month, day = map(int, [rule_dict['UNTIL'][0:4], rule_dict['UNTIL'][4:6], rule_dict['UNTIL'][6:8]])
+            self.until = datetime(year, month, day, 23, 59, 59, tzinfo=timezone.utc)
 
-    rule_dict = parse_recurrence_rule(recurrence_rule)
-    freq = rule_dict.get('FREQ')
-    interval = rule_dict.get('INTERVAL', 1)
-    until_date = query_end
+        self.weekdays = sorted(get_weekday_num(day) for day in rule_dict.get('BYDAY', [])) or [
+            self.start_date.weekday()]
+        self.month_days = set(rule_dict.get('BYMONTHDAY') or [])
+        self.months = set(rule_dict.get('BYMONTH') or [])
+        self._validate()
 
-    if 'UNTIL' in rule_dict and len(rule_dict['UNTIL']) >= 8:
-        year, month, day = map(int, [rule_dict['UNTIL'][0:4], rule_dict['UNTIL'][4:6], rule_dict['UNTIL'][6:8]])
-        until_date = min(until_date, datetime(year, month, day, 23, 59, 59, tzinfo=timezone.utc))
+    def _validate(self) -> None:
+        # Occurrences are generated lazily, a bad rule has to fail here and not in the middle of a sweep
+        if self.interval < 1:
+            raise ValueError(f"INTERVAL must be at least 1, got {self.interval}")
+        for name, values, lowest, highest in (('BYMONTHDAY', self.month_days, 1, 31), ('BYMONTH', self.months, 1, 12)):
+            for value in values:
+                if not value.isdigit() or not lowest <= int(value) <= highest:
+                    raise ValueError(f"Invalid {name} value: {value}")
 
-    duration = end_date - start_date
+    def occurrences(self, query_start: datetime, query_end: datetime) -> Iterator[Tuple[datetime, datetime]]:
+        query_start = standardize_datetime(query_start)
+        query_end = standardize_datetime(query_end)
 
-    if freq == 'DAILY':
-        current_date = start_date
+        if not self.is_recurring:
+            if self.start_date <= query_end and self.end_date >= query_start:
+                yield self.start_date, self.end_date
+            return
+
+        until_date = query_end if self.until is None else min(query_end, self.until)
+
+        if self.freq == 'DAILY':
+            yield from self._daily(query_start, until_date)
+        elif self.freq == 'WEEKLY':
+            yield from self._weekly(query_start, until_date)
+        elif self.freq == 'MONTHLY':
+            yield from self._monthly(query_start, until_date)
+
+    def _daily(self, query_start: datetime, until_date: datetime) -> Iterator[Tuple[datetime, datetime]]:
+        current_date = self.start_date
         if current_date < query_start:
-            days_to_add = ((query_start - current_date).days // interval) * interval
+            days_to_add = ((query_start - current_date).days // self.interval) * self.interval
             current_date += timedelta(days=days_to_add)
         while current_date <= until_date:
-            event_end = current_date + duration
+            event_end = current_date + self.duration
             if event_end >= query_start:
-                result.append((current_date, event_end))
-            current_date += timedelta(days=interval)
+                yield current_date, event_end
+            current_date += timedelta(days=self.interval)
 
-    elif freq == 'WEEKLY':
-        weekdays = [get_weekday_num(day) for day in rule_dict.get('BYDAY', [])] or [start_date.weekday()]
-        base_date = start_date
+    def _weekly(self, query_start: datetime, until_date: datetime) -> Iterator[Tuple[datetime, datetime]]:
+        base_date = self.start_date
         if base_date < query_start:
-            weeks_to_add = (((query_start - base_date).days // 7) // interval) * interval
+            weeks_to_add = (((query_start - base_date).days // 7) // self.interval) * self.interval
             base_date += timedelta(days=weeks_to_add * 7)
         current_week_start = base_date - timedelta(days=base_date.weekday())
         while current_week_start <= until_date:
-            for weekday in weekdays:
+            for weekday in self.weekdays:
                 current_date = current_week_start + timedelta(days=weekday)
                 current_date = current_date.replace(hour=base_date.hour, minute=base_date.minute,
                                                     second=base_date.second, microsecond=base_date.microsecond)
-                event_end = current_date + duration
+                event_end = current_date + self.duration
                 if event_end >= query_start:
-                    result.append((current_date, event_end))
-            current_week_start += timedelta(days=7 * interval)
+                    yield current_date, event_end
+            current_week_start += timedelta(days=7 * self.interval)
 
-    elif freq == 'MONTHLY':
-        current_date = start_date
+    def _monthly(self, query_start: datetime, until_date: datetime) -> Iterator[Tuple[datetime, datetime]]:
+        current_date = self.start_date
         if current_date < query_start:
             months_diff = (query_start.year - current_date.year) * 12 + query_start.month - current_date.month
-            months_to_add = (months_diff // interval) * interval
+            months_to_add = (months_diff // self.interval) * self.interval
             if months_to_add:
                 new_month = ((current_date.month - 1 + months_to_add) % 12) + 1
                 new_year = current_date.year + (current_date.month - 1 + months_to_add) // 12
-                max_day = 30 if new_month in [4, 6, 9, 11] else 29 if new_month == 2 and (new_year % 4 == 0 and (
-                        new_year % 100 != 0 or new_year % 400 == 0)) else 28 if new_month == 2 else 31
+                max_day = calendar.monthrange(new_year, new_month)[1]
                 current_date = current_date.replace(year=new_year, month=new_month, day=min(current_date.day, max_day))
         while current_date <= until_date:
-            if (not rule_dict.get('BYMONTHDAY') or str(current_date.day) in rule_dict['BYMONTHDAY']) and (
-                    not rule_dict.get('BYMONTH') or str(current_date.month) in rule_dict['BYMONTH']):
-                event_end = current_date + duration
+            if (not self.month_days or str(current_date.day) in self.month_days) and (
+                    not self.months or str(current_date.month) in self.months):
+                event_end = current_date + self.duration
                 if event_end >= query_start:
-                    result.append((current_date, event_end))
-            month = current_date.month - 1 + interval
+                    yield current_date, event_end
+            month = current_date.month - 1 + self.interval
             year = current_date.year + month // 12
             month = month % 12 + 1
-            max_day = 30 if month in [4, 6, 9, 11] else 29 if month == 2 and (
-                    year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)) else 28 if month == 2 else 31
-            day = min(current_date.day, max_day)
-            try:
-                current_date = current_date.replace(year=year, month=month, day=day)
-            except ValueError:
-                current_date = current_date.replace(year=year, month=month, day=max_day)
+            max_day = calendar.monthrange(year, month)[1]
+            current_date = current_date.replace(year=year, month=month, day=min(current_date.day, max_day))
+
+
+@lru_cache(maxsize=4096)
+def compile_recurrence(start_date: datetime, end_date: datetime, recurrence_rule: str) -> CompiledRecurrence:
+    return CompiledRecurrence(start_date, end_date, recurrence_rule)
 
-    return result
+
+def iter_occurrences(start_date: datetime, end_date: datetime, recurrence_rule: str, query_start: datetime,
+                     query_end: datetime) -> Iterator[Tuple[datetime, datetime]]:
+    return compile_recurrence(start_date, end_date, recurrence_rule).occurrences(query_start, query_end)
+
+
+def generate_occurrences(start_date: datetime, end_date: datetime, recurrence_rule: str, query_start: datetime,
+                         query_end: datetime) -> List[Tuple[datetime, datetime]]:
+    return list(iter_occurrences(start_date, end_date, recurrence_rule, query_start, query_end))
 
 
 def subtract_time_blocks(base_blocks: List[Tuple[datetime, datetime]],
@@ -149,38 +192,145 @@ def merge_overlapping_blocks(blocks: List[Tuple[datetime, datetime]]) -> List[Tu
     return result
 
 
+def iter_free_blocks(availability_blocks: Iterable[Tuple[datetime, datetime]],
+                     blocked_blocks: Iterable[Tuple[datetime, datetime]],
+                     min_duration: timedelta = timedelta(0)) -> Iterator[Tuple[datetime, datetime]]:
+    """
+    Subtract blocked time from available time in a single sweep over interval boundaries.
+
+    Both inputs must be sorted by start (they may overlap). Only the ends of currently open intervals are kept
+    in memory, so the inputs can be lazy streams and the caller can stop after the first free block.
+    Yielded blocks are sorted, disjoint and maximal (touching free time is joined).
+
+    Args:
+        availability_blocks: Intervals when the tutor is available, sorted by start.
+        blocked_blocks: Intervals to remove (unavailabilities, bookings), sorted by start.
+        min_duration: Free blocks shorter than this are skipped.
+
+    Returns:
+        Iterator[Tuple[datetime, datetime]]: Free blocks ordered by start.
+    """
+    starts = heapq.merge(
+        ((start, end, 1, 0) for start, end in availability_blocks if start < end),
+        ((start, end, 0, 1) for start, end in blocked_blocks if start < end),
+        key=itemgetter(0)
+    )
+    ends = []
+
+    open_count = 0
+    blocked_count = 0
+    free_start = None
+    next_start = next(starts, None)
+    while next_start is not None or ends:
+        if next_start is None:
+            current = ends[0][0]
+        elif not ends:
+            current = next_start[0]
+        else:
+            current = min(next_start[0], ends[0][0])
+
+        # Apply every boundary at this instant before looking at the state, so touching intervals
+        # don't produce zero length gaps
+        while ends and ends[0][0] == current:
+            _, open_delta, blocked_delta = heapq.heappop(ends)
+            open_count -= open_delta
+            blocked_count -= blocked_delta
+        while next_start is not None and next_start[0] == current:
+            _, end, open_delta, blocked_delta = next_start
+            open_count += open_delta
+            blocked_count += blocked_delta
+            heapq.heappush(ends, (end, open_delta, blocked_delta))
+            next_start = next(starts, None)
+
+        is_free = open_count > 0 and blocked_count == 0
+        if is_free and free_start is None:
+            free_start = current
+        elif not is_free and free_start is not None:
+            if current - free_start >= min_duration:
+                yield free_start, current
+            free_start = None
+
+
+def sweep_free_blocks(availability_blocks: Iterable[Tuple[datetime, datetime]],
+                      blocked_blocks: Iterable[Tuple[datetime, datetime]],
+                      min_duration: timedelta = timedelta(0)) -> List[Tuple[datetime, datetime]]:
+    """
+    Subtract blocked time from available time in O((n + m) log(n + m)).
+
+    Equivalent to ``subtract_time_blocks`` followed by ``merge_overlapping_blocks`` and a minimum duration
+    filter, for inputs in any order. Returned blocks are disjoint, so no two of them can share a start.
+    """
+    return list(iter_free_blocks(sorted(availability_blocks), sorted(blocked_blocks), min_duration))
+
+
 def parse_datetime(dt: str | datetime) -> datetime:
     if isinstance(dt, str):
         return datetime.fromisoformat(dt.replace('Z', '+00:00'))
     return standardize_datetime(dt)
 
 
-async def generate_availability_blocks(availabilities, start_date: datetime, end_date: datetime) -> List[
+def iter_availability_blocks(availabilities, start_date: datetime, end_date: datetime) -> Iterator[
     Tuple[datetime, datetime]]:
-    blocks = []
+    """Lazily yield the occurrences of all availabilities clipped to the date range, ordered by start."""
+    streams = []
     for availability in availabilities:
         if "start_time" not in availability or "end_time" not in availability:
             continue
         try:
-            avail_start = parse_datetime(availability["start_time"])
-            avail_end = parse_datetime(availability["end_time"])
-            recurrence_rule = availability.get("recurrence_rule", "")
-
-            occurrences = generate_occurrences(
-                start_date=avail_start,
-                end_date=avail_end,
-                recurrence_rule=recurrence_rule,
-                query_start=start_date,
-                query_end=end_date
+            recurrence = compile_recurrence(
+                parse_datetime(availability["start_time"]),
+                parse_datetime(availability["end_time"]),
+                availability.get("recurrence_rule", "")
             )
-
-            for block_start, block_end in occurrences:
-                if block_start <= end_date and block_end >= start_date:
-                    blocks.append((max(block_start, start_date), min(block_end, end_date)))
         except Exception as e:
-            print(f"Failed to generate availability blocks: {str(e)}")
+            logger.error(f"Failed to generate availability blocks of availability {availability.get('id')}: {str(e)}")
             continue
-    return merge_overlapping_blocks(blocks)
+        streams.append(_clip_blocks(recurrence.occurrences(start_date, end_date), start_date, end_date))
+    return heapq.merge(*streams, key=itemgetter(0))
+
+
+def _clip_blocks(blocks: Iterable[Tuple[datetime, datetime]], start_date: datetime, end_date: datetime) -> Iterator[
+    Tuple[datetime, datetime]]:
+    for block_start, block_end in blocks:
+        if block_start <= end_date and block_end >= start_date:
+            yield max(block_start, start_date), min(block_end, end_date)
+
+
+async def generate_availability_blocks(availabilities, start_date: datetime, end_date: datetime) -> List[
+    Tuple[datetime, datetime]]:
+    return merge_overlapping_blocks(list(iter_availability_blocks(availabilities, start_date, end_date)))
+
+
+def get_start_of_month(dt: datetime) -> datetime:
+    dt = standardize_datetime(dt)
+    return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+
+
+def get_next_month(dt: datetime) -> datetime:
+    month_start = get_start_of_month(dt)
+    if month_start.month == 12:
+        return month_start.replace(year=month_start.year + 1, month=1)
+    return month_start.replace(month=month_start.month + 1)
+
+
+def get_month_starts(start_date: datetime, end_date: datetime) -> List[datetime]:
+    """First instants of every calendar month overlapping ``[start_date, end_date]``."""
+    months = [get_start_of_month(start_date)]
+    while get_next_month(months[-1]) < end_date:
+        months.append(get_next_month(months[-1]))
+    return months
+
+
+def clip_blocks(blocks: Iterable[Tuple[datetime, datetime]], start_date: datetime, end_date: datetime,
+                min_duration: timedelta = timedelta(0)) -> List[Tuple[datetime, datetime]]:
+    """Join touching blocks (e.g. split at a month boundary), cut them to the range and drop too short ones."""
+    result = []
+    for block_start, block_end in merge_overlapping_blocks(list(blocks)):
+        block_start = max(block_start, start_date)
+        block_end = min(block_end, end_date)
+        if block_start < block_end and block_end - block_start >= min_duration:
+            result.append((block_start, block_end))
+    return result
 
 
 def get_end_of_month(start_date: datetime) -> datetime:
@@ -1,4 +1,5 @@
 from crud.crud_provider import CRUDProvider
+from tutors_availability.cache import invalidate_tutor_free_slots
 
 from .dataclasses import Unavailability, BaseUnavailability
 
@@ -21,6 +22,7 @@ class UnavailabilitiesService:
         unavailability['tutor_id'] = user_id
 
         new_unavailability = await crud_provider.create(unavailability)
+        invalidate_tutor_free_slots(user_id)
 
         return Unavailability.model_validate(new_unavailability)
 
@@ -67,6 +69,7 @@ class UnavailabilitiesService:
         updated_unavailability = await crud_provider.update(
             unavailability.model_dump(mode='json'), None, user_id
         )
+        invalidate_tutor_free_slots(user_id)
 
         return Unavailability.model_validate(updated_unavailability)
 
@@ -82,5 +85,6 @@ class UnavailabilitiesService:
             Unavailability: The deleted unavailability record.
         """
         deleted_unavailability = await crud_provider.delete(id, user_id)
+        invalidate_tutor_free_slots(user_id)
 
         return Unavailability.model_validate(deleted_unavailability)
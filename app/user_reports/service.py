@@ -1,4 +1,5 @@
 from core.db_connection import supabase
+from core.db_executor import execute
 from crud.crud_provider import CRUDProvider
 from fastapi import HTTPException
 from profiles.service import crud_provider as profiles_crud_provider
@@ -18,10 +19,9 @@ class UserReportsService:
             "message": report.message
         }
 
-        result = (
+        result = await execute(
             supabase.table("user_reports")
             .insert(report_data)
-            .execute()
         )
 
         if not result.data:
@@ -1,14 +1,37 @@
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+
+import jwt
+from core.cache import TTLCache
 from core.db_connection import supabase
+from core.db_executor import run_sync
 from fastapi import HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer, HTTPBearer
-from gotrue.types import UserResponse
+from gotrue.types import User, UserResponse
 from profiles.dataclasses import Profile
-from profiles.utils import get_profile_data
+from profiles.utils import get_cached_profile_data
 from typing import Annotated
 
 # oauth2_scheme = OAuth2PasswordBearer(tokenUrl='token')
 oauth2_scheme = HTTPBearer()
 
+# Legacy (HS256) JWT secret of the supabase project - Settings > API > JWT Secret.
+# Without it tokens signed with asymmetric keys are still verified locally against the cached JWKS,
+# HS256 tokens fall back to a remote get_user call.
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+JWT_AUDIENCE = "authenticated"
+
+# Verified tokens are reused for at most TOKEN_CACHE_TTL seconds and never past their expiry
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+token_cache = TTLCache(max_size=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+# Signed out tokens stay valid JWTs until they expire, so they are remembered until then
+revoked_tokens = TTLCache(max_size=TOKEN_CACHE_SIZE, ttl=24 * 60 * 60)
+
 
 async def authenticate_user(auth_header: Annotated[str, Depends(oauth2_scheme)]) -> UserResponse:
     # return access_token
@@ -19,7 +42,7 @@ async def authenticate_profile(auth_header: Annotated[str, Depends(oauth2_scheme
     try:
         access_token = auth_header.credentials
         user_data = await _authenticate_user(access_token)
-        profile = await get_profile_data(user_data.user.id)
+        profile = await get_cached_profile_data(user_data.user.id)
 
         if not profile:
             raise Exception
@@ -35,9 +58,76 @@ async def authenticate_sign_out(auth_header: Annotated[str, Depends(oauth2_schem
     return access_token
 
 
-async def _authenticate_user(access_token: str) -> UserResponse:
+def invalidate_token(access_token: str) -> None:
+    """Drop a token from the cache and reject it until it expires (called on sign out)."""
+    key = _token_key(access_token)
+    token_cache.invalidate(key)
+
     try:
-        user_data = supabase.auth.get_user(access_token)
+        exp = jwt.decode(access_token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        return
+
+    if exp:
+        revoked_tokens.set(key, True, ttl=exp - time.time())
+
+
+async def _authenticate_user(access_token: str) -> UserResponse:
+    key = _token_key(access_token)
+
+    user_data = token_cache.get(key)
+    if user_data is not None:
         return user_data
+
+    if key in revoked_tokens:
+        raise HTTPException(status_code=401, detail='User unauthorized')
+
+    try:
+        user_data, exp = await _verify_token(access_token)
     except:
         raise HTTPException(status_code=401, detail='User unauthorized')
+
+    token_cache.set(key, user_data, ttl=exp - time.time())
+    return user_data
+
+
+async def _verify_token(access_token: str) -> tuple[UserResponse, float]:
+    header = jwt.get_unverified_header(access_token)
+
+    if header.get("alg") == "HS256" and SUPABASE_JWT_SECRET:
+        claims = jwt.decode(access_token, SUPABASE_JWT_SECRET, algorithms=["HS256"], audience=JWT_AUDIENCE)
+        return _user_from_claims(claims), claims["exp"]
+
+    if header.get("alg") != "HS256" and "kid" in header:
+        # Signature is checked against the project's JWKS, which gotrue fetches once and caches
+        claims = (await run_sync(supabase.auth.get_claims, access_token)).claims
+        return _user_from_claims(claims), claims["exp"]
+
+    user_data = await run_sync(supabase.auth.get_user, access_token)
+    exp = jwt.decode(access_token, options={"verify_signature": False})["exp"]
+    return user_data, exp
+
+
+def _user_from_claims(claims: dict) -> UserResponse:
+    aud = claims.get("aud")
+    if isinstance(aud, list):
+        aud = aud[0] if aud else ""
+
+    return UserResponse(
+        user=User(
+            id=claims["sub"],
+            aud=aud or "",
+            role=claims.get("role"),
+            email=claims.get("email"),
+            phone=claims.get("phone"),
+            app_metadata=claims.get("app_metadata") or {},
+            user_metadata=claims.get("user_metadata") or {},
+            is_anonymous=claims.get("is_anonymous", False),
+            # Access tokens don't carry the account creation date, the issue time is the closest we have
+            created_at=datetime.fromtimestamp(claims["iat"], tz=timezone.utc)
+        )
+    )
+
+
+def _token_key(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode()).hexdigest()
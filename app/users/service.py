@@ -1,9 +1,11 @@
 import os
-from core.db_connection import supabase, SUPABASE_KEY, SUPABASE_URL
+from core.db_connection import supabase, client_factory
+from core.db_executor import execute, run_sync
 from fastapi import HTTPException, Request
 from fastapi.responses import RedirectResponse
 from profiles.utils import get_profile_data
-from supabase import AuthApiError, create_client, Client
+from .auth import invalidate_token
+from supabase import AuthApiError, SupabaseAuthClient
 
 from .dataclasses import CodeForSessionResponse, TokensResponse, RefreshTokensRequest, SignInResponse, CallbackResponse, \
     CreateUserRequest, UserResponse, UpdateUserRequest, MyUserResponse, MyProfileResponse, MyTutorProfileResponse, \
@@ -14,6 +16,8 @@ class UsersService:
     async def sign_in(self, provider: str, redirect_to: str) -> SignInResponse:
         backend_url = os.getenv("BACKEND_URL")
         if provider in ['google', 'facebook']:
+            # Builds the redirect url locally and stores the PKCE verifier on the shared client,
+            # so it has to stay on the event loop thread to keep the verifier read below consistent.
             response = supabase.auth.sign_in_with_oauth(
                 {
                     'provider': provider,
@@ -32,14 +36,16 @@ class UsersService:
         raise HTTPException(status_code=404, detail='Provider not found')
 
     async def sign_out(self, access_token: str) -> None:
-        response = supabase.auth.admin.sign_out(access_token)
+        response = await run_sync(supabase.auth.admin.sign_out, access_token)
+        invalidate_token(access_token)
         return response
 
     async def exchange_code_for_session(self, code: str, code_verifier: str) -> CodeForSessionResponse:
         session_client = self._create_client()
 
         try:
-            session = session_client.auth.exchange_code_for_session(
+            session = await run_sync(
+                session_client.exchange_code_for_session,
                 {
                     'auth_code': code,
                     'code_verifier': code_verifier
@@ -53,7 +59,7 @@ class UsersService:
             access_token = session_data.access_token
             refresh_token = session_data.refresh_token
 
-            user_response = supabase.auth.get_user(access_token)
+            user_response = await run_sync(supabase.auth.get_user, access_token)
             user_id = user_response.user.id
 
             profile = await get_profile_data(user_id)
@@ -81,7 +87,7 @@ class UsersService:
         tokens_client = self._create_client()
 
         try:
-            response = tokens_client.auth.refresh_session(request.refresh_token)
+            response = await run_sync(tokens_client.refresh_session, request.refresh_token)
 
             return TokensResponse(
                 access_token=response.session.access_token,
@@ -113,12 +119,11 @@ class UsersService:
                 )
 
                 if profile.get("is_tutor"):
-                    tutor_profile = (
+                    tutor_profile = await execute(
                         supabase.table("tutor_profiles")
                         .select(
                             "*, reviews!tutor_profiles_featured_review_id_fkey(id, student_id, tutor_id, rating, comment, created_at)")
                         .eq("id", id)
-                        .execute()
                     )
 
                     if not tutor_profile.data or len(tutor_profile.data) == 0:
@@ -147,8 +152,5 @@ class UsersService:
         except AuthApiError as e:
             raise HTTPException(status_code=404, detail="User not found")
 
-    def _create_client(self) -> Client:
-        return create_client(
-            SUPABASE_URL,
-            SUPABASE_KEY,
-        )
+    def _create_client(self) -> SupabaseAuthClient:
+        return client_factory.create_auth_client()
@@ -0,0 +1,86 @@
+"""
+Benchmark for the free time computation of tutors_availability.
+
+Compares the old pipeline of ``get_tutor_available_hours`` (subtract_time_blocks twice, merge, filter, dedupe)
+with ``sweep_free_blocks`` on synthetic availability, unavailability and booking blocks.
+
+Usage:
+    python benchmarks/bench_availability.py [--blocks 10000] [--unavailabilities 1000] [--bookings 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(base_dir, "app"))
+
+from tutors_availability.utils import subtract_time_blocks, merge_overlapping_blocks, sweep_free_blocks
+
+MIN_DURATION = timedelta(minutes=45)
+
+
+def random_blocks(rng: random.Random, count: int, max_length: int) -> list:
+    origin = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    blocks = []
+    for _ in range(count):
+        start = origin + timedelta(minutes=15 * rng.randrange(0, count * 8))
+        blocks.append((start, start + timedelta(minutes=15 * rng.randrange(1, max_length))))
+    return blocks
+
+
+def old_pipeline(availability_blocks, unavailability_blocks, booking_blocks):
+    available_blocks = subtract_time_blocks(merge_overlapping_blocks(availability_blocks), unavailability_blocks)
+    final_blocks = subtract_time_blocks(available_blocks, booking_blocks)
+    merged_blocks = merge_overlapping_blocks(final_blocks)
+    filtered_blocks = [(start, end) for start, end in merged_blocks if (end - start) >= MIN_DURATION]
+
+    deduplicated_blocks = []
+    seen = set()
+    for start, end in filtered_blocks:
+        key = (start.date(), start.time(), end.time())
+        if key not in seen:
+            seen.add(key)
+            deduplicated_blocks.append((start, end))
+    return sorted(deduplicated_blocks)
+
+
+def sweep(availability_blocks, unavailability_blocks, booking_blocks):
+    return sweep_free_blocks(availability_blocks, unavailability_blocks + booking_blocks, MIN_DURATION)
+
+
+def measure(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blocks", type=int, default=10000, help="availability blocks")
+    parser.add_argument("--unavailabilities", type=int, default=1000)
+    parser.add_argument("--bookings", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    availability_blocks = random_blocks(rng, args.blocks, 16)
+    unavailability_blocks = random_blocks(rng, args.unavailabilities, 32)
+    booking_blocks = random_blocks(rng, args.bookings, 8)
+
+    print(f"{args.blocks} availability blocks, {args.unavailabilities} unavailabilities, {args.bookings} bookings")
+
+    old_result, old_time = measure(old_pipeline, availability_blocks, unavailability_blocks, booking_blocks)
+    new_result, new_time = measure(sweep, availability_blocks, unavailability_blocks, booking_blocks)
+
+    assert old_result == new_result, "sweep result differs from the old pipeline"
+
+    print(f"  {'before (subtract + merge)':<28} {old_time * 1000:10.1f} ms")
+    print(f"  {'after (sweep_free_blocks)':<28} {new_time * 1000:10.1f} ms")
+    print(f"  {len(new_result)} free blocks, {old_time / new_time:.0f}x faster")
+
+
+if __name__ == "__main__":
+    main()
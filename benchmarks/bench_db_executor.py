@@ -0,0 +1,84 @@
+"""
+Load benchmark for core.db_executor.
+
+Serves the same endpoint twice - once calling ``query.execute()`` directly (old behaviour of CRUDProvider)
+and once through ``await execute(query)`` - and fires concurrent requests at both.
+Queries are simulated with a fixed network latency, so no supabase project is needed.
+
+Usage:
+    python benchmarks/bench_db_executor.py [--requests 200] [--concurrency 50] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(base_dir, "app"))
+
+import httpx
+from fastapi import FastAPI
+
+from core.db_executor import execute
+
+
+class FakeQuery:
+    """Stand-in for a postgrest query builder with a fixed round trip time."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def execute(self):
+        time.sleep(self.latency)
+        return {"data": [{"id": 1}]}
+
+
+def create_app(latency: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/blocking")
+    async def blocking():
+        return FakeQuery(latency).execute()
+
+    @app.get("/offloaded")
+    async def offloaded():
+        return await execute(FakeQuery(latency))
+
+    return app
+
+
+async def run(path: str, app: FastAPI, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return requests / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated query round trip in seconds")
+    args = parser.parse_args()
+
+    app = create_app(args.latency)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, query latency {args.latency * 1000:.0f} ms")
+    for label, path in (("before (blocking execute)", "/blocking"), ("after (db_executor)", "/offloaded")):
+        rps = await run(path, app, args.requests, args.concurrency)
+        print(f"  {label:<28} {rps:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+"""
+Benchmark for the free slot bitmaps of tutors_availability.
+
+Builds bitmaps of synthetic tutors (a few free blocks every day for 28 days) and measures how long it takes
+to find the tutors free within windows of different lengths.
+
+Usage:
+    python benchmarks/bench_free_slots.py [--tutors 10000] [--queries 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(base_dir, "app"))
+
+from tutors_availability.bitmap import SLOT, FreeSlotBitmaps
+
+DAYS = 28
+MIN_DURATION = timedelta(minutes=45)
+ORIGIN = datetime(2025, 1, 6, tzinfo=timezone.utc)
+
+
+def random_free_blocks(rng: random.Random) -> list:
+    blocks = []
+    for day in range(DAYS):
+        for _ in range(rng.randrange(0, 4)):
+            start = ORIGIN + timedelta(days=day, minutes=15 * rng.randrange(28, 84))
+            blocks.append((start, start + timedelta(minutes=15 * rng.randrange(2, 12))))
+    return blocks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tutors", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bitmaps = FreeSlotBitmaps(ORIGIN, int(timedelta(days=DAYS) / SLOT))
+    start = time.perf_counter()
+    for tutor in range(args.tutors):
+        bitmaps.set(str(tutor), random_free_blocks(rng))
+    print(f"{args.tutors} tutors, {DAYS} days indexed in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    for name, length in [("2 hours", timedelta(hours=2)), ("1 day", timedelta(days=1)),
+                         ("1 week", timedelta(days=7))]:
+        timings, free = [], 0
+        for _ in range(args.queries):
+            window_start = ORIGIN + timedelta(days=rng.randrange(0, DAYS - 7), hours=rng.randrange(7, 20))
+            start = time.perf_counter()
+            free += len(bitmaps.free_tutors(window_start, window_start + length, MIN_DURATION))
+            timings.append(time.perf_counter() - start)
+        print(f"  {name:<8} median {statistics.median(timings) * 1000:6.2f} ms, "
+              f"{free / args.queries / args.tutors:.0%} of tutors free")
+
+
+if __name__ == "__main__":
+    main()
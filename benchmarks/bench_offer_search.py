@@ -0,0 +1,115 @@
+"""
+Benchmark for the offer search index.
+
+Indexes synthetic offers and measures the latency of ``OfferSearchIndex.search`` for text queries,
+filters and deep pages, and of browsing the offers by price (cursor vs offset pages, counts).
+
+Usage:
+    python benchmarks/bench_offer_search.py [--offers 20000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(base_dir, "app"))
+
+from offers.search_index import OfferSearchIndex
+
+SUBJECTS = ["Matematyka", "Fizyka", "Chemia", "Biologia", "Język polski", "Język angielski", "Historia",
+            "Geografia", "Informatyka", "Język niemiecki"]
+LEVELS = ["Szkoła podstawowa", "Liceum", "Matura", "Studia"]
+WORDS = ("korepetycje lekcje przygotowanie matury egzaminu zadania rozszerzenie podstawa online stacjonarnie "
+         "doświadczenie nauczyciel student cierpliwie wyjaśniam teoria praktyka konwersacje gramatyka "
+         "programowanie python algorytmy analiza funkcje pochodne całki mechanika optyka reakcje").split()
+
+
+def random_offers(rng: random.Random, count: int) -> list[dict]:
+    offers = []
+    for id in range(1, count + 1):
+        subject_id = rng.randrange(len(SUBJECTS))
+        level_id = rng.randrange(len(LEVELS))
+        offers.append({
+            "id": id,
+            "title": f"{SUBJECTS[subject_id]} {' '.join(rng.sample(WORDS, 3))}",
+            "description": " ".join(rng.choices(WORDS, k=rng.randrange(20, 80))),
+            "price": rng.randrange(30, 250),
+            "subject_id": subject_id + 1,
+            "subject_name": SUBJECTS[subject_id],
+            "level_id": level_id + 1,
+            "level": LEVELS[level_id],
+            "tutor_rating": round(rng.uniform(1, 5), 2),
+        })
+    return offers
+
+
+def measure(index: OfferSearchIndex, searches: list[dict]) -> list[float]:
+    timings = []
+    for search in searches:
+        start = time.perf_counter()
+        index.search(**search)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offers", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    offers = random_offers(rng, args.offers)
+
+    start = time.perf_counter()
+    index = OfferSearchIndex(offers)
+    print(f"{args.offers} offers indexed in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    cases = {
+        "one term": lambda: {"query": rng.choice(WORDS)},
+        "two terms + prefix": lambda: {"query": f"{rng.choice(WORDS)} {rng.choice(WORDS)[:4]}"},
+        "term + filters": lambda: {"query": rng.choice(WORDS), "subject_id": rng.randrange(1, 11),
+                                   "max_price": 120},
+        "filters only": lambda: {"level_id": rng.randrange(1, 5), "min_price": 50},
+    }
+    for name, make in cases.items():
+        searches = [make() for _ in range(args.queries)]
+        timings = sorted(measure(index, searches))
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"  {name:<22} median {statistics.median(timings) * 1000:6.2f} ms   p95 {p95 * 1000:6.2f} ms")
+
+    after, pages = None, 0
+    start = time.perf_counter()
+    while True:
+        result = index.search("korepetycje", limit=20, after=after)
+        pages += 1
+        if result.next_after is None or pages == 50:
+            break
+        after = result.next_after
+    print(f"  {pages} consecutive pages     {(time.perf_counter() - start) * 1000 / pages:6.2f} ms per page")
+
+    index.browse()  # sorts the offers by price once
+    for depth in (0, 25, 90):
+        after = None
+        for _ in range(depth):
+            after = index.browse(subject_id=1, limit=20, after=after).next_after
+        start = time.perf_counter()
+        index.browse(subject_id=1, limit=20, after=after)
+        cursor_time = time.perf_counter() - start
+        start = time.perf_counter()
+        index.search(subject_id=1, order="ASC", limit=20, offset=depth * 20)
+        offset_time = time.perf_counter() - start
+        print(f"  browse page {depth:<4}       cursor {cursor_time * 1000:6.2f} ms   offset {offset_time * 1000:6.2f} ms")
+
+    for name, exact_up_to in [("exact count", None), ("estimated count", 1000)]:
+        start = time.perf_counter()
+        total, _ = index.count(subject_id=1, exact_up_to=exact_up_to)
+        print(f"  {name:<22} {(time.perf_counter() - start) * 1000:6.2f} ms ({total})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import sys
+from tempfile import SpooledTemporaryFile
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+from storage3.types import UploadResponse
+
+from app.booking_attachments import service
+from app.booking_attachments.service import BookingAttachmentService, UnconfirmedUploads
+from app.core.storage import UploadUrl, public_url
+
+# The module the service uses (imported from the app directory)
+uploads = sys.modules[UnconfirmedUploads.__module__]
+
+
+class Response:
+    def __init__(self, data: list):
+        self.data = data
+
+
+class FakeDatabase:
+    """Attachment rows in memory, answering the inserts and the lookups by booking and url."""
+
+    def __init__(self):
+        self.attachments = []
+
+    async def execute(self, query):
+        method = str(query.http_method).split(".")[-1]
+        if method == "POST":
+            rows = [{**row, "id": len(self.attachments) + i + 1} for i, row in enumerate(query.json)]
+            self.attachments.extend(rows)
+            return Response(rows)
+
+        params = dict(query.params)
+        urls = [url.strip('"') for url in params["attachment_url"][4:-1].split(",")]
+        booking_id = params.get("booking_id")
+        return Response([row for row in self.attachments if row["attachment_url"] in urls
+                         and (booking_id is None or f"eq.{row['booking_id']}" == booking_id)])
+
+
+class FakeBucket:
+    def __init__(self):
+        self.uploaded = {}
+
+    def upload(self, file, path, file_options):
+        self.uploaded[path] = file.read()
+        return UploadResponse(path=path, Key=f"attachments/{path}")
+
+
+def upload_file(content: bytes, content_type: str = "application/pdf") -> UploadFile:
+    # Like Starlette, files over 1 MB are rolled over to disk
+    spooled = SpooledTemporaryFile(max_size=1024 * 1024)
+    spooled.write(content)
+    spooled.seek(0)
+    return UploadFile(spooled, size=len(content), filename="file",
+                      headers=Headers({"content-type": content_type}))
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(service, "execute", database.execute)
+    monkeypatch.setattr(uploads, "execute", database.execute)
+    return database
+
+
+@pytest.fixture
+def verified(monkeypatch):
+    verified = []
+
+    async def verify_upload(bucket, path, prefix, allowed_content_types, max_size):
+        verified.append((path, allowed_content_types))
+        return {"mimetype": next(iter(allowed_content_types)), "size": 1}
+
+    monkeypatch.setattr(service, "verify_upload", verify_upload)
+    return verified
+
+
+@pytest.fixture
+def unconfirmed(monkeypatch):
+    unconfirmed = UnconfirmedUploads("attachments", "booking_attachments", "attachment_url", ttl=0)
+    monkeypatch.setattr(service, "unconfirmed_uploads", unconfirmed)
+    return unconfirmed
+
+
+@pytest.mark.asyncio
+async def test_upload_urls_are_bound_to_content_types(monkeypatch, unconfirmed):
+    async def create_upload_url(bucket, path):
+        return UploadUrl(signed_url=f"https://storage/{path}", token="token", path=path)
+
+    monkeypatch.setattr(service, "create_upload_url", create_upload_url)
+
+    upload_urls = await BookingAttachmentService().create_upload_urls(7, ["application/pdf", "image/png"])
+
+    assert [upload_url.path[-4:] for upload_url in upload_urls] == [".pdf", ".png"]
+    assert all(upload_url.path.startswith("7/") for upload_url in upload_urls)
+    assert len(unconfirmed) == 2
+
+
+@pytest.mark.asyncio
+async def test_confirmed_paths_are_added_once(database, verified, unconfirmed):
+    unconfirmed.add(["7/a.pdf", "7/b.png"])
+
+    rows = await BookingAttachmentService().confirm_uploads(7, ["7/a.pdf", "7/a.pdf"])
+    assert [row["attachment_url"] for row in rows] == [public_url("attachments", "7/a.pdf")]
+    assert verified == [("7/a.pdf", {"application/pdf"})]
+
+    rows = await BookingAttachmentService().confirm_uploads(7, ["7/a.pdf", "7/b.png"])
+    assert sorted(row["attachment_url"] for row in rows) == [public_url("attachments", "7/a.pdf"),
+                                                             public_url("attachments", "7/b.png")]
+    assert len(database.attachments) == 2
+    assert len(unconfirmed) == 0
+
+
+@pytest.mark.asyncio
+async def test_path_without_signed_type_is_refused(database, verified, unconfirmed):
+    with pytest.raises(HTTPException) as error:
+        await BookingAttachmentService().confirm_uploads(7, ["7/a"])
+
+    assert error.value.status_code == 400
+    assert verified == []
+    assert database.attachments == []
+
+
+@pytest.mark.asyncio
+async def test_expired_unconfirmed_uploads_are_removed(monkeypatch, database, verified, unconfirmed):
+    removed = []
+
+    async def remove_objects(bucket, paths):
+        removed.extend(paths)
+
+    monkeypatch.setattr(uploads, "remove_objects", remove_objects)
+    unconfirmed.add(["7/a.pdf", "7/b.png"])
+    # Confirmed on another worker
+    await BookingAttachmentService().confirm_uploads(7, ["7/a.pdf"])
+    unconfirmed.add(["7/a.pdf"])
+
+    await unconfirmed.sweep()
+
+    assert removed == ["7/b.png"]
+    assert len(unconfirmed) == 0
+
+
+@pytest.mark.asyncio
+async def test_spooled_files_are_uploaded_as_they_are(monkeypatch):
+    bucket = FakeBucket()
+    monkeypatch.setattr(service, "supabase", SimpleNamespace(storage=SimpleNamespace(from_=lambda name: bucket)))
+    small, large = b"%PDF-small", b"%PDF-" + b"x" * 2 * 1024 * 1024
+
+    uploaded = await BookingAttachmentService().upload_files(7, [upload_file(small), upload_file(large)])
+
+    assert [bucket.uploaded[file.path] for file in uploaded] == [small, large]
+
+
+@pytest.mark.asyncio
+async def test_invalid_files_are_not_uploaded(monkeypatch):
+    bucket = FakeBucket()
+    monkeypatch.setattr(service, "supabase", SimpleNamespace(storage=SimpleNamespace(from_=lambda name: bucket)))
+    monkeypatch.setattr(service, "MAX_FILE_SIZE", 10)
+
+    for file, status_code in [(upload_file(b"not a pdf"), 400), (upload_file(b"%PDF-" + b"x" * 10), 413)]:
+        with pytest.raises(HTTPException) as error:
+            await BookingAttachmentService().upload_files(7, [upload_file(b"%PDF-"), file])
+        assert error.value.status_code == status_code
+
+    assert bucket.uploaded == {}
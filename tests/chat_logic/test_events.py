@@ -0,0 +1,220 @@
+import asyncio
+
+import pytest
+from app.chat_logic import events, pubsub
+from app.chat_logic.events import ConnectionManager, SLOW_CONSUMER_CLOSE_CODE
+from app.chat_logic.pubsub import InMemoryPubSub, RedisPubSub
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.sent = []
+        self.close_code = None
+
+    async def send_text(self, message: str):
+        await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+class FakeRedis:
+    """Local stand-in for a Redis server shared by several workers."""
+
+    def __init__(self):
+        self.subscribers = []
+
+    async def publish(self, channel: str, data: str):
+        for subscriber in self.subscribers:
+            if channel in subscriber.channels:
+                await subscriber.queue.put({"type": "message", "channel": channel, "data": data.encode()})
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+class FakePubSub:
+    def __init__(self, server: FakeRedis):
+        self.server = server
+        self.channels = set()
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel: str):
+        self.channels.add(channel)
+        self.server.subscribers.append(self)
+        await self.queue.put({"type": "subscribe", "channel": channel, "data": 1})
+
+    async def unsubscribe(self, channel: str):
+        self.channels.discard(channel)
+
+    async def close(self):
+        self.channels.clear()
+        self.server.subscribers.remove(self)
+
+    async def listen(self):
+        while True:
+            item = await self.queue.get()
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def drop(self):
+        """Lose the connection to the server, like a Redis restart."""
+        self.queue.put_nowait(ConnectionError("Connection closed by server."))
+
+
+def collect(received: list):
+    async def handler(message: str):
+        received.append(message)
+    return handler
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+
+
+class TestConnectionManager:
+    @pytest.mark.asyncio
+    async def test_messages_go_to_room_only(self):
+        """Test that a message is sent only to sockets of the same chat"""
+        manager = ConnectionManager(InMemoryPubSub())
+        first, second, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(first, 1)
+        await manager.connect(second, 1)
+        await manager.connect(other, 2)
+
+        await manager.broadcast(1, "hello")
+        await settle()
+
+        assert first.sent == ["hello"]
+        assert second.sent == ["hello"]
+        assert other.sent == []
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_disconnect_removes_empty_room(self):
+        """Test that rooms are dropped with their last socket"""
+        manager = ConnectionManager(InMemoryPubSub())
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, 1)
+
+        manager.disconnect(websocket)
+        manager.disconnect(websocket)
+
+        assert manager.rooms == {}
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_is_evicted(self, monkeypatch):
+        """Test that a socket with a full send queue is disconnected without delaying the others"""
+        monkeypatch.setattr(events, "CHAT_SEND_QUEUE_SIZE", 2)
+        manager = ConnectionManager(InMemoryPubSub())
+        slow, fast = FakeWebSocket(delay=10), FakeWebSocket()
+        await manager.connect(slow, 1)
+        await manager.connect(fast, 1)
+
+        for i in range(5):
+            await manager.broadcast(1, str(i))
+            await asyncio.sleep(0.01)
+        await settle()
+
+        assert fast.sent == ["0", "1", "2", "3", "4"]
+        assert slow.close_code == SLOW_CONSUMER_CLOSE_CODE
+        assert list(manager.rooms[1]) == [fast]
+        assert not manager._closing
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_personal_message_keeps_order(self):
+        """Test that a personal message is queued before later room messages"""
+        manager = ConnectionManager(InMemoryPubSub())
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, 1)
+
+        await manager.send_personal_message("history", websocket)
+        await manager.broadcast(1, "new")
+        await settle()
+
+        assert websocket.sent == ["history", "new"]
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_fan_out_between_workers(self):
+        """Test that messages reach sockets connected to another worker through the pub/sub backend"""
+        server = FakeRedis()
+        worker_a = ConnectionManager(RedisPubSub(server))
+        worker_b = ConnectionManager(RedisPubSub(server))
+        await worker_a.start()
+        await worker_b.start()
+
+        on_a, on_b, other_chat = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await worker_a.connect(on_a, 1)
+        await worker_b.connect(on_b, 1)
+        await worker_b.connect(other_chat, 2)
+
+        await worker_a.broadcast(1, "hello")
+        await settle()
+
+        assert on_a.sent == ["hello"]
+        assert on_b.sent == ["hello"]
+        assert other_chat.sent == []
+        await worker_a.stop()
+        await worker_b.stop()
+
+    @pytest.mark.asyncio
+    async def test_pubsub_reconnects_after_connection_drops(self, monkeypatch):
+        """Test that a worker subscribes again when the connection to Redis drops"""
+        monkeypatch.setattr(pubsub, "CHAT_PUBSUB_RECONNECT_DELAY", 0.01)
+        server = FakeRedis()
+        worker = ConnectionManager(RedisPubSub(server))
+        await worker.start()
+        websocket = FakeWebSocket()
+        await worker.connect(websocket, 1)
+
+        server.subscribers[0].drop()
+        await settle()
+        await worker.broadcast(1, "after reconnect")
+        await settle()
+
+        assert websocket.sent == ["after reconnect"]
+        assert len(server.subscribers) == 1
+        await worker.stop()
+
+    @pytest.mark.asyncio
+    async def test_stream_evicts_slow_consumer(self, monkeypatch):
+        """Test that streaming to a socket with a full queue disconnects it instead of waiting"""
+        monkeypatch.setattr(events, "CHAT_SEND_QUEUE_SIZE", 2)
+        manager = ConnectionManager(InMemoryPubSub())
+        websocket = FakeWebSocket(delay=10)
+        await manager.connect(websocket, 1)
+
+        sent = [await manager.stream(str(i), websocket) for i in range(5)]
+        await settle()
+
+        assert sent == [True, True, False, False, False]
+        assert websocket.close_code == SLOW_CONSUMER_CLOSE_CODE
+        assert manager.rooms == {}
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_other_channels_do_not_reach_rooms(self):
+        """Test that messages published on another channel of the same server are not delivered to the chat"""
+        server = FakeRedis()
+        worker = ConnectionManager(RedisPubSub(server))
+        other_channel = RedisPubSub(server, "free_slot_invalidations")
+        received = []
+        await worker.start()
+        await other_channel.start(collect(received))
+        websocket = FakeWebSocket()
+        await worker.connect(websocket, 1)
+
+        await other_channel.publish('{"origin": "worker", "tutor_id": "tutor"}')
+        await worker.broadcast(1, "hello")
+        await settle()
+
+        assert websocket.sent == ["hello"]
+        assert received == ['{"origin": "worker", "tutor_id": "tutor"}']
+        await worker.stop()
+        await other_channel.stop()
@@ -0,0 +1,173 @@
+import asyncio
+import fcntl
+import json
+import os
+from datetime import datetime, timezone
+
+import pytest
+from app.chat_logic import writer
+from app.chat_logic.writer import MessageWriter
+
+
+class FakeMessagesTable:
+    def __init__(self, fail_times: int = 0):
+        self.fail_times = fail_times
+        self.inserts = []
+        self.rows = []
+
+    async def save(self, messages: list[dict]) -> list[dict]:
+        if self.fail_times:
+            self.fail_times -= 1
+            raise Exception("Database unavailable")
+
+        self.inserts.append(len(messages))
+        saved = []
+        for message in messages:
+            saved.append({**message, "id": len(self.rows) + 1})
+            self.rows.append(saved[-1])
+        return saved
+
+
+def message(content: str) -> dict:
+    return {"chat_id": 1, "sender_id": "user", "content": content}
+
+
+@pytest.mark.asyncio
+async def test_messages_are_saved_in_batches(tmp_path):
+    table = FakeMessagesTable()
+    message_writer = MessageWriter(table.save, spool_dir=str(tmp_path), batch_size=10, flush_interval=0.05)
+
+    futures = [await message_writer.write(message(str(i))) for i in range(25)]
+    saved = await asyncio.gather(*futures)
+    await message_writer.stop()
+
+    assert table.inserts == [10, 10, 5]
+    assert [row["id"] for row in saved] == list(range(1, 26))
+    assert [row["content"] for row in saved] == [str(i) for i in range(25)]
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_batch_is_flushed_after_interval(tmp_path):
+    table = FakeMessagesTable()
+    message_writer = MessageWriter(table.save, spool_dir=str(tmp_path), batch_size=50, flush_interval=0.01)
+
+    saved = await asyncio.wait_for(await message_writer.write(message("hello")), 1)
+    await message_writer.stop()
+
+    assert saved["id"] == 1
+    assert table.inserts == [1]
+
+
+@pytest.mark.asyncio
+async def test_failed_insert_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(writer.asyncio, "sleep", _no_sleep)
+    table = FakeMessagesTable(fail_times=2)
+    message_writer = MessageWriter(table.save, spool_dir=str(tmp_path), flush_interval=0)
+
+    saved = await (await message_writer.write(message("hello")))
+    await message_writer.stop()
+
+    assert saved["id"] == 1
+
+
+@pytest.mark.asyncio
+async def test_message_is_retried_later_after_failed_attempts(tmp_path, monkeypatch):
+    monkeypatch.setattr(writer, "MESSAGE_RETRY_DELAY", 0.01)
+    table = FakeMessagesTable(fail_times=writer.MESSAGE_SAVE_ATTEMPTS * 2)
+    message_writer = MessageWriter(table.save, spool_dir=str(tmp_path), flush_interval=0)
+    monkeypatch.setattr(writer.asyncio, "sleep", _no_sleep)
+
+    saved = await asyncio.wait_for(await message_writer.write(message("hello")), 1)
+    await message_writer.stop()
+
+    assert saved["content"] == "hello"
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_retried_message_is_not_older_than_messages_saved_meanwhile(tmp_path, monkeypatch):
+    monkeypatch.setattr(writer, "MESSAGE_RETRY_DELAY", 0.01)
+    monkeypatch.setattr(writer.asyncio, "sleep", _no_sleep)
+    table = FakeMessagesTable(fail_times=writer.MESSAGE_SAVE_ATTEMPTS)
+    message_writer = MessageWriter(table.save, spool_dir=str(tmp_path), flush_interval=0)
+
+    late = await message_writer.write({**message("late"), "sent_at": "2025-01-01T10:00:00+00:00"})
+    # Saved while the first one waits to be retried, a client reading now gets it as the newest message
+    table.rows.append({**message("read by a client"), "id": 100, "sent_at": datetime.now(timezone.utc).isoformat()})
+    saved = await asyncio.wait_for(late, 1)
+    await message_writer.stop()
+
+    assert saved["sent_at"] >= table.rows[0]["sent_at"]
+
+
+@pytest.mark.asyncio
+async def test_unsaved_messages_are_recovered_from_spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(writer.asyncio, "sleep", _no_sleep)
+    failing = MessageWriter(FakeMessagesTable(fail_times=100).save, spool_dir=str(tmp_path), flush_interval=0)
+
+    future = await failing.write(message("lost"))
+    await failing.stop()
+    with pytest.raises(RuntimeError):
+        await future
+    assert len(os.listdir(tmp_path)) == 1
+
+    table = FakeMessagesTable()
+    recovering = MessageWriter(table.save, spool_dir=str(tmp_path), flush_interval=0)
+    await recovering.start()
+    await recovering.stop()
+
+    assert [row["content"] for row in table.rows] == ["lost"]
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_spool_of_running_writer_is_not_recovered(tmp_path):
+    first_table, second_table = FakeMessagesTable(), FakeMessagesTable()
+    first = MessageWriter(first_table.save, spool_dir=str(tmp_path), flush_interval=0.05)
+    second = MessageWriter(second_table.save, spool_dir=str(tmp_path), flush_interval=0.05)
+
+    future = await first.write(message("first"))
+    await second.start()
+    await future
+    await asyncio.gather(first.stop(), second.stop())
+
+    assert [row["content"] for row in first_table.rows] == ["first"]
+    assert second_table.rows == []
+
+
+@pytest.mark.asyncio
+async def test_saved_messages_are_marked_done_in_spool(tmp_path):
+    message_writer = MessageWriter(FakeMessagesTable().save, spool_dir=str(tmp_path), batch_size=2, flush_interval=10)
+
+    first = await message_writer.write(message("a"))
+    await message_writer.write(message("b"))
+    await first
+    # Everything saved, so the spool was emptied
+    [spool] = os.listdir(tmp_path)
+    assert open(os.path.join(tmp_path, spool)).read() == ""
+
+    pending = await message_writer.write(message("c"))
+    records = [json.loads(line) for line in open(os.path.join(tmp_path, spool))]
+    assert records[0]["message"]["content"] == "c"
+
+    await message_writer.stop()
+    assert (await pending)["content"] == "c"
+
+
+async def _no_sleep(delay):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_spool_is_locked_once_it_can_be_recovered(tmp_path):
+    message_writer = MessageWriter(FakeMessagesTable().save, spool_dir=str(tmp_path))
+    await message_writer.start()
+
+    [spool] = os.listdir(tmp_path)
+    assert spool.endswith(".jsonl")
+    with open(os.path.join(tmp_path, spool)) as file:
+        with pytest.raises(OSError):
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    await message_writer.stop()
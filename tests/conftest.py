@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The app imports its modules from the app directory (e.g. ``from core.cache import TTLCache``)
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(base_dir, "app"))
+
+# The supabase client is created on import, it needs a url and key but doesn't connect
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "header.payload.signature")
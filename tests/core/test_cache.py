@@ -0,0 +1,90 @@
+import pytest
+from app.core import cache as cache_module
+from app.core.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", fake_clock)
+    return fake_clock
+
+
+class TestTTLCache:
+    def test_get_and_set(self, clock):
+        """Test that a stored value is returned until it expires"""
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        clock.now += 59
+        assert cache.get("a") == 1
+        clock.now += 1
+        assert cache.get("a") is None
+        assert "a" not in cache
+
+    def test_entry_ttl_is_capped_by_default(self, clock):
+        """Test that a per entry ttl can only shorten the default ttl"""
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set("short", 1, ttl=5)
+        cache.set("long", 2, ttl=600)
+
+        clock.now += 10
+        assert cache.get("short") is None
+        assert cache.get("long") == 2
+
+        clock.now += 50
+        assert cache.get("long") is None
+
+    def test_expired_ttl_is_not_stored(self, clock):
+        """Test that values with a non positive ttl (e.g. expired tokens) are skipped"""
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set("a", 1, ttl=-1)
+
+        assert len(cache) == 0
+
+    def test_lru_eviction(self, clock):
+        """Test that the least recently used entry is evicted first"""
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_invalidation(self, clock):
+        """Test single key and predicate invalidation"""
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set(("tutor", 1), 1)
+        cache.set(("tutor", 2), 2)
+        cache.set("other", 3)
+
+        cache.invalidate("other")
+        assert cache.get("other") is None
+
+        cache.invalidate_where(lambda key: key[0] == "tutor" and key[1] == 1)
+        assert cache.get(("tutor", 1)) is None
+        assert cache.get(("tutor", 2)) == 2
+
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_stats(self, clock):
+        """Test hit and miss counters"""
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import time
+
+import pytest
+from app.core.db_executor import execute, run_sync, query_budget, returning
+
+
+class FakeQuery:
+    http_method = "GET"
+
+    def __init__(self, path: str, latency: float = 0.05):
+        self.path = path
+        self.latency = latency
+
+    def execute(self):
+        time.sleep(self.latency)
+        return self.path
+
+
+class TestQueryBudget:
+    @pytest.mark.asyncio
+    async def test_counts_queries_of_gathered_tasks(self):
+        """Test that queries sent concurrently from child tasks are counted and timed"""
+        with query_budget("test", 3) as stats:
+            results = await asyncio.gather(execute(FakeQuery("/a")), execute(FakeQuery("/b")), execute(FakeQuery("/c")))
+
+        assert results == ["/a", "/b", "/c"]
+        assert stats.count == 3
+        assert sorted(label for label, _ in stats.timings) == ["GET /a", "GET /b", "GET /c"]
+        # Sent together, so the whole block takes about as long as one query
+        assert stats.elapsed < 0.05 * 3
+
+    @pytest.mark.asyncio
+    async def test_run_sync_is_counted(self):
+        """Test that non query calls are labeled with the function name"""
+        def upload():
+            return "done"
+
+        with query_budget("test", 1) as stats:
+            assert await run_sync(upload) == "done"
+
+        assert [label for label, _ in stats.timings] == [upload.__qualname__]
+
+    @pytest.mark.asyncio
+    async def test_warns_when_budget_exceeded(self, caplog):
+        """Test that going over the budget is logged as a warning"""
+        with caplog.at_level(logging.WARNING, logger="app.core.db_executor"):
+            with query_budget("too many", 1):
+                await execute(FakeQuery("/a", 0))
+                await execute(FakeQuery("/b", 0))
+
+        assert "Query budget exceeded" in caplog.text
+        assert "too many: 2/1 queries" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_no_budget_outside_block(self):
+        """Test that queries outside of a budget block are not recorded"""
+        with query_budget("test", 1) as stats:
+            pass
+
+        await execute(FakeQuery("/a", 0))
+
+        assert stats.count == 0
+
+
+def test_returning_selects_embedded_resources():
+    from postgrest import SyncPostgrestClient
+
+    query = SyncPostgrestClient("http://localhost").table("offers").update({"price": 10}).eq("id", 1)
+    query = returning(query, "*, subjects(*)")
+
+    assert query.params["select"] == "*, subjects(*)"
+    assert query.params["id"] == "eq.1"
+    assert query.http_method == "PATCH"
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.core.debounce import BatchDebouncer
+
+
+class FlushRecorder:
+    def __init__(self, fail_times: int = 0):
+        self.fail_times = fail_times
+        self.batches = []
+        self.release = None
+
+    async def flush(self, keys: set):
+        if self.release:
+            await self.release.wait()
+        if self.fail_times:
+            self.fail_times -= 1
+            raise Exception("Database unavailable")
+        self.batches.append(set(keys))
+
+
+@pytest.mark.asyncio
+async def test_touches_are_flushed_together():
+    recorder = FlushRecorder()
+    debouncer = BatchDebouncer(recorder.flush, interval=0.02)
+
+    for chat_id in [1, 2, 1, 3, 1]:
+        debouncer.touch(chat_id)
+    await asyncio.sleep(0.05)
+
+    assert recorder.batches == [{1, 2, 3}]
+
+
+@pytest.mark.asyncio
+async def test_touch_after_flush_starts_new_round():
+    recorder = FlushRecorder()
+    debouncer = BatchDebouncer(recorder.flush, interval=0.01)
+
+    debouncer.touch(1)
+    await asyncio.sleep(0.03)
+    debouncer.touch(2)
+    await asyncio.sleep(0.03)
+
+    assert recorder.batches == [{1}, {2}]
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending():
+    recorder = FlushRecorder()
+    debouncer = BatchDebouncer(recorder.flush, interval=10)
+
+    debouncer.touch(1)
+    await debouncer.stop()
+
+    assert recorder.batches == [{1}]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried():
+    recorder = FlushRecorder(fail_times=1)
+    debouncer = BatchDebouncer(recorder.flush, interval=0.01)
+
+    debouncer.touch(1)
+    await asyncio.sleep(0.015)
+    debouncer.touch(2)
+    await asyncio.sleep(0.03)
+
+    assert recorder.batches == [{1, 2}]
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_running_flush():
+    recorder = FlushRecorder()
+    recorder.release = asyncio.Event()
+    debouncer = BatchDebouncer(recorder.flush, interval=0.01)
+
+    debouncer.touch(1)
+    await asyncio.sleep(0.02)
+    debouncer.touch(2)
+    stopping = asyncio.create_task(debouncer.stop())
+    await asyncio.sleep(0.01)
+    recorder.release.set()
+    await stopping
+
+    assert recorder.batches == [{1}, {2}]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_on_stop_is_not_rescheduled():
+    recorder = FlushRecorder(fail_times=1)
+    debouncer = BatchDebouncer(recorder.flush, interval=10)
+
+    debouncer.touch(1)
+    await debouncer.stop()
+
+    assert recorder.batches == []
+    assert debouncer._task is None
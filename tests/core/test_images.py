@@ -0,0 +1,57 @@
+import io
+
+from PIL import Image
+
+from app.core.images import (AVATAR_SIZE, AVATAR_THUMBNAIL_SIZE, content_hash, render_variants, thumbnail_url,
+                             variant_path)
+
+DIGEST = "a" * 64
+BASE_URL = "https://example.supabase.co/storage/v1/object/public/avatars"
+
+
+def make_image(size: tuple[int, int], mode: str = "RGB", format: str = "PNG", color=(255, 0, 0)) -> bytes:
+    output = io.BytesIO()
+    Image.new(mode, size, color).save(output, format=format)
+    return output.getvalue()
+
+
+def test_variants_are_square_webp():
+    variants = render_variants(make_image((800, 600)))
+
+    assert set(variants) == {AVATAR_SIZE, AVATAR_THUMBNAIL_SIZE}
+    for size, data in variants.items():
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.format == "WEBP"
+            assert image.size == (size, size)
+
+
+def test_transparency_is_kept():
+    variants = render_variants(make_image((100, 100), mode="RGBA", color=(255, 0, 0, 128)), sizes=(64,))
+
+    with Image.open(io.BytesIO(variants[64])) as image:
+        assert image.mode == "RGBA"
+
+
+def test_thumbnail_is_smaller():
+    variants = render_variants(make_image((1024, 1024), format="JPEG"))
+
+    assert len(variants[AVATAR_THUMBNAIL_SIZE]) <= len(variants[AVATAR_SIZE])
+
+
+def test_same_content_same_path():
+    data = make_image((10, 10))
+
+    assert variant_path(content_hash(data), 128) == variant_path(content_hash(bytes(data)), 128)
+    assert variant_path(DIGEST, 128) == f"variants/{DIGEST}/128.webp"
+
+
+def test_thumbnail_url_of_processed_avatar():
+    avatar_url = f"{BASE_URL}/{variant_path(DIGEST, AVATAR_SIZE)}"
+
+    assert thumbnail_url(avatar_url) == f"{BASE_URL}/{variant_path(DIGEST, AVATAR_THUMBNAIL_SIZE)}"
+
+
+def test_thumbnail_url_of_other_avatars():
+    assert thumbnail_url(None) is None
+    assert thumbnail_url(f"{BASE_URL}/user/1234") == f"{BASE_URL}/user/1234"
+    assert thumbnail_url("https://lh3.googleusercontent.com/a/photo.jpg") == "https://lh3.googleusercontent.com/a/photo.jpg"
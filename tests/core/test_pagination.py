@@ -0,0 +1,71 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import apply_keyset, decode_cursor, encode_cursor, keyset_filter, paginate
+
+
+class FakeQuery:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return call
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("2024-05-01T10:00:00.123+00:00", 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == ("2024-05-01T10:00:00.123+00:00", 42)
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor("2024-05-01", "abc")[:-2], ""])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
+
+
+def test_keyset_filter_breaks_ties_on_id():
+    assert keyset_filter("sent_at", ("2024-05-01", 7), "lt") == \
+           'sent_at.lt."2024-05-01",and(sent_at.eq."2024-05-01",id.lt.7)'
+
+
+def test_first_page_is_newest_first():
+    query = apply_keyset(FakeQuery(), "sent_at", 20)
+
+    assert query.calls == [
+        ("order", ("sent_at",), {"desc": True}),
+        ("order", ("id",), {"desc": True}),
+        ("limit", (21,), {}),
+    ]
+
+
+def test_after_cursor_reads_forward():
+    query = apply_keyset(FakeQuery(), "sent_at", 20, after=encode_cursor("2024-05-01", 7))
+
+    assert query.calls[0] == ("or_", ('sent_at.gt."2024-05-01",and(sent_at.eq."2024-05-01",id.gt.7)',), {})
+    assert query.calls[1] == ("order", ("sent_at",), {"desc": False})
+
+
+def test_before_cursor_reads_backward():
+    query = apply_keyset(FakeQuery(), "sent_at", 20, before=encode_cursor("2024-05-01", 7))
+
+    assert query.calls[0] == ("or_", ('sent_at.lt."2024-05-01",and(sent_at.eq."2024-05-01",id.lt.7)',), {})
+    assert query.calls[1] == ("order", ("sent_at",), {"desc": True})
+
+
+def test_nullable_column_keeps_nulls_last():
+    query = paginate(FakeQuery(), "rating", 10, encode_cursor(4, 7), desc=True, nullable=True)
+
+    assert query.calls[0] == ("or_", ('rating.lt."4",and(rating.eq."4",id.lt.7),rating.is.null',), {})
+    assert query.calls[1] == ("order", ("rating",), {"desc": True, "nullsfirst": False})
+
+
+def test_cursor_inside_nulls():
+    assert keyset_filter("rating", (None, 7), "gt", nullable=True) == "and(rating.is.null,id.gt.7)"
@@ -0,0 +1,174 @@
+from app.offers.search_index import OfferSearchIndex, price_bucket, tokenize
+
+
+def offer(id: int, title: str, description: str = "", subject_id: int = 1, level_id: int = 1, price: float = 80,
+          rating: float = 0) -> dict:
+    subjects = {1: "Matematyka", 2: "Fizyka", 3: "Język polski"}
+    return {
+        "id": id,
+        "title": title,
+        "description": description,
+        "subject_id": subject_id,
+        "subject_name": subjects[subject_id],
+        "level_id": level_id,
+        "level": f"Level {level_id}",
+        "price": price,
+        "tutor_rating": rating,
+    }
+
+
+def ids(result) -> list[int]:
+    return [offer["id"] for offer in result.offers]
+
+
+def test_tokenize_removes_polish_diacritics():
+    assert tokenize("Język Polski, matura 2025!") == ["jezyk", "polski", "matura", "2025"]
+    assert tokenize("Żółć") == ["zolc"]
+    assert tokenize(None) == []
+
+
+def test_price_bucket():
+    assert price_bucket(None) is None
+    assert price_bucket(0) == "0-50"
+    assert price_bucket(50) == "50-100"
+    assert price_bucket(250) == "200+"
+
+
+def test_search_ranks_by_relevance_and_requires_every_term():
+    index = OfferSearchIndex([
+        offer(1, "Matura z matematyki", "Przygotowanie do matury rozszerzonej"),
+        offer(2, "Korepetycje", "Matematyka dla liceum, przygotowanie do matury"),
+        offer(3, "Fizyka", "Przygotowanie do egzaminu", subject_id=2),
+    ])
+
+    assert ids(index.search("matura")) == [1]
+    assert ids(index.search("matur")) == [1, 2]
+    assert ids(index.search("przygotowanie matur")) == [1, 2]
+    assert ids(index.search("przygotowanie fizyka")) == [3]
+    assert ids(index.search("chemia")) == []
+
+
+def test_search_without_query_orders_by_rating():
+    index = OfferSearchIndex([offer(1, "A", rating=4.5), offer(2, "B", rating=5), offer(3, "C", rating=4.5)])
+
+    assert ids(index.search()) == [2, 1, 3]
+
+
+def test_filters_and_facets():
+    index = OfferSearchIndex([
+        offer(1, "Matematyka", subject_id=1, level_id=1, price=40),
+        offer(2, "Matematyka", subject_id=1, level_id=2, price=120),
+        offer(3, "Fizyka i matematyka", subject_id=2, level_id=1, price=90),
+        offer(4, "Polski", subject_id=3, level_id=1, price=60),
+    ])
+
+    result = index.search("matematyka", level_id=1)
+
+    assert sorted(ids(result)) == [1, 3]
+    assert result.total == 2
+    # Facets of a field ignore the filter of that field
+    assert {(facet.value, facet.label, facet.count) for facet in result.facets["level"]} == {
+        (1, "Level 1", 2), (2, "Level 2", 1)}
+    assert {(facet.value, facet.count) for facet in result.facets["subject"]} == {(1, 1), (2, 1)}
+    assert [(facet.value, facet.count) for facet in result.facets["price"]] == [("0-50", 1), ("50-100", 1)]
+
+    assert ids(index.search(min_price=50, max_price=100)) == [3, 4]
+
+
+def test_pages_follow_the_cursor():
+    index = OfferSearchIndex(offer(id, "Matematyka", rating=id % 3) for id in range(1, 11))
+
+    seen, after = [], None
+    while True:
+        result = index.search(limit=3, after=after)
+        assert result.total == 10
+        seen += ids(result)
+        if result.next_after is None:
+            break
+        after = result.next_after
+
+    assert seen == ids(index.search(limit=10))
+    assert sorted(seen) == list(range(1, 11))
+
+
+def test_updated_and_removed_offers():
+    index = OfferSearchIndex([offer(1, "Matematyka"), offer(2, "Fizyka", subject_id=2)])
+
+    index.add(offer(1, "Chemia organiczna", subject_id=3))
+    assert ids(index.search("matematyka")) == []
+    assert ids(index.search("chemia")) == [1]
+
+    index.remove(2)
+    index.remove(2)
+    assert 2 not in index
+    assert ids(index.search("fizyka")) == []
+    assert [facet.value for facet in index.search().facets["subject"]] == [3]
+
+
+def test_order_by_price_with_offset():
+    index = OfferSearchIndex([offer(1, "A", price=90), offer(2, "B", price=40), offer(3, "C", price=None),
+                              offer(4, "D", price=60)])
+
+    assert ids(index.search(order="ASC")) == [2, 4, 1, 3]
+    assert ids(index.search(order="DESC")) == [1, 4, 2, 3]
+    assert ids(index.search(order="ASC", limit=2, offset=1)) == [4, 1]
+    assert index.search(order="ASC", limit=2, offset=2).next_after is None
+
+
+def test_filter_by_tutor():
+    offers = [offer(1, "Matematyka"), offer(2, "Matematyka", subject_id=2), offer(3, "Matematyka")]
+    for document, tutor_id in zip(offers, ["a", "b", "c"]):
+        document["tutor_id"] = tutor_id
+    index = OfferSearchIndex(offers)
+
+    result = index.search("matematyka", tutor_ids={"a", "b"})
+
+    assert sorted(ids(result)) == [1, 2]
+    assert result.total == 2
+    assert {(facet.value, facet.count) for facet in result.facets["subject"]} == {(1, 1), (2, 1)}
+
+
+def browse_all(index: OfferSearchIndex, limit: int, **kwargs) -> list[int]:
+    seen, after = [], None
+    while True:
+        result = index.browse(limit=limit, after=after, **kwargs)
+        seen += ids(result)
+        if result.next_after is None:
+            return seen
+        after = result.next_after
+
+
+def test_browse_orders_and_pages():
+    index = OfferSearchIndex([offer(1, "A", price=90, rating=4), offer(2, "B", price=40, rating=5),
+                              offer(3, "C", price=None, rating=3), offer(4, "D", price=40, rating=4),
+                              offer(5, "E", price=120, rating=None, subject_id=2)])
+
+    assert browse_all(index, 2, sort_by="price") == [2, 4, 1, 5, 3]
+    assert browse_all(index, 2, sort_by="price", descending=True) == [5, 1, 2, 4, 3]
+    assert browse_all(index, 3, sort_by="rating", descending=True) == [2, 1, 4, 3, 5]
+    assert browse_all(index, 1, sort_by="id", descending=True) == [5, 4, 3, 2, 1]
+    assert browse_all(index, 1, sort_by="price", subject_id=1, max_price=90) == [2, 4, 1]
+    assert index.browse(limit=5).next_after is None
+
+
+def test_browse_sees_changes():
+    index = OfferSearchIndex([offer(1, "A", price=90), offer(2, "B", price=40)])
+    assert ids(index.browse()) == [2, 1]
+
+    index.add(offer(2, "B", price=100))
+    index.add(offer(3, "C", price=10))
+    index.remove(1)
+
+    assert ids(index.browse()) == [3, 2]
+
+
+def test_count_is_estimated_above_the_threshold():
+    index = OfferSearchIndex(offer(id, "A", subject_id=1 + id % 2) for id in range(100))
+
+    assert index.count() == (100, True)
+    assert index.count(subject_id=2) == (50, True)
+    assert index.count(subject_id=2, exact_up_to=50) == (50, True)
+
+    estimate, exact = index.count(subject_id=2, exact_up_to=10)
+    assert not exact
+    assert 40 <= estimate <= 60
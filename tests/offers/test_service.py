@@ -0,0 +1,228 @@
+import pytest
+from fastapi import HTTPException
+
+from app.offers import service
+from app.offers.dataclasses import CreateOffer, OfferPriceUpdate, UpdateOfferRequest
+from app.offers.search import to_search_document
+from app.offers.search_index import OfferSearchIndex
+from app.offers.service import CountMode, OffersService, OfferSortBy
+
+CREATED_AT = "2026-01-01T00:00:00+00:00"
+
+
+class Response:
+    def __init__(self, data: list):
+        self.data = data
+
+
+class FakeDatabase:
+    """Offers and tutor subjects in memory, answering the filtered writes and reads of ``OffersService``."""
+
+    def __init__(self, offers: list[dict]):
+        self.offers = {offer["id"]: offer for offer in offers}
+        self.tutor_subjects = set()
+        self.requests = []
+
+    async def execute(self, query):
+        method = str(query.http_method).split(".")[-1]
+        self.requests.append((method, query.path))
+        filters = dict(query.params)
+
+        if query.path == "/tutor_subjects":
+            self.tutor_subjects.update((row["tutor_id"], row["subject_id"]) for row in query.json)
+            return Response([])
+
+        if method == "POST":
+            rows = query.json if isinstance(query.json, list) else [query.json]
+            created = []
+            for row in rows:
+                offer = {**row, "id": max(self.offers, default=0) + 1, "created_at": CREATED_AT}
+                self.offers[offer["id"]] = offer
+                created.append(_with_related(offer))
+            return Response(created)
+
+        matching = [offer for offer in self.offers.values() if _matches(offer, filters)]
+        if method == "PATCH":
+            for offer in matching:
+                offer.update(query.json)
+        elif method == "DELETE":
+            for offer in matching:
+                del self.offers[offer["id"]]
+        return Response([_with_related(offer) for offer in matching])
+
+
+def _matches(offer: dict, filters: dict) -> bool:
+    for column in ("id", "tutor_id"):
+        if column not in filters:
+            continue
+        operator, value = filters[column].split(".", 1)
+        values = value[1:-1].split(",") if operator == "in" else [value]
+        if str(offer[column]) not in values:
+            return False
+    return True
+
+
+def _with_related(offer: dict) -> dict:
+    return {
+        **offer,
+        "subjects": offer.get("subject_id") and {"id": offer["subject_id"], "name": "Matematyka",
+                                                 "icon_url": "icon.png", "is_custom": False},
+        "levels": offer.get("level_id") and {"id": offer["level_id"], "level": "Liceum"},
+        "tutor_profiles": {"rating": 4.5, "profiles": {"full_name": "Jan Kowalski", "avatar_url": None}},
+    }
+
+
+def offer(id: int, tutor_id: str = "tutor", price: float = 50) -> dict:
+    return {"id": id, "tutor_id": tutor_id, "title": "Matematyka", "description": "", "price": price,
+            "subject_id": 1, "level_id": 1, "is_active": True, "created_at": CREATED_AT}
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase([offer(1), offer(2), offer(3, tutor_id="other")])
+    monkeypatch.setattr(service, "execute", database.execute)
+    monkeypatch.setattr(service.offer_search, "index", OfferSearchIndex())
+    return database
+
+
+@pytest.mark.asyncio
+async def test_update_links_subject_of_written_offer(database):
+    await OffersService().update_offer(1, UpdateOfferRequest(subject_id=2, price=60, level_id=1), "tutor")
+
+    assert database.offers[1]["price"] == 60
+    assert database.tutor_subjects == {("tutor", 2)}
+    assert 1 in service.offer_search.index
+
+
+@pytest.mark.asyncio
+async def test_update_of_other_tutors_offer_links_nothing(database):
+    with pytest.raises(HTTPException) as error:
+        await OffersService().update_offer(3, UpdateOfferRequest(subject_id=2, price=60, level_id=1), "tutor")
+
+    assert error.value.status_code == 403
+    assert database.offers[3]["price"] == 50
+    assert database.tutor_subjects == set()
+
+    with pytest.raises(HTTPException) as error:
+        await OffersService().update_offer(42, UpdateOfferRequest(subject_id=2, price=60, level_id=1), "tutor")
+    assert error.value.status_code == 404
+    assert database.tutor_subjects == set()
+
+
+def statuses(response) -> list[tuple]:
+    return [(result.id, result.status) for result in response.results]
+
+
+@pytest.mark.asyncio
+async def test_set_offers_active_maps_every_offer(database):
+    response = await OffersService().set_offers_active([42, 1, 3, 1, 2], False, "tutor")
+
+    # Repeated ids get one result, at their first position
+    assert statuses(response) == [(42, 404), (1, 200), (3, 403), (2, 200)]
+    assert [offer["is_active"] for offer in database.offers.values()] == [False, False, True]
+    assert response.results[1].offer.is_active is False
+    assert response.results[0].detail == "Offer with id 42 not found."
+
+
+@pytest.mark.asyncio
+async def test_update_offer_prices_groups_by_price(database):
+    prices = [OfferPriceUpdate(id=2, price=70), OfferPriceUpdate(id=3, price=70), OfferPriceUpdate(id=1, price=60),
+              OfferPriceUpdate(id=2, price=80), OfferPriceUpdate(id=42, price=60)]
+
+    response = await OffersService().update_offer_prices(prices, "tutor")
+
+    # The last price of a repeated id counts, its result stays at its first position
+    assert statuses(response) == [(2, 200), (3, 403), (1, 200), (42, 404)]
+    assert {id: offer["price"] for id, offer in database.offers.items()} == {1: 60, 2: 80, 3: 50}
+    assert [method for method, path in database.requests if path == "/offers"].count("PATCH") == 3
+
+
+@pytest.mark.asyncio
+async def test_all_written_batch_reads_no_owners(database):
+    await OffersService().set_offers_active([1, 2], False, "tutor")
+
+    assert database.requests == [("PATCH", "/offers")]
+
+
+@pytest.mark.asyncio
+async def test_create_offers_skips_unknown_references(monkeypatch, database):
+    async def get_by_id(table, id):
+        return {"id": id} if id == 1 else None
+
+    monkeypatch.setattr(service.reference_data, "get_by_id", get_by_id)
+    new_offer = dict(price=40, title="Fizyka", description="", is_active=True, level_id=1)
+    offers = [CreateOffer(**new_offer, subject_id=1), CreateOffer(**new_offer, subject_id=9),
+              CreateOffer(**new_offer, subject_id=None), CreateOffer(**new_offer, subject_id=1)]
+
+    response = await OffersService().create_offers(offers, "tutor")
+
+    assert statuses(response) == [(4, 201), (None, 400), (5, 201), (6, 201)]
+    assert response.results[1].detail == "Subject or level does not exist."
+    created = [result.offer for result in response.results if result.offer]
+    assert [offer.subject and offer.subject.id for offer in created] == [1, None, 1]
+    assert database.tutor_subjects == {("tutor", 1)}
+    assert [method for method, path in database.requests if path == "/offers"] == ["POST"]
+
+
+class FakeAvailabilityIndex:
+    def __init__(self, free_tutors: set[str]):
+        self.free = free_tutors
+        self.version = (None, 1)
+
+    async def free_tutors(self, start, end):
+        return self.free
+
+
+@pytest.fixture
+def search_index(monkeypatch, database):
+    index = OfferSearchIndex(to_search_document(_with_related(offer)) for offer in database.offers.values())
+    monkeypatch.setattr(service.offer_search, "index", index)
+    return index
+
+
+@pytest.mark.asyncio
+async def test_cursor_is_refused_for_another_order(search_index):
+    page = await OffersService().get_active_offers_page(limit=1)
+    assert [offer.id for offer in page.offers] == [1]
+
+    next_page = await OffersService().get_active_offers_page(limit=1, cursor=page.next_cursor)
+    assert [offer.id for offer in next_page.offers] == [2]
+
+    with pytest.raises(HTTPException) as error:
+        await OffersService().get_active_offers_page(sort_by=OfferSortBy.rating, limit=1, cursor=page.next_cursor)
+    assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_pages_follow_the_cursor(monkeypatch, database):
+    offers = [_with_related(offer(id)) for id in range(1, 6)]
+    monkeypatch.setattr(service.offer_search, "index", OfferSearchIndex(to_search_document(row) for row in offers))
+
+    ids, cursor = [], None
+    for _ in range(3):
+        page = await OffersService().search_offers("matem", limit=2, cursor=cursor)
+        ids += [offer.id for offer in page.offers]
+        cursor = page.next_cursor
+        if not page.has_more:
+            break
+
+    assert sorted(ids) == [1, 2, 3, 4, 5]
+    assert cursor is None
+
+    # Cursors of the search and of the active offers list are not interchangeable
+    first_page = await OffersService().search_offers("matem", limit=2)
+    with pytest.raises(HTTPException) as error:
+        await OffersService().get_active_offers_page(limit=2, cursor=first_page.next_cursor)
+    assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_date_filtered_count_follows_availability(monkeypatch, search_index):
+    availability = FakeAvailabilityIndex({"tutor"})
+    monkeypatch.setattr(service, "availability_index", availability)
+    dates = dict(start_date="2026-01-05T09:00:00Z", end_date="2026-01-05T12:00:00Z", count=CountMode.exact)
+
+    assert (await OffersService().get_active_offers_page(**dates)).total_records == 2
+
+    availability.free, availability.version = {"tutor", "other"}, (None, 2)
+    assert (await OffersService().get_active_offers_page(**dates)).total_records == 3
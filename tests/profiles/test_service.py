@@ -0,0 +1,137 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.images import AVATAR_SIZE, AVATAR_SIZES, variant_path
+from app.core.storage import UploadUrl
+from app.profiles import service
+from app.profiles.avatars import UnconfirmedUploads
+from app.profiles.service import ProfilesService
+
+
+class FakeProfiles:
+    def __init__(self, profile: dict):
+        self.profile = profile
+
+    async def get(self, id):
+        return dict(self.profile)
+
+    async def update(self, data, id):
+        self.profile.update(data)
+        return dict(self.profile)
+
+
+@pytest.fixture
+def avatars(monkeypatch):
+    avatars = {"removed": [], "submitted": []}
+
+    async def verify_upload(bucket, path, prefix, allowed_content_types, max_size):
+        return {"mimetype": "image/png", "size": 1}
+
+    async def create_upload_url(bucket, path):
+        return UploadUrl(signed_url=f"https://storage/{path}", token="token", path=path)
+
+    async def remove_avatar(self, url):
+        avatars["removed"].append(url)
+
+    monkeypatch.setattr(service, "verify_upload", verify_upload)
+    monkeypatch.setattr(service, "create_upload_url", create_upload_url)
+    monkeypatch.setattr(service, "invalidate_profile", lambda user_id: None)
+    monkeypatch.setattr(service.avatar_processor, "submit", lambda user_id, path: avatars["submitted"].append(path))
+    monkeypatch.setattr(ProfilesService, "remove_avatar", remove_avatar)
+    monkeypatch.setattr(service, "unconfirmed_avatars", UnconfirmedUploads("avatars", "profiles", "avatar_url"))
+    monkeypatch.setattr(service, "crud_provider", FakeProfiles({
+        "id": "user", "full_name": "Jan Kowalski", "is_tutor": False,
+        "avatar_url": service.public_url("avatars", "user/old"),
+    }))
+    return avatars
+
+
+@pytest.mark.asyncio
+async def test_confirming_avatar_twice_keeps_it(avatars):
+    upload_url = await ProfilesService().create_avatar_upload_url("user", "image/png")
+    assert len(service.unconfirmed_avatars) == 1
+
+    await ProfilesService().confirm_avatar_upload("user", upload_url.path)
+    profile = await ProfilesService().confirm_avatar_upload("user", upload_url.path)
+
+    assert profile.avatar_url == service.public_url("avatars", upload_url.path)
+    assert avatars["removed"] == [service.public_url("avatars", "user/old")]
+    assert avatars["submitted"] == [upload_url.path]
+    assert len(service.unconfirmed_avatars) == 0
+
+
+class FakeAvatarsBucket:
+    def __init__(self, paths: set):
+        self.paths = paths
+
+    def download(self, path):
+        return b"image"
+
+    def exists(self, path):
+        return path in self.paths
+
+    def upload(self, file, path, file_options):
+        self.paths.add(path)
+
+
+@pytest.fixture
+def avatars_module(monkeypatch):
+    # The module the service uses (imported from the app directory)
+    module = sys.modules[service.remove_variants.__module__]
+    storage = {"removed": [], "avatar_urls": []}
+
+    async def execute(query):
+        params = dict(query.params)
+        if "avatar_url" in params and str(query.http_method).endswith("GET"):
+            suffix = params["avatar_url"].removeprefix("like.*")
+            return SimpleNamespace(data=[{"id": "other"} for url in storage["avatar_urls"] if url.endswith(suffix)])
+        return SimpleNamespace(data=[])
+
+    async def remove_objects(bucket, paths):
+        storage["removed"].extend(paths)
+
+    monkeypatch.setattr(module, "execute", execute)
+    monkeypatch.setattr(module, "remove_objects", remove_objects)
+    return module, storage
+
+
+@pytest.mark.asyncio
+async def test_removed_avatar_variants_are_deleted_when_unused(avatars_module):
+    _, storage = avatars_module
+
+    await ProfilesService().remove_avatar(service.public_url("avatars", variant_path("abc", AVATAR_SIZE)))
+
+    assert storage["removed"] == [variant_path("abc", size) for size in AVATAR_SIZES]
+
+
+@pytest.mark.asyncio
+async def test_avatar_variants_used_by_another_profile_are_kept(avatars_module):
+    _, storage = avatars_module
+    storage["avatar_urls"].append(service.public_url("avatars", variant_path("abc", AVATAR_SIZE)))
+
+    await ProfilesService().remove_avatar(service.public_url("avatars", variant_path("abc", AVATAR_SIZE)))
+
+    assert storage["removed"] == []
+
+
+@pytest.mark.asyncio
+async def test_only_missing_avatar_sizes_are_rendered(monkeypatch, avatars_module):
+    module, _ = avatars_module
+    digest = module.content_hash(b"image")
+    bucket = FakeAvatarsBucket({variant_path(digest, AVATAR_SIZE)})
+    rendered = []
+
+    def render_variants(data, sizes):
+        rendered.extend(sizes)
+        return {size: b"webp" for size in sizes}
+
+    monkeypatch.setattr(module, "supabase", SimpleNamespace(storage=SimpleNamespace(from_=lambda name: bucket),
+                                                            table=service.supabase.table))
+    monkeypatch.setattr(module, "render_variants", render_variants)
+
+    await module.AvatarProcessor().process("user", "user/original")
+
+    assert rendered == [size for size in AVATAR_SIZES if size != AVATAR_SIZE]
+    assert bucket.paths == {variant_path(digest, size) for size in AVATAR_SIZES}
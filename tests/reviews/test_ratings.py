@@ -0,0 +1,137 @@
+import pytest
+
+from app.reviews import ratings
+from app.reviews.ratings import RatingAggregate, RatingAggregates
+
+
+class FakeDatabase:
+    """Answers the queries of ``RatingAggregates`` from in-memory reviews and records the saved ratings."""
+
+    def __init__(self, reviews: dict[str, list]):
+        self.reviews = reviews
+        self.ratings = {}
+        self.saved = {}
+        self.fail_saves = 0
+
+    async def execute(self, query):
+        params = dict(query.params)
+        tutor_id = params.get("tutor_id", params.get("id", ""))[3:]
+
+        if query.path == "/reviews":
+            tutor_ids = tutor_id[1:-1].split(",") if tutor_id.startswith("(") else [tutor_id]
+            return Response([{"tutor_id": tutor_id, "rating": rating}
+                             for tutor_id in tutor_ids for rating in self.reviews.get(tutor_id, [])])
+        if query.path == "/tutor_profiles" and "select" in params:
+            return Response([{"id": tutor_id, "rating": rating} for tutor_id, rating in self.ratings.items()])
+
+        if self.fail_saves:
+            self.fail_saves -= 1
+            raise Exception("Database unavailable")
+        self.saved[tutor_id] = query.json["rating"]
+        return Response([])
+
+
+class Response:
+    def __init__(self, data: list):
+        self.data = data
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase({"tutor": [5, 4, None, 3]})
+    monkeypatch.setattr(ratings, "execute", database.execute)
+    monkeypatch.setattr(ratings, "invalidate_tutor_profile", lambda tutor_id: None)
+    return database
+
+
+def test_aggregate_skips_reviews_without_rating():
+    aggregate = RatingAggregate([5, None, 4])
+
+    assert aggregate.count == 2
+    assert aggregate.average == 4.5
+    assert aggregate.histogram == [0, 0, 0, 1, 1]
+
+    aggregate.remove(None)
+    assert aggregate.count == 2
+
+
+def test_aggregate_add_and_remove():
+    aggregate = RatingAggregate([5, 3])
+    aggregate.add(1)
+    aggregate.remove(5)
+
+    assert aggregate.average == 2
+    assert aggregate.histogram == [1, 0, 1, 0, 0]
+    assert RatingAggregate().average == 0
+
+
+@pytest.mark.asyncio
+async def test_aggregates_load_and_update(database):
+    aggregates = RatingAggregates()
+
+    assert (await aggregates.get("tutor")).average == 4
+
+    database.reviews["tutor"].append(2)
+    await aggregates.review_written("tutor")
+    assert database.saved["tutor"] == 3.5
+    assert (await aggregates.get("tutor")).average == 3.5
+
+    database.reviews["tutor"].remove(5)
+    await aggregates.review_written("tutor")
+    assert database.saved["tutor"] == 3
+
+
+@pytest.mark.asyncio
+async def test_writes_of_other_workers_are_counted(database):
+    aggregates = RatingAggregates()
+    await aggregates.get("tutor")
+    # Written by another worker, this worker's aggregate is stale
+    database.reviews["tutor"].append(1)
+
+    database.reviews["tutor"].append(2)
+    await aggregates.review_written("tutor")
+
+    assert database.saved["tutor"] == 3
+    assert (await aggregates.get("tutor")).average == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_save_does_not_raise(database):
+    aggregates = RatingAggregates()
+    await aggregates.get("tutor")
+    database.fail_saves = 1
+
+    await aggregates.review_written("tutor")
+    assert "tutor" not in database.saved
+    assert len(aggregates._aggregates) == 0
+
+    database.reviews["tutor"].append(2)
+    await aggregates.review_written("tutor")
+    assert database.saved["tutor"] == 3.5
+
+
+@pytest.mark.asyncio
+async def test_aggregates_are_bounded(database, monkeypatch):
+    monkeypatch.setattr(ratings, "RATING_AGGREGATES_CACHE_SIZE", 2)
+    aggregates = RatingAggregates()
+
+    for tutor_id in ["a", "b", "c", "tutor"]:
+        await aggregates.get(tutor_id)
+
+    assert len(aggregates._aggregates) == 2
+    assert (await aggregates.get("tutor")).average == 4
+
+
+@pytest.mark.asyncio
+async def test_reconcile_fixes_stale_ratings_and_aggregates(database):
+    aggregates = RatingAggregates()
+    database.reviews["other"] = [2]
+    database.ratings = {"tutor": 4, "other": 2, "new": 3}
+    await aggregates.get("tutor")
+    # Written by another worker
+    database.reviews["tutor"].append(1)
+
+    await aggregates.reconcile()
+
+    assert database.saved == {"tutor": 3.25, "new": 0}
+    assert (await aggregates.get("tutor")).average == 3.25
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.reviews import service
+from app.reviews.service import Order, ReviewsService, SortBy
+
+
+class FakeReviews:
+    def __init__(self, reviews: dict[int, dict]):
+        self.reviews = reviews
+
+    async def delete(self, id):
+        return self.reviews.pop(id)
+
+
+@pytest.mark.asyncio
+async def test_review_write_invalidates_tutor_profile_when_rating_fails(monkeypatch):
+    invalidated = []
+
+    async def review_written(tutor_id):
+        # Errors are logged and swallowed by the aggregates
+        return None
+
+    monkeypatch.setattr(service, "crud_provider", FakeReviews({1: {
+        "id": 1, "student_id": "student", "tutor_id": "tutor", "rating": 5, "comment": "Super",
+        "created_at": "2025-01-01T10:00:00+00:00",
+    }}))
+    monkeypatch.setattr(service.rating_aggregates, "review_written", review_written)
+    monkeypatch.setattr(service, "invalidate_tutor_profile", invalidated.append)
+
+    await ReviewsService().delete_review(1)
+
+    # reviews_count of the cached profile changed even though the rating was not saved
+    assert invalidated == ["tutor"]
+
+
+@pytest.fixture
+def reviews(monkeypatch):
+    rows = [{"id": id, "rating": rating, "comment": "Super", "created_at": f"2025-01-0{id}T10:00:00+00:00",
+             "student_id": "student"} for id, rating in [(1, 5), (2, 4), (3, 4), (4, 2)]]
+    queries = []
+
+    async def execute(query):
+        queries.append(dict(query.params))
+        # Only the rating order is answered, after the keyset of the cursor if there is one
+        params = dict(query.params)
+        start = 0
+        if "or" in params:
+            start = next(i for i, row in enumerate(rows) if f"id.lt.{row['id']}" in params["or"]) + 1
+        return SimpleNamespace(data=rows[start:start + int(params["limit"])])
+
+    monkeypatch.setattr(service, "execute", execute)
+    monkeypatch.setattr(service, "tutor_reviews_cache", service.tutor_reviews_cache.__class__(max_size=10, ttl=60))
+    return queries
+
+
+@pytest.mark.asyncio
+async def test_reviews_pages_follow_the_cursor(reviews):
+    first = await ReviewsService().get_tutor_reviews_page("tutor", SortBy.rating, Order.decreasing, 2, compact=True)
+    second = await ReviewsService().get_tutor_reviews_page("tutor", SortBy.rating, Order.decreasing, 2,
+                                                           first.next_cursor, compact=True)
+
+    assert [review.id for review in first.reviews] == [1, 2]
+    assert [review.id for review in second.reviews] == [3, 4]
+    assert reviews[-1]["or"] == '(rating.lt."4",and(rating.eq."4",id.lt.2),rating.is.null)'
+
+
+@pytest.mark.asyncio
+async def test_reviews_cursor_of_another_order_is_refused(reviews):
+    first = await ReviewsService().get_tutor_reviews_page("tutor", SortBy.rating, Order.decreasing, 2, compact=True)
+
+    for sort_by, order in [(SortBy.date, Order.decreasing), (SortBy.rating, Order.increasing)]:
+        with pytest.raises(HTTPException) as error:
+            await ReviewsService().get_tutor_reviews_page("tutor", sort_by, order, 2, first.next_cursor)
+        assert error.value.status_code == 400
+
+    # A plain cursor is not a reviews cursor
+    with pytest.raises(HTTPException) as error:
+        await ReviewsService().get_tutor_reviews_page("tutor", SortBy.rating, Order.decreasing, 2,
+                                                      service.encode_cursor(4, 2))
+    assert error.value.status_code == 400
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+
+from app.tutors_availability.bitmap import FreeSlotBitmaps, has_run
+
+ORIGIN = datetime(2025, 3, 3, tzinfo=timezone.utc)  # Monday
+MIN_DURATION = timedelta(minutes=45)
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    return ORIGIN + timedelta(days=day, hours=hour, minutes=minute)
+
+
+def test_has_run():
+    assert has_run(0b111, 3)
+    assert not has_run(0b1101101, 3)
+    assert has_run(0b1101111, 4)
+    assert not has_run(0, 1)
+    assert has_run(((1 << 40) - 1) << 7, 40)
+    assert not has_run(((1 << 40) - 1) << 7, 41)
+
+
+def test_partially_free_slots_are_not_free():
+    bitmaps = FreeSlotBitmaps(ORIGIN, 7 * 96)
+    bitmaps.set("a", [(at(0, 10, 5), at(0, 11, 10))])
+
+    # 10:15 - 11:00 is the only time free in whole slots
+    assert bitmaps.free_tutors(at(0, 10), at(0, 12), MIN_DURATION) == {"a"}
+    assert bitmaps.free_tutors(at(0, 10), at(0, 12), timedelta(hours=1)) == set()
+
+
+def test_free_tutors_within_window():
+    bitmaps = FreeSlotBitmaps(ORIGIN, 7 * 96)
+    bitmaps.set("a", [(at(1, 17), at(1, 19))])
+    bitmaps.set("b", [(at(1, 16), at(1, 17, 30))])
+    bitmaps.set("c", [(at(1, 17), at(1, 17, 30)), (at(1, 18), at(1, 18, 30))])
+    bitmaps.set("d", [(at(2, 17), at(2, 19))])
+
+    assert bitmaps.free_tutors(at(1, 17), at(1, 19), MIN_DURATION) == {"a"}
+    assert bitmaps.free_tutors(at(1, 16), at(1, 19), MIN_DURATION) == {"a", "b"}
+    # Shorter than the minimum duration: the whole window has to be free
+    assert bitmaps.free_tutors(at(1, 17), at(1, 17, 30), MIN_DURATION) == {"a", "b", "c"}
+    assert bitmaps.free_tutors(at(1, 17, 10), at(1, 17, 40), MIN_DURATION) == {"a"}
+    assert bitmaps.free_tutors(at(1, 0), at(3, 0), MIN_DURATION, tutor_ids=["a", "d", "x"]) == {"a", "d"}
+
+
+def test_replaced_and_removed_tutors():
+    bitmaps = FreeSlotBitmaps(ORIGIN, 7 * 96)
+    bitmaps.set("a", [(at(0, 8), at(0, 12))])
+    bitmaps.set("a", [(at(3, 8), at(3, 12))])
+
+    assert bitmaps.free_tutors(at(0, 0), at(1, 0), MIN_DURATION) == set()
+    assert bitmaps.free_tutors(at(3, 0), at(4, 0), MIN_DURATION) == {"a"}
+
+    bitmaps.remove("a")
+    assert "a" not in bitmaps
+    assert bitmaps.free_tutors(at(3, 0), at(4, 0), MIN_DURATION) == set()
+
+
+def test_blocks_are_clipped_to_the_bitmaps():
+    bitmaps = FreeSlotBitmaps(ORIGIN, 96)
+    bitmaps.set("a", [(ORIGIN - timedelta(hours=2), at(0, 1)), (at(0, 23), at(1, 5))])
+
+    assert bitmaps.covers(at(0, 1), at(1, 0))
+    assert not bitmaps.covers(at(0, 1), at(1, 1))
+    assert bitmaps.free_tutors(ORIGIN, at(0, 1), MIN_DURATION) == {"a"}
+    assert bitmaps.free_tutors(at(0, 23), at(1, 0), MIN_DURATION) == {"a"}
@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+from app.tutors_availability import cache
+from app.tutors_availability.cache import FreeSlotCache
+
+MONTH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+BLOCKS = [(datetime(2026, 1, 5, 9, tzinfo=timezone.utc), datetime(2026, 1, 5, 12, tzinfo=timezone.utc))]
+
+
+def test_blocks_read_before_invalidation_are_not_stored():
+    free_slots = FreeSlotCache(max_size=10, ttl=60)
+    version = free_slots.version("tutor")
+
+    free_slots.invalidate("tutor")
+    free_slots.set("tutor", MONTH, BLOCKS, version)
+    assert free_slots.get("tutor", MONTH) is None
+
+    free_slots.set("tutor", MONTH, BLOCKS, free_slots.version("tutor"))
+    assert free_slots.get("tutor", MONTH) == BLOCKS
+
+
+def test_changed_since():
+    free_slots = FreeSlotCache(max_size=10, ttl=60)
+    free_slots.invalidate("a")
+    version = free_slots.last_version
+
+    free_slots.invalidate("b")
+    free_slots.invalidate("c")
+    free_slots.invalidate("b")
+
+    assert sorted(free_slots.changed_since(version)) == ["b", "c"]
+    assert free_slots.changed_since(free_slots.last_version) == []
+
+
+def test_old_versions_are_forgotten(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    free_slots = FreeSlotCache(max_size=10, ttl=60)
+    free_slots.invalidate("a")
+    version = free_slots.version("a")
+    old_version = free_slots.last_version
+
+    now[0] += 61
+    free_slots.invalidate("b")
+
+    assert len(free_slots._versions) == 1
+    # Versions never go back, so blocks read before the invalidation of "a" are still refused
+    assert free_slots.version("a") == version
+    free_slots.set("other", MONTH, BLOCKS, 0)
+    assert free_slots.get("other", MONTH) is None
+    # Which tutors changed is not known anymore
+    assert free_slots.changed_since(old_version - 1) is None
+    assert free_slots.changed_since(old_version) == ["b"]
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from app.tutors_availability import cache, invalidation
+from app.tutors_availability.invalidation import FreeSlotInvalidations
+
+
+class FakePubSub:
+    """Delivers every published message back to the subscriber, like a Redis channel shared by the workers."""
+
+    def __init__(self):
+        self.handler = None
+        self.published = []
+
+    async def start(self, handler):
+        self.handler = handler
+
+    async def stop(self):
+        self.handler = None
+
+    async def publish(self, message):
+        self.published.append(json.loads(message))
+        await self.handler(message)
+
+
+@pytest.fixture
+def invalidated(monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(invalidation.free_slot_cache, "invalidate", invalidated.append)
+    monkeypatch.setattr(cache.free_slot_cache, "invalidate", invalidated.append)
+    return invalidated
+
+
+@pytest.mark.asyncio
+async def test_local_invalidations_are_published_once(invalidated):
+    pubsub = FakePubSub()
+    invalidations = FreeSlotInvalidations(pubsub)
+    await invalidations.start()
+
+    cache.invalidate_tutor_free_slots("tutor")
+    await invalidations.stop()
+
+    assert [message["tutor_id"] for message in pubsub.published] == ["tutor"]
+    # Not invalidated again when its own message comes back
+    assert invalidated == ["tutor"]
+    assert cache.invalidation_listeners == []
+
+
+@pytest.mark.asyncio
+async def test_invalidations_of_other_workers_are_applied(invalidated):
+    pubsub = FakePubSub()
+    invalidations = FreeSlotInvalidations(pubsub)
+    await invalidations.start()
+
+    await pubsub.publish(json.dumps({"origin": "other worker", "tutor_id": "tutor"}))
+    await invalidations.stop()
+
+    assert invalidated == ["tutor"]
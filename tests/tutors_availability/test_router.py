@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.tutors_availability import router
+
+BLOCK = (datetime(2026, 1, 5, 9, tzinfo=timezone.utc), datetime(2026, 1, 5, 12, tzinfo=timezone.utc))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    requested = []
+
+    async def get_free_blocks(tutor_ids, start_date, end_date):
+        requested.append((start_date, end_date))
+        return {tutor_id: [BLOCK] for tutor_id in tutor_ids if tutor_id != "missing"}
+
+    monkeypatch.setattr(router.tutors_availability_service, "_get_free_blocks", get_free_blocks)
+    app = FastAPI()
+    app.include_router(router.tutors_availability_router)
+    client = TestClient(app)
+    client.requested = requested
+    return client
+
+
+def test_batch_without_dates_reads_until_end_of_month(client):
+    response = client.post("/tutors/available-hours", json={"tutor_ids": ["a", "missing"]})
+
+    assert response.status_code == 200
+    tutors = response.json()["tutors"]
+    assert len(tutors["a"]["available_blocks"]) == 1
+    assert tutors["missing"]["available_blocks"] == []
+
+    start_date, end_date = client.requested[0]
+    assert start_date.tzinfo == end_date.tzinfo == timezone.utc
+    assert (end_date.year, end_date.month) == (start_date.year, start_date.month)
+
+
+def test_tutor_without_dates_reads_until_end_of_month(client):
+    response = client.get("/tutors/a/available-hours")
+
+    assert response.status_code == 200
+    assert len(response.json()["available_blocks"]) == 1
+    assert client.requested[0][1].tzinfo == timezone.utc
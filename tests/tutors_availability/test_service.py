@@ -1,11 +1,11 @@
 import pytest
 from datetime import datetime, timedelta, timezone
-from unittest.mock import patch, MagicMock, Mock
+from unittest.mock import patch, AsyncMock, MagicMock, Mock
 import os
 
 # We need to modify these before importing anything from the app
 os.environ['SUPABASE_URL'] = 'https://example.supabase.co'
-os.environ['SUPABASE_KEY'] = 'mock_key'
+os.environ['SUPABASE_KEY'] = 'mock.key.signature'
 
 # Mock the imports to avoid the real dependencies
 import sys
@@ -27,6 +27,7 @@ sys.modules['app.core.db_connection'] = MagicMock(
 # Now import from app
 from app.tutors_availability.service import TutorsAvailabilityService, merge_overlapping_blocks
 from app.tutors_availability.dataclasses import AvailableTimeBlock, TutorAvailabilityResponse
+from app.tutors_availability.cache import FreeSlotCache
 
 
 @pytest.fixture
@@ -43,95 +44,65 @@ class TestTutorsAvailabilityService:
     
     @pytest.mark.asyncio
     async def test_booking_status_filtering(self, service):
-        """Test that confirmed bookings are correctly filtered."""
-        # Mock bookings data
-        with patch('app.core.db_connection.get_tutor_bookings') as mock_get_bookings:
-            mock_bookings = [
-                {"booking_id": "1", "status": "CONFIRMED", "start_time": "2023-05-01T10:00:00Z", "end_time": "2023-05-01T11:00:00Z"},
-                {"booking_id": "2", "status": "PENDING", "start_time": "2023-05-01T12:00:00Z", "end_time": "2023-05-01T13:00:00Z"},
-                {"booking_id": "3", "status": "CANCELLED", "start_time": "2023-05-01T14:00:00Z", "end_time": "2023-05-01T15:00:00Z"},
-                {"booking_id": "4", "status": "CONFIRMED", "start_time": "2023-05-01T16:00:00Z", "end_time": "2023-05-01T17:00:00Z"},
-            ]
-            mock_get_bookings.return_value = mock_bookings
-            
-            # Get confirmed bookings for a specific date range
-            tutor_id = "test_tutor"
-            start_date = datetime(2023, 5, 1, tzinfo=timezone.utc)
-            end_date = datetime(2023, 5, 2, tzinfo=timezone.utc)
-            
-            confirmed_bookings = service._get_tutor_confirmed_bookings(tutor_id, start_date, end_date)
-            
-            # Verify only CONFIRMED bookings are returned
-            assert len(confirmed_bookings) == 2
-            assert all(booking["status"] == "CONFIRMED" for booking in confirmed_bookings)
-            assert any(booking["booking_id"] == "1" for booking in confirmed_bookings)
-            assert any(booking["booking_id"] == "4" for booking in confirmed_bookings)
+        """Test that only accepted bookings are requested, for all tutors at once, and grouped by tutor."""
+        queries = []
+
+        async def execute(query):
+            queries.append(query)
+            return Mock(data=[
+                {"id": 1, "offer_id": 7, "status": "accepted", "offers": {"tutor_id": "test_tutor"},
+                 "start_date": "2023-05-01T10:00:00Z", "end_date": "2023-05-01T11:00:00Z"},
+                {"id": 2, "offer_id": 8, "status": "accepted", "offers": {"tutor_id": "other_tutor"},
+                 "start_date": "2023-05-01T16:00:00Z", "end_date": "2023-05-01T17:00:00Z"},
+                {"id": 3, "offer_id": 7, "status": "accepted", "offers": {"tutor_id": "test_tutor"},
+                 "start_date": None, "end_date": None},
+            ])
+
+        start_date = datetime(2023, 5, 1, tzinfo=timezone.utc)
+        end_date = datetime(2023, 5, 2, tzinfo=timezone.utc)
+        with patch('app.tutors_availability.service.execute', execute):
+            confirmed_bookings = await service._get_confirmed_bookings(["test_tutor", "other_tutor"], start_date,
+                                                                       end_date)
+
+        params = dict(queries[0].params)
+        assert params["status"] == "eq.accepted"
+        assert params["offers.tutor_id"] == "in.(test_tutor,other_tutor)"
+        # Bookings without dates are skipped
+        assert [(booking["id"], booking["tutor_id"]) for booking in confirmed_bookings] == \
+            [(1, "test_tutor"), (2, "other_tutor")]
+        assert confirmed_bookings[0]["start_date"] == datetime(2023, 5, 1, 10, tzinfo=timezone.utc)
     
     @pytest.mark.asyncio
     async def test_availability_with_bookings_and_unavailability(self, service):
         """Test generating availability blocks with bookings and unavailability."""
-        # Mock data
         tutor_id = "test_tutor"
-        date = datetime(2023, 5, 1, tzinfo=timezone.utc)
-        
-        # Mock availability function to return a specific time range
-        with patch.object(service, '_get_tutor_availabilities') as mock_get_availabilities, \
-             patch('app.core.db_connection.get_tutor_unavailabilities') as mock_get_unavailabilities, \
-             patch('app.core.db_connection.get_tutor_bookings') as mock_get_bookings:
-            
-            # Tutor is available 9 AM - 5 PM
-            mock_get_availabilities.return_value = [
-                {
-                    "day_of_week": date.weekday(),
-                    "start_time": "09:00:00",
-                    "end_time": "17:00:00",
-                    "recurrence_rule": None
-                }
-            ]
-            
-            # Tutor has unavailability from 12-1 PM
-            mock_get_unavailabilities.return_value = [
-                {
-                    "id": "1",
-                    "start_time": "2023-05-01T12:00:00Z",
-                    "end_time": "2023-05-01T13:00:00Z"
-                }
-            ]
-            
-            # Tutor has a confirmed booking from 3-4 PM
-            mock_get_bookings.return_value = [
-                {
-                    "booking_id": "1",
-                    "status": "CONFIRMED",
-                    "start_time": "2023-05-01T15:00:00Z",
-                    "end_time": "2023-05-01T16:00:00Z"
-                }
-            ]
-            
-            # Get available hours
+
+        # Tutor is available 9 AM - 5 PM, unavailable 12-1 PM and has a confirmed booking 3-4 PM
+        availabilities = [{"tutor_id": tutor_id, "start_time": "2023-05-01T09:00:00Z",
+                           "end_time": "2023-05-01T17:00:00Z", "recurrence_rule": None}]
+        unavailabilities = [{"tutor_id": tutor_id, "start_time": "2023-05-01T12:00:00Z",
+                             "end_time": "2023-05-01T13:00:00Z"}]
+        bookings = [{"tutor_id": tutor_id, "status": "accepted",
+                     "start_date": datetime(2023, 5, 1, 15, tzinfo=timezone.utc),
+                     "end_date": datetime(2023, 5, 1, 16, tzinfo=timezone.utc)}]
+
+        with patch('app.tutors_availability.service.execute', AsyncMock(return_value=Mock(data=[{"id": tutor_id}]))), \
+             patch('app.tutors_availability.service.free_slot_cache', FreeSlotCache(max_size=10, ttl=60)), \
+             patch.object(service, '_get_availabilities', AsyncMock(return_value=availabilities)), \
+             patch.object(service, '_get_unavailabilities', AsyncMock(return_value=unavailabilities)), \
+             patch.object(service, '_get_confirmed_bookings', AsyncMock(return_value=bookings)):
             start_date = datetime(2023, 5, 1, tzinfo=timezone.utc)
             end_date = datetime(2023, 5, 1, 23, 59, 59, tzinfo=timezone.utc)
-            result = service.get_tutor_available_hours(tutor_id, start_date, end_date)
-            
-            # Verify result structure
-            assert isinstance(result, TutorAvailabilityResponse)
-            assert len(result.available_time_blocks) == 3
-            
-            # Expected available blocks after subtracting unavailability and bookings:
-            # 9 AM - 12 PM, 1 PM - 3 PM, 4 PM - 5 PM
-            blocks = sorted(result.available_time_blocks, key=lambda b: b.start_time)
-            
-            # First block: 9 AM - 12 PM
-            assert blocks[0].start_time.hour == 9
-            assert blocks[0].end_time.hour == 12
-            
-            # Second block: 1 PM - 3 PM
-            assert blocks[1].start_time.hour == 13
-            assert blocks[1].end_time.hour == 15
-            
-            # Third block: 4 PM - 5 PM
-            assert blocks[2].start_time.hour == 16
-            assert blocks[2].end_time.hour == 17
+            result = await service.get_tutor_available_hours(tutor_id, start_date, end_date)
+
+        # Verify result structure
+        assert isinstance(result, TutorAvailabilityResponse)
+        assert len(result.available_blocks) == 3
+
+        # Expected available blocks after subtracting unavailability and bookings:
+        # 9 AM - 12 PM, 1 PM - 3 PM, 4 PM - 5 PM
+        blocks = sorted(result.available_blocks, key=lambda b: b.start_date)
+        assert [(block.start_date.hour, block.end_date.hour) for block in blocks] == [(9, 12), (13, 15), (16, 17)]
 
 
 class TestMergeOverlappingBlocks:
@@ -1,10 +1,20 @@
+import random
 import pytest
 from datetime import datetime, timedelta, timezone
+from itertools import islice
 from app.tutors_availability.utils import (
     parse_recurrence_rule,
     get_weekday_num,
     generate_occurrences,
-    subtract_time_blocks
+    subtract_time_blocks,
+    merge_overlapping_blocks,
+    sweep_free_blocks,
+    iter_occurrences,
+    compile_recurrence,
+    iter_availability_blocks,
+    iter_free_blocks,
+    get_month_starts,
+    clip_blocks
 )
 
 
@@ -249,4 +259,195 @@ class TestTimeBlockSubtraction:
         
         assert len(result) == 2
         assert result[0] == (datetime(2025, 3, 28, 16, 0, tzinfo=timezone.utc), datetime(2025, 3, 28, 17, 0, tzinfo=timezone.utc))
-        assert result[1] == (datetime(2025, 3, 28, 20, 0, tzinfo=timezone.utc), datetime(2025, 3, 28, 21, 0, tzinfo=timezone.utc)) 
\ No newline at end of file
+        assert result[1] == (datetime(2025, 3, 28, 20, 0, tzinfo=timezone.utc), datetime(2025, 3, 28, 21, 0, tzinfo=timezone.utc)) 
+
+class TestSweepFreeBlocks:
+    @staticmethod
+    def _at(hour, minute=0, day=28):
+        return datetime(2025, 3, day, hour, minute, tzinfo=timezone.utc)
+
+    def test_matches_subtract_and_merge(self):
+        """Test that the sweep gives the same blocks as subtracting and merging"""
+        base_blocks = [(self._at(16), self._at(18)), (self._at(17), self._at(21)), (self._at(22), self._at(23))]
+        subtract_blocks = [(self._at(17), self._at(17, 30)), (self._at(19), self._at(20)), (self._at(18, 30), self._at(19, 30))]
+
+        expected = merge_overlapping_blocks(subtract_time_blocks(base_blocks, subtract_blocks))
+
+        assert sweep_free_blocks(base_blocks, subtract_blocks) == expected
+
+    def test_touching_blocks_are_joined(self):
+        """Test that touching availability blocks form one free block"""
+        base_blocks = [(self._at(18), self._at(19)), (self._at(16), self._at(18))]
+
+        assert sweep_free_blocks(base_blocks, []) == [(self._at(16), self._at(19))]
+
+    def test_min_duration(self):
+        """Test that free blocks shorter than the minimum duration are dropped"""
+        base_blocks = [(self._at(16), self._at(18))]
+        subtract_blocks = [(self._at(16, 30), self._at(17, 30))]
+
+        result = sweep_free_blocks(base_blocks, subtract_blocks, min_duration=timedelta(minutes=45))
+
+        assert result == []
+
+    def test_blocked_outside_availability(self):
+        """Test that blocked time outside of availability has no effect"""
+        base_blocks = [(self._at(16), self._at(18))]
+        subtract_blocks = [(self._at(10), self._at(12)), (self._at(18), self._at(20))]
+
+        assert sweep_free_blocks(base_blocks, subtract_blocks) == [(self._at(16), self._at(18))]
+
+    def test_random_blocks_match_pipeline(self):
+        """Test the sweep against the subtract/merge/filter pipeline on random data"""
+        rng = random.Random(42)
+        origin = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+        def random_blocks(count):
+            blocks = []
+            for _ in range(count):
+                start = origin + timedelta(minutes=15 * rng.randrange(0, 2000))
+                blocks.append((start, start + timedelta(minutes=15 * rng.randrange(1, 24))))
+            return blocks
+
+        for _ in range(20):
+            base_blocks = random_blocks(60)
+            subtract_blocks = random_blocks(40)
+            min_duration = timedelta(minutes=45)
+
+            merged = merge_overlapping_blocks(
+                subtract_time_blocks(merge_overlapping_blocks(base_blocks), subtract_blocks))
+            expected = [(start, end) for start, end in merged if end - start >= min_duration]
+
+            assert sweep_free_blocks(base_blocks, subtract_blocks, min_duration) == expected
+
+
+class TestLazyOccurrences:
+    def test_weekly_occurrences_are_chronological(self):
+        """Test that weekly occurrences come in date order regardless of BYDAY order"""
+        start_date = datetime(2025, 3, 3, 16, 0, tzinfo=timezone.utc)
+        end_date = datetime(2025, 3, 3, 18, 0, tzinfo=timezone.utc)
+        query_start = datetime(2025, 3, 1, tzinfo=timezone.utc)
+        query_end = datetime(2025, 3, 31, tzinfo=timezone.utc)
+
+        occurrences = generate_occurrences(start_date, end_date, "FREQ=WEEKLY;BYDAY=FR,MO,WE", query_start, query_end)
+
+        assert occurrences == sorted(occurrences)
+
+    def test_early_termination(self):
+        """Test that only the requested occurrences are generated over a wide range"""
+        start_date = datetime(2025, 3, 1, 10, 0, tzinfo=timezone.utc)
+        end_date = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+        query_start = datetime(2025, 3, 10, tzinfo=timezone.utc)
+        query_end = datetime(9999, 1, 1, tzinfo=timezone.utc)
+
+        occurrences = iter_occurrences(start_date, end_date, "FREQ=DAILY", query_start, query_end)
+
+        assert list(islice(occurrences, 2)) == [
+            (datetime(2025, 3, 10, 10, 0, tzinfo=timezone.utc), datetime(2025, 3, 10, 12, 0, tzinfo=timezone.utc)),
+            (datetime(2025, 3, 11, 10, 0, tzinfo=timezone.utc), datetime(2025, 3, 11, 12, 0, tzinfo=timezone.utc))
+        ]
+
+    def test_compiled_rule_is_reused(self):
+        """Test that the same availability compiles its rule only once"""
+        start_date = datetime(2025, 3, 3, 16, 0, tzinfo=timezone.utc)
+        end_date = datetime(2025, 3, 3, 18, 0, tzinfo=timezone.utc)
+
+        first = compile_recurrence(start_date, end_date, "FREQ=WEEKLY;BYDAY=WE,MO")
+        second = compile_recurrence(start_date, end_date, "FREQ=WEEKLY;BYDAY=WE,MO")
+
+        assert first is second
+        assert first.weekdays == [0, 2]
+
+    def test_streamed_free_blocks_match_pipeline(self):
+        """Test that streaming availabilities through the sweep matches generating and subtracting lists"""
+        query_start = datetime(2025, 3, 1, tzinfo=timezone.utc)
+        query_end = datetime(2025, 5, 31, tzinfo=timezone.utc)
+        availabilities = [
+            {"start_time": "2025-02-03T16:00:00+00:00", "end_time": "2025-02-03T19:00:00+00:00",
+             "recurrence_rule": "FREQ=WEEKLY;BYDAY=MO,WE,FR"},
+            {"start_time": "2025-02-01T18:00:00+00:00", "end_time": "2025-02-01T20:00:00+00:00",
+             "recurrence_rule": "FREQ=DAILY;INTERVAL=2"},
+            {"start_time": "2025-03-15T08:00:00+00:00", "end_time": "2025-03-15T12:00:00+00:00",
+             "recurrence_rule": None},
+        ]
+        blocked_blocks = sorted([
+            (datetime(2025, 3, 3, 17, 0, tzinfo=timezone.utc), datetime(2025, 3, 3, 18, 0, tzinfo=timezone.utc)),
+            (datetime(2025, 3, 15, 9, 0, tzinfo=timezone.utc), datetime(2025, 3, 15, 9, 30, tzinfo=timezone.utc)),
+            (datetime(2025, 4, 1, 0, 0, tzinfo=timezone.utc), datetime(2025, 4, 3, 0, 0, tzinfo=timezone.utc)),
+        ])
+        min_duration = timedelta(minutes=45)
+
+        merged = merge_overlapping_blocks(subtract_time_blocks(
+            merge_overlapping_blocks(list(iter_availability_blocks(availabilities, query_start, query_end))),
+            blocked_blocks
+        ))
+        expected = [(start, end) for start, end in merged if end - start >= min_duration]
+
+        streamed = iter_free_blocks(iter_availability_blocks(availabilities, query_start, query_end), blocked_blocks,
+                                    min_duration)
+
+        assert list(streamed) == expected
+
+
+class TestMonthBlocks:
+    def test_month_starts(self):
+        """Test that every month overlapping the range is listed once"""
+        months = get_month_starts(datetime(2024, 11, 20, tzinfo=timezone.utc), datetime(2025, 2, 1, 12, tzinfo=timezone.utc))
+
+        assert months == [
+            datetime(2024, 11, 1, tzinfo=timezone.utc),
+            datetime(2024, 12, 1, tzinfo=timezone.utc),
+            datetime(2025, 1, 1, tzinfo=timezone.utc),
+            datetime(2025, 2, 1, tzinfo=timezone.utc),
+        ]
+
+    def test_month_starts_end_on_boundary(self):
+        """Test that a range ending exactly at a month start doesn't include that month"""
+        months = get_month_starts(datetime(2025, 3, 5, tzinfo=timezone.utc), datetime(2025, 4, 1, tzinfo=timezone.utc))
+
+        assert months == [datetime(2025, 3, 1, tzinfo=timezone.utc)]
+
+    def test_clip_blocks_joins_month_boundary(self):
+        """Test that blocks split at a month boundary are joined before the duration filter"""
+        blocks = [
+            (datetime(2025, 3, 31, 23, 30, tzinfo=timezone.utc), datetime(2025, 4, 1, 0, 0, tzinfo=timezone.utc)),
+            (datetime(2025, 4, 1, 0, 0, tzinfo=timezone.utc), datetime(2025, 4, 1, 0, 30, tzinfo=timezone.utc)),
+        ]
+
+        result = clip_blocks(blocks, datetime(2025, 3, 1, tzinfo=timezone.utc), datetime(2025, 4, 30, tzinfo=timezone.utc),
+                             timedelta(minutes=45))
+
+        assert result == [(datetime(2025, 3, 31, 23, 30, tzinfo=timezone.utc), datetime(2025, 4, 1, 0, 30, tzinfo=timezone.utc))]
+
+    def test_clip_blocks_to_range(self):
+        """Test that blocks are cut to the range and too short leftovers are dropped"""
+        blocks = [
+            (datetime(2025, 3, 1, 8, 0, tzinfo=timezone.utc), datetime(2025, 3, 1, 10, 0, tzinfo=timezone.utc)),
+            (datetime(2025, 3, 1, 11, 0, tzinfo=timezone.utc), datetime(2025, 3, 1, 13, 0, tzinfo=timezone.utc)),
+        ]
+
+        result = clip_blocks(blocks, datetime(2025, 3, 1, 9, 30, tzinfo=timezone.utc),
+                             datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc), timedelta(minutes=45))
+
+        assert result == [(datetime(2025, 3, 1, 11, 0, tzinfo=timezone.utc), datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc))]
+
+
+class TestRecurrenceValidation:
+    @pytest.mark.parametrize("rule", ["FREQ=DAILY;INTERVAL=0", "FREQ=WEEKLY;INTERVAL=-1",
+                                      "FREQ=MONTHLY;BYMONTHDAY=32", "FREQ=MONTHLY;BYMONTH=X"])
+    def test_invalid_rule_fails_when_compiled(self, rule):
+        start = datetime(2025, 4, 7, 9, tzinfo=timezone.utc)
+        with pytest.raises(ValueError):
+            compile_recurrence(start, start + timedelta(hours=2), rule)
+
+    def test_invalid_availability_is_skipped(self):
+        availabilities = [
+            {"start_time": "2025-04-07T09:00:00Z", "end_time": "2025-04-07T11:00:00Z",
+             "recurrence_rule": "FREQ=DAILY;INTERVAL=0"},
+            {"start_time": "2025-04-07T12:00:00Z", "end_time": "2025-04-07T13:00:00Z", "recurrence_rule": None},
+        ]
+        start = datetime(2025, 4, 7, tzinfo=timezone.utc)
+
+        blocks = list(iter_availability_blocks(availabilities, start, start + timedelta(days=2)))
+
+        assert blocks == [(datetime(2025, 4, 7, 12, tzinfo=timezone.utc), datetime(2025, 4, 7, 13, tzinfo=timezone.utc))]
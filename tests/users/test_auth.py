@@ -0,0 +1,78 @@
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.core.cache import TTLCache
+from app.users import auth
+
+SECRET = "jwt-secret"
+
+
+def token(expires_in: float, secret: str = SECRET) -> str:
+    now = int(time.time())
+    claims = {"sub": "user", "aud": "authenticated", "role": "authenticated", "iat": now - 60,
+              "exp": int(now + expires_in)}
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+@pytest.fixture(autouse=True)
+def caches(monkeypatch):
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.setattr(auth, "token_cache", TTLCache(max_size=10, ttl=300))
+    monkeypatch.setattr(auth, "revoked_tokens", TTLCache(max_size=10, ttl=300))
+
+
+@pytest.mark.asyncio
+async def test_valid_token_is_verified_locally():
+    user_data, exp = await auth._verify_token(token(60))
+
+    assert user_data.user.id == "user"
+    assert exp == pytest.approx(time.time() + 60, abs=2)
+
+
+@pytest.mark.asyncio
+async def test_expired_token_is_refused():
+    with pytest.raises(jwt.ExpiredSignatureError):
+        await auth._verify_token(token(-10))
+
+    with pytest.raises(HTTPException) as error:
+        await auth._authenticate_user(token(-10))
+    assert error.value.status_code == 401
+    assert len(auth.token_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_token_with_bad_signature_is_refused():
+    with pytest.raises(jwt.InvalidSignatureError):
+        await auth._verify_token(token(60, secret="other-secret"))
+
+    with pytest.raises(HTTPException) as error:
+        await auth._authenticate_user(token(60, secret="other-secret"))
+    assert error.value.status_code == 401
+    assert len(auth.token_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_token_expires_with_the_token():
+    access_token = token(10)
+
+    assert (await auth._authenticate_user(access_token)).user.id == "user"
+
+    expires_at, _ = auth.token_cache._data[auth._token_key(access_token)]
+    # Cached for less than TOKEN_CACHE_TTL, as long as the token is valid
+    assert expires_at <= time.monotonic() + 10
+    assert await auth._authenticate_user(access_token) is auth.token_cache.get(auth._token_key(access_token))
+
+
+@pytest.mark.asyncio
+async def test_signed_out_token_is_refused():
+    access_token = token(60)
+    await auth._authenticate_user(access_token)
+
+    auth.invalidate_token(access_token)
+
+    with pytest.raises(HTTPException) as error:
+        await auth._authenticate_user(access_token)
+    assert error.value.status_code == 401